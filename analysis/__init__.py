@@ -7,11 +7,25 @@
 # ROLE CONFIG (Unified)
 # -----------------------------
 from .model_config import ROLE_CONFIG
+from .expressions import metric
 
 # -----------------------------
 # UNIVERSAL MODEL ENGINE
 # -----------------------------
-from .model_engine import run_model
+from .model_engine import (
+    run_model,
+    cached_run_model,
+    warm_start,
+    run_model_batch,
+    rescore,
+    top_k,
+    get_context_frame,
+    invalidate_context,
+)
+from .context_stats import IncrementalContext
+from .sharded_context import add_context_sharded
+from .out_of_core import run_model_chunked
+from .tracing import trace_pipeline
 
 # -----------------------------
 # SUMMARY FUNCTIONS
@@ -38,9 +52,21 @@ __all__ = [
     # Unified configuration
     "ROLE_CONFIG",
     "get_role_config",
+    "metric",
 
     # Engine
     "run_model",
+    "cached_run_model",
+    "warm_start",
+    "run_model_batch",
+    "rescore",
+    "top_k",
+    "get_context_frame",
+    "invalidate_context",
+    "IncrementalContext",
+    "add_context_sharded",
+    "run_model_chunked",
+    "trace_pipeline",
 
     # Summaries
     "generate_gk_summary",
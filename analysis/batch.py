@@ -0,0 +1,334 @@
+"""
+Headless batch scoring: every scenario in a scenario file, written as
+partitioned Parquet shortlists plus a summary index.
+
+Usage:
+    python -m analysis.batch scenarios.json --out reports/2026-10-16
+    python -m analysis.batch scenarios.json --out reports/tmp --workers 8
+    python -m analysis.batch scenarios.json --out reports/tmp --overwrite
+
+Scenario file (JSON); every key is optional:
+
+    {
+      "path": "analysis/Final_Task_Data.csv",
+      "top_k": 10,
+      "roles": ["winger", "striker"],             (default: every role)
+      "min_minutes": [900, 1500],
+      "budgets": [5, 10, 20],
+      "presets": {                                (default: {"balanced": {}})
+        "balanced": {},
+        "goal_threat": {"Goal Threat": 1.5, "Wide Creator": 0.75}
+      },
+      "scenarios": [                              (extra, outside the grid)
+        {"role": "goalkeeper", "min_minutes": 2000, "budget": 3,
+         "preset": "sweeper", "sliders": {"Distribution": 1.75}}
+      ]
+    }
+
+The grid is roles x min_minutes x budgets x presets. Preset sliders name
+ROLE_CONFIG groups; groups a role does not have are ignored.
+
+Output:
+    <out>/shortlists/role=<role>/min_minutes=<m>/<data file>-<hash>.parquet
+        one row per shortlisted player per scenario; <hash> is a short
+        hash of the data file's absolute path, so same-named files from
+        different folders do not collide. Read the whole set with
+        pd.read_parquet("<out>/shortlists")
+    <out>/index.json
+        one entry per scenario, plus run totals
+
+A run refuses an output folder that is not empty. With --overwrite it
+replaces the <out>/shortlists and <out>/index.json of an earlier run,
+so the folder only holds the current run's partitions; nothing else in
+the folder is touched.
+"""
+
+import argparse
+import hashlib
+import itertools
+import json
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+
+import pandas as pd
+
+from . import model_engine
+from .model_config import ROLE_CONFIG
+from .model_engine import (
+    DEFAULT_BUDGET,
+    DEFAULT_MINUTES,
+    DEFAULT_PATH,
+    SHORTLIST_COLUMNS,
+    get_context_frame,
+    role_columns,
+    run_model,
+    set_context_frame,
+)
+from .parallel import process_pool_context
+
+DEFAULT_TOP_K = 10
+
+
+
+# SCENARIOS
+
+
+def expand_scenarios(spec: dict) -> list:
+    """
+    The scenario file as a flat list of
+    {name, path, role, min_minutes, budget, preset, sliders}.
+    """
+    path = spec.get("path", DEFAULT_PATH)
+    roles = spec.get("roles") or [r for r in ROLE_CONFIG if not r.startswith("__")]
+    presets = spec.get("presets") or {"balanced": {}}
+
+    scenarios = [
+        {"role": role, "min_minutes": m, "budget": b, "preset": name, "sliders": sliders}
+        for role, m, b, (name, sliders) in itertools.product(
+            roles,
+            spec.get("min_minutes", [DEFAULT_MINUTES]),
+            spec.get("budgets", [DEFAULT_BUDGET]),
+            presets.items(),
+        )
+    ]
+    for extra in spec.get("scenarios", []):
+        scenarios.append({
+            "path": extra.get("path", path),
+            "role": extra["role"],
+            "min_minutes": extra.get("min_minutes", DEFAULT_MINUTES),
+            "budget": extra.get("budget", DEFAULT_BUDGET),
+            "preset": extra.get("preset", "custom"),
+            "sliders": extra.get("sliders", {}),
+        })
+
+    for s in scenarios:
+        if s["role"] not in ROLE_CONFIG or s["role"].startswith("__"):
+            raise ValueError(f"Unknown role in scenario file: {s['role']}")
+        s.setdefault("path", path)
+        s["name"] = f"{s['role']}/{s['preset']}/min{s['min_minutes']}/budget{s['budget']}"
+    return scenarios
+
+
+
+# WORKERS
+
+
+def _partition_file(out_dir: str, path: str, role: str, min_minutes: int) -> str:
+    stem = os.path.splitext(os.path.basename(path))[0]
+    digest = hashlib.sha1(os.path.abspath(path).encode()).hexdigest()[:8]
+    return os.path.join(
+        out_dir, "shortlists", f"role={role}", f"min_minutes={min_minutes}",
+        f"{stem}-{digest}.parquet",
+    )
+
+
+# Context files already installed in this worker process's engine cache
+_INSTALLED_CONTEXTS: set = set()
+
+
+def _init_worker() -> None:
+    """Pool workers score serially: one process per partition is the parallelism."""
+    model_engine.CONTEXT_WORKERS = 1
+
+
+def _score_partition(
+    out_dir: str, scenarios: list, top_k: int, context_file: str | None = None
+) -> list:
+    """
+    Score one (path, min_minutes, role) partition: every scenario's
+    shortlist into one Parquet file. The role is scored once (cached
+    role state) and each scenario only re-ranks it. Returns the index
+    entries of the partition's scenarios.
+
+    `context_file` is the context frame the parent built for the
+    partition's (path, min_minutes), pickled; it is installed into the
+    engine cache instead of being built again.
+    """
+    first = scenarios[0]
+    role, min_minutes = first["role"], first["min_minutes"]
+    if context_file is not None and context_file not in _INSTALLED_CONTEXTS:
+        set_context_frame(first["path"], min_minutes, pd.read_pickle(context_file))
+        _INSTALLED_CONTEXTS.add(context_file)
+    cfg = ROLE_CONFIG[role]
+    columns = list(dict.fromkeys(SHORTLIST_COLUMNS + cfg["columns"]))
+
+    frames, entries = [], []
+    for s in scenarios:
+        t0 = time.perf_counter()
+        df = run_model(
+            role, path=s["path"], min_minutes=min_minutes,
+            budget_million=s["budget"], top_k=top_k, **s["sliders"],
+        )
+        shortlist = df[[c for c in columns if c in df.columns]].copy()
+        shortlist.insert(0, "rank", range(1, len(shortlist) + 1))
+        shortlist.insert(0, "preset", s["preset"])
+        shortlist.insert(0, "budget", float(s["budget"]))
+        shortlist.insert(0, "scenario", s["name"])
+        frames.append(shortlist)
+
+        top = df.iloc[0] if len(df) else None
+        entries.append({
+            "scenario": s["name"],
+            "path": s["path"],
+            "role": role,
+            "min_minutes": min_minutes,
+            "budget": s["budget"],
+            "preset": s["preset"],
+            "sliders": s["sliders"],
+            "players": len(df),
+            "top_id": None if top is None else str(top["ID"]),
+            "top_buyscore": None if top is None else float(top["BuyScore"]),
+            "seconds": time.perf_counter() - t0,
+        })
+
+    file = _partition_file(out_dir, first["path"], role, min_minutes)
+    os.makedirs(os.path.dirname(file), exist_ok=True)
+    out = pd.concat(frames, ignore_index=True)
+    # Mixed-type object columns (e.g. NaN / str positions) as strings
+    for col in out.columns[out.dtypes == object]:
+        out[col] = out[col].astype("string")
+    out.to_parquet(file, index=False)
+
+    for e in entries:
+        e["file"] = os.path.relpath(file, out_dir)
+    return entries
+
+
+
+# DRIVER
+
+
+def _prepare_out_dir(out_dir: str, overwrite: bool) -> None:
+    """
+    Refuse a non-empty `out_dir` unless `overwrite`; then remove only the
+    shortlists and index of an earlier run, which pd.read_parquet on
+    <out>/shortlists would otherwise read back with this run's.
+    """
+    if os.path.isdir(out_dir) and os.listdir(out_dir):
+        if not overwrite:
+            raise FileExistsError(
+                f"Output folder {out_dir} is not empty; pass --overwrite to "
+                "replace the shortlists and index of an earlier run."
+            )
+        shutil.rmtree(os.path.join(out_dir, "shortlists"), ignore_errors=True)
+        index_file = os.path.join(out_dir, "index.json")
+        if os.path.exists(index_file):
+            os.remove(index_file)
+    os.makedirs(out_dir, exist_ok=True)
+
+
+def run_batch(
+    spec: dict, out_dir: str, workers: int | None = None, overwrite: bool = False
+) -> dict:
+    """
+    Score every scenario of `spec` (see module docstring) into `out_dir`.
+
+    Scenarios are partitioned by (data file, min_minutes, role). The
+    context frame for each (data file, min_minutes) is built once, in the
+    parent, with every column its roles read. With a process pool it is
+    then pickled to a temporary folder and each worker installs it into
+    its own engine cache, so N roles at one threshold still share one
+    context build. Returns the index written to <out_dir>/index.json.
+    """
+    _prepare_out_dir(out_dir, overwrite)
+
+    scenarios = expand_scenarios(spec)
+    top_k = spec.get("top_k", DEFAULT_TOP_K)
+    started = datetime.now(timezone.utc).isoformat(timespec="seconds")
+    t0 = time.perf_counter()
+
+    partitions = {}
+    for s in scenarios:
+        partitions.setdefault((s["path"], s["min_minutes"], s["role"]), []).append(s)
+
+    workers = workers or os.cpu_count() or 1
+    pooled = workers > 1 and len(partitions) > 1
+
+    # One context build per (data, min_minutes), with every column the
+    # roles scored against it read
+    contexts = {}
+    for path, m, role in partitions:
+        contexts.setdefault((path, m), set()).update(role_columns(role, path))
+    frames = {
+        (path, m): get_context_frame(path, m, columns=sorted(cols))
+        for (path, m), cols in contexts.items()
+    }
+    t_context = time.perf_counter() - t0
+
+    if pooled:
+        with tempfile.TemporaryDirectory(prefix="context-") as tmp:
+            files = {}
+            for i, (key, frame) in enumerate(frames.items()):
+                files[key] = os.path.join(tmp, f"context-{i}.pkl")
+                frame.to_pickle(files[key])
+
+            with ProcessPoolExecutor(
+                max_workers=min(workers, len(partitions)),
+                mp_context=process_pool_context(),
+                initializer=_init_worker,
+            ) as ex:
+                results = list(ex.map(
+                    _score_partition,
+                    [out_dir] * len(partitions), partitions.values(),
+                    [top_k] * len(partitions),
+                    [files[path, m] for path, m, _ in partitions],
+                ))
+    else:
+        results = [_score_partition(out_dir, p, top_k) for p in partitions.values()]
+
+    elapsed = time.perf_counter() - t0
+    index = {
+        "run": {
+            "started": started,
+            "scenarios": len(scenarios),
+            "partitions": len(partitions),
+            "workers": workers,
+            "top_k": top_k,
+            "context_seconds": t_context,
+            "seconds": elapsed,
+            "scenarios_per_second": len(scenarios) / elapsed if elapsed else None,
+        },
+        "scenarios": [e for part in results for e in part],
+    }
+    with open(os.path.join(out_dir, "index.json"), "w") as fh:
+        json.dump(index, fh, indent=2)
+    return index
+
+
+
+# CLI
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Batch scoring of scenario grids")
+    parser.add_argument("scenarios", help="Scenario file (JSON)")
+    parser.add_argument("--out", required=True, help="Output folder")
+    parser.add_argument("--workers", type=int, help="Worker processes (default: CPU count)")
+    parser.add_argument("--path", help="Data file, overriding the scenario file's")
+    parser.add_argument(
+        "--overwrite", action="store_true",
+        help="Replace the shortlists and index.json of an earlier run in --out",
+    )
+    args = parser.parse_args(argv)
+
+    with open(args.scenarios) as fh:
+        spec = json.load(fh)
+    if args.path:
+        spec["path"] = args.path
+
+    index = run_batch(spec, args.out, args.workers, args.overwrite)
+    run = index["run"]
+    print(
+        f"{run['scenarios']} scenarios in {run['partitions']} partitions | "
+        f"context {run['context_seconds']:.2f} s | total {run['seconds']:.2f} s | "
+        f"{run['scenarios_per_second']:.1f} scenarios/s"
+    )
+    print(f"Shortlists and index.json written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
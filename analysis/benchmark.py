@@ -0,0 +1,678 @@
+"""
+Micro-benchmarks for the analysis pipeline.
+
+Usage:
+    python -m analysis.benchmark team-context --rows 10000 100000 1000000
+    python -m analysis.benchmark ctx-norm --rows 100000
+    python -m analysis.benchmark ctx-norm --path analysis/Final_Task_Data.csv
+    python -m analysis.benchmark ctx-update --rows 100000 --changed 500
+    python -m analysis.benchmark ctx-sharded --rows 1000000 --workers 1 4 16
+    python -m analysis.benchmark ctx-sharded --rows 300000 --roles winger --repeat 1
+    python -m analysis.benchmark compact --rows 100000
+    python -m analysis.benchmark stages --rows 1000 100000 --out stages.json
+    python -m analysis.benchmark stages --baseline stages.json --out new.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+import warnings
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+from .context_stats import IncrementalContext
+from .data_cache import clear_cache
+from .model_config import ROLE_CONFIG
+from .sharded_context import add_context_sharded
+from .synthetic import write_synthetic_csv
+from . import compact, model_engine
+from .model_engine import (
+    CONTEXT_FAMILIES,
+    DEFAULT_BUDGET,
+    DEFAULT_MINUTES,
+    LEAGUE_MEANS,
+    add_context_normalised_metrics,
+    add_index_percentiles,
+    add_league_context_means,
+    add_metric_percentiles,
+    add_team_context_metrics,
+    cache_megabytes,
+    compute_baseline,
+    compute_buy_score,
+    compute_indices,
+    compute_overall,
+    invalidate_context,
+    load_data,
+    role_frame,
+    run_model,
+    top_k as top_k_frame,
+    zscore_once,
+)
+
+
+
+# SYNTHETIC INPUT
+
+
+def _synthetic_team_frame(
+    n_rows: int,
+    n_leagues: int = 40,
+    teams_per_league: int = 20,
+    seed: int = 0,
+    metrics=(),
+) -> pd.DataFrame:
+    """
+    Minimal player-season frame with the team-context inputs, plus a
+    gamma-distributed column for each name in `metrics`.
+    """
+    rng = np.random.default_rng(seed)
+    league = rng.integers(0, n_leagues, n_rows)
+    team = rng.integers(0, teams_per_league, n_rows)
+
+    df = pd.DataFrame(
+        {
+            "League": pd.Series(league).map(lambda i: f"League {i}"),
+            "Team": pd.Series(league * teams_per_league + team).map(lambda i: f"Team {i}"),
+            "Minutes": rng.integers(900, 3420, n_rows),
+            "Op_passes": rng.gamma(4.0, 8.0, n_rows),
+            "Pressures": rng.gamma(4.0, 4.0, n_rows),
+            "Turnovers": rng.gamma(2.0, 1.0, n_rows),
+            "Np_xg": rng.gamma(1.5, 0.1, n_rows),
+        }
+    )
+    extra = [m for m in metrics if m not in df.columns]
+    return pd.concat(
+        [df, pd.DataFrame(rng.gamma(2.0, 2.0, (n_rows, len(extra))), columns=extra)],
+        axis=1,
+    )
+
+
+
+# REFERENCE IMPLEMENTATION (groupby.apply)
+
+
+def _team_context_apply(df: pd.DataFrame) -> pd.DataFrame:
+    """The original per-group lambda version of add_team_context_metrics."""
+    grp = df.groupby(["League", "Team"])
+
+    def wavg(g: pd.DataFrame, col: str) -> float:
+        if col not in g.columns or g[col].isna().all():
+            return np.nan
+        return np.average(g[col], weights=g["Minutes"])
+
+    team_stats = grp.apply(
+        lambda g: pd.Series(
+            {
+                "Team_Minutes": g["Minutes"].sum(),
+                "Team_PossessionProxy": wavg(g, "Op_passes"),
+                "Team_PressIntensity": wavg(g, "Pressures"),
+                "Team_TempoProxy": wavg(g, "Turnovers"),
+                "Team_Att_xg_per90": wavg(g, "Np_xg"),
+                "Team_Def_xg_per90": wavg(g, "Np_xg_faced")
+                if "Np_xg_faced" in g.columns
+                else np.nan,
+            }
+        )
+    )
+    team_stats["Team_xGD_proxy"] = (
+        team_stats["Team_Att_xg_per90"] - team_stats["Team_Def_xg_per90"]
+    )
+
+    return df.merge(
+        team_stats,
+        left_on=["League", "Team"],
+        right_index=True,
+        how="left",
+        validate="many_to_one",
+    )
+
+
+
+def _context_norm_columnwise(df: pd.DataFrame) -> pd.DataFrame:
+    """The original one-column-at-a-time add_context_normalised_metrics."""
+    lg = df.groupby("League")
+    for lg_col, team_col in LEAGUE_MEANS.items():
+        df[lg_col] = lg[team_col].transform("mean")
+
+    for metrics, team_col, league_mean_col in CONTEXT_FAMILIES.values():
+        for col in metrics:
+            if col not in df.columns or df[team_col].std(skipna=True) < 1e-6:
+                continue
+            denom = df[team_col].replace(0, np.nan)
+            factor = (df[league_mean_col] / denom).clip(0.5, 1.5).fillna(1.0)
+            df[col + "_ctx"] = df[col] * factor
+
+    if "Np_xg_ctx" in df.columns and "Np_goals_ctx" in df.columns:
+        df["Actual_vs_xG_ctx"] = df["Np_goals_ctx"] - df["Np_xg_ctx"]
+    return df
+
+
+
+# TIMING
+
+
+def _best_of(fn, repeat: int) -> float:
+    best = np.inf
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def _peak_memory(fn, *args) -> float:
+    """Peak bytes allocated (Python + NumPy) while fn(*args) runs."""
+    tracemalloc.start()
+    try:
+        fn(*args)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def bench_team_context(sizes=(10_000, 100_000, 1_000_000), repeat: int = 3) -> list:
+    """
+    Time add_team_context_metrics against the groupby.apply reference
+    at each row count, after checking both give the same team columns.
+    """
+    results = []
+    team_cols = [
+        "Team_Minutes", "Team_PossessionProxy", "Team_PressIntensity",
+        "Team_TempoProxy", "Team_Att_xg_per90",
+    ]
+
+    for n in sizes:
+        df = _synthetic_team_frame(n)
+
+        new = add_team_context_metrics(df)
+        ref = _team_context_apply(df)
+        np.testing.assert_allclose(
+            new[team_cols].to_numpy(), ref[team_cols].to_numpy(), rtol=1e-9
+        )
+
+        t_new = _best_of(lambda: add_team_context_metrics(df), repeat)
+        t_ref = _best_of(lambda: _team_context_apply(df), repeat)
+        results.append(
+            {"rows": n, "apply_s": t_ref, "vectorised_s": t_new, "speedup": t_ref / t_new}
+        )
+        print(
+            f"{n:>10,} rows | groupby.apply {t_ref * 1000:9.1f} ms | "
+            f"vectorised {t_new * 1000:8.1f} ms | x{t_ref / t_new:5.1f}"
+        )
+
+    return results
+
+
+
+def bench_ctx_norm(sizes=(100_000,), repeat: int = 3, path: str | None = None) -> list:
+    """
+    Runtime and peak memory of the context-normalisation stage: block-wise
+    add_context_normalised_metrics vs the original per-column version.
+    With `path`, runs once on that player-season file instead of
+    synthetic frames.
+    """
+    results = []
+    metrics = [m for fam in CONTEXT_FAMILIES.values() for m in fam[0]]
+
+    if path is not None:
+        frames = [add_team_context_metrics(load_data(path, DEFAULT_MINUTES))]
+    else:
+        frames = (
+            add_team_context_metrics(_synthetic_team_frame(n, metrics=metrics))
+            for n in sizes
+        )
+
+    for base in frames:
+        n = len(base)
+
+        new = add_context_normalised_metrics(base.copy())
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", pd.errors.PerformanceWarning)
+            ref = _context_norm_columnwise(base.copy())
+            ctx_cols = [c for c in ref.columns if c.endswith("_ctx")]
+            np.testing.assert_allclose(new[ctx_cols].to_numpy(), ref[ctx_cols].to_numpy())
+
+            t_ref = _best_of(lambda: _context_norm_columnwise(base.copy()), repeat)
+            m_ref = _peak_memory(_context_norm_columnwise, base.copy())
+
+        t_new = _best_of(lambda: add_context_normalised_metrics(base.copy()), repeat)
+        m_new = _peak_memory(add_context_normalised_metrics, base.copy())
+
+        results.append(
+            {"rows": n, "columnwise_s": t_ref, "blockwise_s": t_new,
+             "columnwise_peak_mb": m_ref / 1e6, "blockwise_peak_mb": m_new / 1e6}
+        )
+        print(
+            f"{n:>10,} rows | per-column {t_ref * 1000:8.1f} ms, peak {m_ref / 1e6:7.1f} MB | "
+            f"block-wise {t_new * 1000:8.1f} ms, peak {m_new / 1e6:7.1f} MB"
+        )
+
+    return results
+
+
+
+def bench_ctx_update(sizes=(100_000, 300_000), changed: int = 500, repeat: int = 3) -> list:
+    """
+    A snapshot of `changed` rows from one league (new minutes / pressures
+    for existing players): IncrementalContext.update vs rebuilding team
+    context + context normalisation for the whole frame. Both work on rows
+    already in memory; a changed source file is still rebuilt by
+    get_context_frame (see context_stats).
+    """
+    results = []
+    metrics = [m for fam in CONTEXT_FAMILIES.values() for m in fam[0]]
+
+    def rebuild(df):
+        return add_context_normalised_metrics(add_team_context_metrics(df))
+
+    for n in sizes:
+        base = _synthetic_team_frame(n, metrics=metrics)
+        one_league = base.index[base["League"] == base["League"].iloc[0]]
+        snap = base.loc[one_league[:changed]].copy()
+        snap["Minutes"] += 90
+        snap["Pressures"] *= 1.05
+
+        inc = IncrementalContext(base)
+        inc.update(snap)
+        final = base.copy()
+        final.loc[snap.index] = snap
+
+        ref = rebuild(final)
+        cols = [c for c in ref.columns if c.startswith(("Team_", "Lg_")) or c.endswith("_ctx")]
+        np.testing.assert_allclose(
+            inc.frame.loc[ref.index, cols].to_numpy(dtype=float),
+            ref[cols].to_numpy(dtype=float),
+            rtol=1e-9, atol=1e-9,
+        )
+
+        t_full = _best_of(lambda: rebuild(final), repeat)
+        t_inc = _best_of(lambda: inc.update(snap), repeat)
+        results.append(
+            {"rows": n, "changed": len(snap), "rebuild_s": t_full,
+             "incremental_s": t_inc, "speedup": t_full / t_inc}
+        )
+        print(
+            f"{n:>10,} rows, {len(snap):,} changed | rebuild {t_full * 1000:8.1f} ms | "
+            f"incremental {t_inc * 1000:8.1f} ms | x{t_full / t_inc:5.1f}"
+        )
+
+    return results
+
+
+
+def bench_ctx_sharded(
+    sizes=(300_000,), workers=(1, 2, 4), repeat: int = 3, threads: bool = False
+) -> list:
+    """
+    Team context + context normalisation + z-scores of every *_ctx metric
+    (40 leagues): serial stages vs add_context_sharded per worker count.
+    """
+    results = []
+    metrics = [m for fam in CONTEXT_FAMILIES.values() for m in fam[0]]
+    z_metrics = [m + "_ctx" for m in metrics]
+
+    def serial(df):
+        return zscore_once(
+            add_context_normalised_metrics(add_team_context_metrics(df)), z_metrics
+        )
+
+    for n in sizes:
+        base = _synthetic_team_frame(n, metrics=metrics)
+        t_serial = _best_of(lambda: serial(base), repeat)
+        print(f"{n:>10,} rows | serial {t_serial * 1000:8.1f} ms")
+
+        for w in workers:
+            t = _best_of(
+                lambda: add_context_sharded(
+                    base, zscore_metrics=z_metrics, workers=w, use_processes=not threads
+                ),
+                repeat,
+            )
+            results.append(
+                {"rows": n, "workers": w, "serial_s": t_serial,
+                 "sharded_s": t, "speedup": t_serial / t}
+            )
+            print(
+                f"{'':>10} {w:>3} {'threads' if threads else 'processes':>9} | "
+                f"sharded {t * 1000:8.1f} ms | x{t_serial / t:5.2f}"
+            )
+
+    return results
+
+
+def bench_run_model_sharded(
+    sizes=(300_000,), workers=(1, 2, 4), roles=None, repeat: int = 3, seed: int = 0
+) -> list:
+    """
+    Cold run_model per role on a synthetic file with CONTEXT_WORKERS = 1
+    vs each worker count: context build, *_ctx materialisation and the
+    role pipeline's z-scores, as the app runs them. Engine caches are
+    cleared before every run (the columnar file cache stays warm), and
+    each worker count's output is checked against the serial one before
+    it is timed, which also starts its pool outside the timed runs.
+    """
+    roles = roles or [r for r in ROLE_CONFIG if not r.startswith("__")]
+    results = []
+
+    def cold_run(w):
+        model_engine.CONTEXT_WORKERS = w
+        invalidate_context()
+        return {r: run_model(r, path=path) for r in roles}
+
+    serial_workers = model_engine.CONTEXT_WORKERS
+    try:
+        for n in sizes:
+            with tempfile.TemporaryDirectory() as tmp:
+                path = write_synthetic_csv(os.path.join(tmp, "players.csv"), n, seed=seed)
+                expected = cold_run(1)
+                t_serial = _best_of(lambda: cold_run(1), repeat)
+                print(f"{n:>10,} rows | run_model x{len(roles)} serial {t_serial * 1000:8.1f} ms")
+
+                for w in workers:
+                    for r, out in cold_run(w).items():
+                        pd.testing.assert_frame_equal(out, expected[r])
+                    t = _best_of(lambda: cold_run(w), repeat)
+                    results.append(
+                        {"rows": n, "workers": w, "roles": len(roles),
+                         "serial_s": t_serial, "sharded_s": t, "speedup": t_serial / t}
+                    )
+                    print(
+                        f"{'':>10} {w:>3} processes | run_model {t * 1000:8.1f} ms | "
+                        f"x{t_serial / t:5.2f}"
+                    )
+    finally:
+        model_engine.CONTEXT_WORKERS = serial_workers
+        invalidate_context()
+
+    return results
+
+
+
+# COMPACT MEMORY
+
+
+def bench_compact(
+    sizes=(100_000,), roles=None, top_k: int = 20, seed: int = 0,
+    tolerance: float = compact.COMPACT_TOLERANCE,
+) -> list:
+    """
+    run_model for every role with ANALYSIS_COMPACT_MEMORY off and on, on
+    the same synthetic file. Checks BuyScore and Overall_adj agree within
+    `tolerance` and the top_k order is unchanged, then reports what each
+    layout holds: the engine caches (context and role frames), shared by
+    every session in the process, and one full run_model result, which
+    each session keeps per query.
+    """
+    roles = roles or [r for r in ROLE_CONFIG if not r.startswith("__")]
+    results = []
+
+    def run(compact_memory):
+        compact.COMPACT_MEMORY = compact_memory
+        invalidate_context()
+        out = {r: run_model(r, path=path) for r in roles}
+        return out, cache_megabytes()
+
+    setting = compact.COMPACT_MEMORY
+    try:
+        for n in sizes:
+            with tempfile.TemporaryDirectory() as tmp:
+                path = write_synthetic_csv(os.path.join(tmp, "players.csv"), n, seed=seed)
+                full, full_mb = run(False)
+                small, small_mb = run(True)
+
+            for r in roles:
+                f, c = full[r], small[r].loc[full[r].index]
+                diff = max(
+                    float(np.nanmax(np.abs(f[col].to_numpy(float) - c[col].to_numpy(float))))
+                    for col in ("BuyScore", "Overall_adj")
+                )
+                if diff > tolerance:
+                    raise AssertionError(f"{r}: compact scores differ by {diff:.2e}")
+                if not top_k_frame(f, top_k).index.equals(top_k_frame(c, top_k).index):
+                    raise AssertionError(f"{r}: compact top-{top_k} order differs")
+
+                results.append(
+                    {"rows": n, "role": r, "max_diff": diff,
+                     "result_mb": compact.frame_megabytes(f),
+                     "compact_result_mb": compact.frame_megabytes(small[r])}
+                )
+                print(
+                    f"{n:>10,} rows | {r:<11} | max score diff {diff:.1e} | "
+                    f"result {results[-1]['result_mb']:7.1f} -> "
+                    f"{results[-1]['compact_result_mb']:7.1f} MB"
+                )
+
+            shared = {k: (full_mb[k], small_mb[k]) for k in ("context", "roles")}
+            results.append({"rows": n, "role": None, "cache_mb": shared})
+            for k, (before, after) in shared.items():
+                print(f"{n:>10,} rows | {k:<11} | cache {before:7.1f} -> {after:7.1f} MB")
+    finally:
+        compact.COMPACT_MEMORY = setting
+        invalidate_context()
+
+    return results
+
+
+
+# PER-STAGE SUITE
+
+
+STAGE_SIZES = (1_000, 10_000, 100_000, 1_000_000)
+
+# A stage counts as a regression when it is this much slower than baseline
+REGRESSION_TOLERANCE = 0.20
+
+
+def _time_stage(fn, df: pd.DataFrame, repeat: int):
+    """
+    Best-of-`repeat` time of fn(copy of df). Stages add columns in place,
+    so each run gets a fresh copy, made outside the timed region.
+    Returns (seconds, last output).
+    """
+    best, out = np.inf, None
+    for _ in range(repeat):
+        frame = df.copy()
+        t0 = time.perf_counter()
+        out = fn(frame)
+        best = min(best, time.perf_counter() - t0)
+    return best, out
+
+
+def _run_metadata(repeat: int, seed: int, min_minutes: int, budget: float) -> dict:
+    return {
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "repeat": repeat,
+        "seed": seed,
+        "min_minutes": min_minutes,
+        "budget_million": budget,
+    }
+
+
+def bench_stages(
+    sizes=STAGE_SIZES,
+    roles=None,
+    repeat: int = 3,
+    seed: int = 0,
+    min_minutes: int = DEFAULT_MINUTES,
+    budget_million: float = DEFAULT_BUDGET,
+) -> dict:
+    """
+    Time every stage of the scoring pipeline on synthetic data of each
+    size: load (CSV parse + cache build, then cached read), team context,
+    context normalisation, and per role the position filter, baseline,
+    indices (+ index percentiles), overall, buy score and pizza
+    percentiles.
+
+    Returns {"meta": {...}, "results": [{"rows", "role", "stage",
+    "input_rows", "seconds"}, ...]}; role is None for shared stages.
+    """
+    roles = roles or [r for r in ROLE_CONFIG if not r.startswith("__")]
+    results = []
+
+    def record(n, role, stage, frame, seconds):
+        results.append(
+            {"rows": n, "role": role, "stage": stage,
+             "input_rows": len(frame), "seconds": seconds}
+        )
+        print(f"{n:>10,} rows | {role or '-':<11} | {stage:<13} | "
+              f"{len(frame):>9,} in | {seconds * 1000:9.1f} ms")
+
+    for n in sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = write_synthetic_csv(os.path.join(tmp, "players.csv"), n, seed=seed)
+
+            t_csv = np.inf
+            for _ in range(repeat):
+                clear_cache(path)
+                t0 = time.perf_counter()
+                df = load_data(path, min_minutes)
+                t_csv = min(t_csv, time.perf_counter() - t0)
+            record(n, None, "load_csv", df, t_csv)
+
+            t_cache = _best_of(lambda: load_data(path, min_minutes), repeat)
+            record(n, None, "load_cache", df, t_cache)
+
+        t, ctx = _time_stage(add_team_context_metrics, df, repeat)
+        record(n, None, "team_context", df, t)
+
+        t, ctx = _time_stage(
+            lambda d: add_context_normalised_metrics(add_league_context_means(d)), ctx, repeat
+        )
+        record(n, None, "ctx_norm", ctx, t)
+
+        for role in roles:
+            cfg = ROLE_CONFIG[role]
+
+            t = _best_of(lambda: role_frame(ctx, cfg["positions"]), repeat)
+            base = role_frame(ctx, cfg["positions"])
+            record(n, role, "role_filter", ctx, t)
+
+            stages = [
+                ("baseline", lambda d: compute_baseline(d, cfg["baseline"])),
+                ("indices", lambda d: add_index_percentiles(
+                    compute_indices(d, cfg["indices"]), cfg["indices"])),
+                ("overall", lambda d: compute_overall(d, cfg["groups"], cfg["weights"], {})),
+                ("buy_score", lambda d: compute_buy_score(d, budget_million)),
+                ("pizza_pct", lambda d: add_metric_percentiles(d, cfg["groups"], cfg["invert"])),
+            ]
+            for stage, fn in stages:
+                t, out = _time_stage(fn, base, repeat)
+                record(n, role, stage, base, t)
+                base = out
+
+    return {
+        "meta": _run_metadata(repeat, seed, min_minutes, budget_million),
+        "results": results,
+    }
+
+
+def compare_stage_results(
+    baseline: dict, current: dict, tolerance: float = REGRESSION_TOLERANCE
+) -> list:
+    """
+    Stages present in both runs that got more than `tolerance` slower,
+    as [{"rows", "role", "stage", "baseline_s", "current_s", "ratio"}].
+    """
+    def key(r):
+        return r["rows"], r["role"], r["stage"]
+
+    before = {key(r): r["seconds"] for r in baseline["results"]}
+    slower = []
+    for r in current["results"]:
+        old = before.get(key(r))
+        if old and r["seconds"] > old * (1 + tolerance):
+            slower.append(
+                {"rows": r["rows"], "role": r["role"], "stage": r["stage"],
+                 "baseline_s": old, "current_s": r["seconds"],
+                 "ratio": r["seconds"] / old}
+            )
+    return slower
+
+
+
+# CLI
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Analysis pipeline benchmarks")
+    sub = parser.add_subparsers(dest="bench", required=True)
+
+    tc = sub.add_parser("team-context", help="Team aggregation: vectorised vs groupby.apply")
+    tc.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    tc.add_argument("--repeat", type=int, default=3)
+
+    cn = sub.add_parser("ctx-norm", help="Context normalisation: block-wise vs per-column")
+    cn.add_argument("--rows", type=int, nargs="+", default=[100_000])
+    cn.add_argument("--repeat", type=int, default=3)
+    cn.add_argument("--path", help="Player-season CSV to use instead of synthetic data")
+
+    cu = sub.add_parser("ctx-update", help="Context layer: incremental update vs full rebuild")
+    cu.add_argument("--rows", type=int, nargs="+", default=[100_000, 300_000])
+    cu.add_argument("--changed", type=int, default=500)
+    cu.add_argument("--repeat", type=int, default=3)
+
+    cs = sub.add_parser("ctx-sharded", help="Context stages: serial vs per-league pool")
+    cs.add_argument("--rows", type=int, nargs="+", default=[300_000])
+    cs.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    cs.add_argument("--repeat", type=int, default=3)
+    cs.add_argument("--threads", action="store_true", help="Thread pool instead of processes")
+    cs.add_argument("--roles", nargs="+", help="Roles for the run_model runs (default: all)")
+
+    cm = sub.add_parser("compact", help="Compact memory: scores vs float64, memory saved")
+    cm.add_argument("--rows", type=int, nargs="+", default=[100_000])
+    cm.add_argument("--roles", nargs="+", help="Roles to run (default: all)")
+    cm.add_argument("--top-k", type=int, default=20)
+
+    st = sub.add_parser("stages", help="Every pipeline stage per role, written to JSON")
+    st.add_argument("--rows", type=int, nargs="+", default=list(STAGE_SIZES))
+    st.add_argument("--roles", nargs="+", help="Roles to run (default: all)")
+    st.add_argument("--repeat", type=int, default=3)
+    st.add_argument("--seed", type=int, default=0)
+    st.add_argument("--out", default="benchmark_stages.json", help="Results file")
+    st.add_argument("--baseline", help="Earlier results file to check for regressions")
+    st.add_argument("--tolerance", type=float, default=REGRESSION_TOLERANCE)
+
+    args = parser.parse_args(argv)
+
+    if args.bench == "team-context":
+        bench_team_context(args.rows, args.repeat)
+    elif args.bench == "ctx-norm":
+        bench_ctx_norm(args.rows, args.repeat, args.path)
+    elif args.bench == "ctx-update":
+        bench_ctx_update(args.rows, args.changed, args.repeat)
+    elif args.bench == "ctx-sharded":
+        bench_ctx_sharded(args.rows, args.workers, args.repeat, args.threads)
+        bench_run_model_sharded(args.rows, args.workers, args.roles, args.repeat)
+    elif args.bench == "compact":
+        bench_compact(args.rows, args.roles, args.top_k)
+    elif args.bench == "stages":
+        report = bench_stages(args.rows, args.roles, args.repeat, args.seed)
+        with open(args.out, "w") as fh:
+            json.dump(report, fh, indent=2)
+        print(f"Results written to {args.out}")
+
+        if args.baseline:
+            with open(args.baseline) as fh:
+                slower = compare_stage_results(json.load(fh), report, args.tolerance)
+            for r in slower:
+                print(f"SLOWER {r['rows']:>10,} rows | {r['role'] or '-':<11} | "
+                      f"{r['stage']:<13} | {r['baseline_s'] * 1000:9.1f} -> "
+                      f"{r['current_s'] * 1000:9.1f} ms | x{r['ratio']:5.2f}")
+            if slower:
+                sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Compact in-memory layout for the cached frames.
+
+With COMPACT_MEMORY on (env ANALYSIS_COMPACT_MEMORY=1), model_engine
+stores its shared context frame and each role's scored frame as:
+
+  - categoricals for the string dimensions (League, Team, positions,
+    Value), which repeat across thousands of rows
+  - float32 for derived columns (*_ctx, z_*, role indices and their
+    percentiles, group z-aggregates, team / league context)
+  - role frames without the intermediates no output reads (raw inputs
+    outside the pizza groups, their z-scores, *_ctx inputs)
+
+Raw metrics, baseline metrics and the scores rescore() writes stay
+float64, so rankings only move within float32 rounding of the inputs.
+`python -m analysis.benchmark compact` checks that against a float64
+run (scores within COMPACT_TOLERANCE, same top-k order) and reports the
+memory each layout holds.
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+
+COMPACT_MEMORY = os.environ.get("ANALYSIS_COMPACT_MEMORY", "0") == "1"
+
+CATEGORY_COLUMNS = ["League", "Team", "Position_1", "Position_2", "Value"]
+
+# Derived float columns, by name pattern
+FLOAT32_PREFIXES = ("z_", "Team_", "Lg_")
+FLOAT32_SUFFIXES = ("_ctx", "_Index", "_pct", "_GroupZ")
+
+# Largest absolute BuyScore / Overall_adj difference accepted between a
+# compact and a float64 run of the same query
+COMPACT_TOLERANCE = 1e-5
+
+# Kept as float64: scores, rankings and the columns rescore() replaces
+FLOAT64_COLUMNS = {
+    "Overall_raw", "Overall_adj", "Overall_pct", "Overall_pct_global",
+    "ValueEff", "Perf", "z_ValueEff", "z_Perf", "BuyScore",
+}
+
+
+
+# DTYPES
+
+
+def is_compact_float(col: str) -> bool:
+    """True for derived columns stored as float32 in compact mode."""
+    return col not in FLOAT64_COLUMNS and (
+        col.startswith(FLOAT32_PREFIXES) or col.endswith(FLOAT32_SUFFIXES)
+    )
+
+
+def is_string_column(col: pd.Series) -> bool:
+    """True for object or string (pandas 3 `str`) columns not yet categorical."""
+    if isinstance(col.dtype, pd.CategoricalDtype):
+        return False
+    return pd.api.types.is_object_dtype(col) or pd.api.types.is_string_dtype(col)
+
+
+def compact_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    `df` with string dimensions as categoricals and derived float64
+    columns as float32. Returned unchanged if already compact; otherwise
+    a consolidated copy, so later column inserts do not fragment it.
+    """
+    dtypes = {
+        c: "category" for c in CATEGORY_COLUMNS
+        if c in df.columns and is_string_column(df[c])
+    }
+    dtypes.update(
+        (c, np.float32) for c in df.columns
+        if is_compact_float(c) and df[c].dtype == np.float64
+    )
+    if not dtypes:
+        return df
+    return df.astype(dtypes).copy()
+
+
+def frame_megabytes(df: pd.DataFrame) -> float:
+    """Deep memory footprint of a frame in MB."""
+    return df.memory_usage(deep=True).sum() / 1e6
+
+
+
+# OUTPUT COLUMNS
+
+
+def output_columns(cfg: dict, keep=()) -> set:
+    """
+    Columns of a scored role frame that something downstream reads:
+    the role's display columns, the pizza-group metrics and their
+    pct_ columns, index percentiles, BuyScore components, the team
+    context the summaries describe, plus `keep`.
+    """
+    metrics = [m for metric_list in cfg["groups"].values() for m in metric_list]
+    indices = list(cfg["indices"])
+    return (
+        set(cfg["columns"]) | set(keep) | set(metrics) | set(indices)
+        | {"pct_" + m for m in metrics}
+        | {idx.replace("_Index", "_pct") for idx in indices}
+        | FLOAT64_COLUMNS
+        | {"LeagueMult", "AgePremium", "Reliability", "Sustainability",
+           "z_AgePremium", "z_Reliability", "z_Sustainability"}
+    )
+
+
+def drop_intermediates(df: pd.DataFrame, cfg: dict, keep=()) -> pd.DataFrame:
+    """`df` restricted to output_columns(cfg, keep), in its column order."""
+    wanted = output_columns(cfg, keep)
+    return df[[c for c in df.columns if c in wanted]]
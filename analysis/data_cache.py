@@ -0,0 +1,281 @@
+import hashlib
+import json
+import os
+import tempfile
+import warnings
+
+import pandas as pd
+
+from .utils import convert_values_to_millions
+
+
+
+# CACHE SETTINGS
+
+
+CACHE_DIRNAME = ".cache"
+HASH_CHUNK_BYTES = 1 << 20
+
+# Bumped whenever the stored derived columns change, so older copies are rebuilt
+CACHE_VERSION = 3
+
+try:  # Parquet needs pyarrow; fall back to pandas' pickle format without it
+    import pyarrow  # noqa: F401
+
+    CACHE_FORMAT = "parquet"
+except ImportError:
+    CACHE_FORMAT = "pickle"
+
+# (path, size, mtime_ns) -> sha256, so an unchanged file is hashed once per process
+_HASH_MEMO: dict = {}
+
+
+
+# SOURCE FINGERPRINT
+
+
+def _content_hash(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(HASH_CHUNK_BYTES), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def file_fingerprint(path: str, *, with_hash: bool = True) -> dict:
+    """
+    Identify the current contents of a source file by size, mtime and
+    (optionally) a SHA-256 of its bytes.
+    """
+    st = os.stat(path)
+    fp = {"size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+    if with_hash:
+        key = (os.path.abspath(path), st.st_size, st.st_mtime_ns)
+        if key not in _HASH_MEMO:
+            _HASH_MEMO[key] = _content_hash(path)
+        fp["sha256"] = _HASH_MEMO[key]
+
+    return fp
+
+
+
+# CACHE FILES
+
+
+def cache_paths(path: str) -> tuple[str, str]:
+    """
+    Return (data_file, meta_file) for the columnar copy of `path`.
+    The copy lives in a .cache/ folder next to the source file.
+    """
+    folder = os.path.join(os.path.dirname(os.path.abspath(path)), CACHE_DIRNAME)
+    stem = os.path.basename(path)
+    ext = "parquet" if CACHE_FORMAT == "parquet" else "pkl"
+    return (
+        os.path.join(folder, f"{stem}.{ext}"),
+        os.path.join(folder, f"{stem}.meta.json"),
+    )
+
+
+def _read_meta(meta_file: str) -> dict | None:
+    try:
+        with open(meta_file, "r", encoding="utf-8") as fh:
+            return json.load(fh)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_atomic(target: str, write) -> None:
+    """
+    Call write(tmp_path) on a uniquely named temp file next to `target`,
+    then move it into place. Concurrent builders (other processes, other
+    threads) each write their own temp file, so none can interleave with
+    another; the last os.replace wins with a complete file.
+    """
+    fd, tmp = tempfile.mkstemp(
+        dir=os.path.dirname(target), prefix=os.path.basename(target) + ".", suffix=".tmp"
+    )
+    os.close(fd)
+    try:
+        write(tmp)
+        os.replace(tmp, target)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def _write_meta(meta_file: str, meta: dict) -> None:
+    def write(tmp):
+        with open(tmp, "w", encoding="utf-8") as fh:
+            json.dump(meta, fh)
+
+    _write_atomic(meta_file, write)
+
+
+def _cache_is_fresh(path: str, meta: dict | None, data_file: str) -> bool:
+    """
+    Cheap checks first: a matching size + mtime means the source is
+    untouched. If only the mtime moved, fall back to the content hash so
+    a `touch` or a re-copy of identical bytes does not force a rebuild.
+    """
+    if meta is None or meta.get("format") != CACHE_FORMAT:
+        return False
+    if meta.get("version") != CACHE_VERSION:
+        return False
+    if not os.path.exists(data_file):
+        return False
+
+    cached = meta.get("source", {})
+    current = file_fingerprint(path, with_hash=False)
+
+    if current["size"] != cached.get("size"):
+        return False
+    if current["mtime_ns"] == cached.get("mtime_ns"):
+        return True
+
+    current = file_fingerprint(path)
+    if current["sha256"] != cached.get("sha256"):
+        return False
+
+    # Same bytes, new mtime: refresh the stored fingerprint
+    meta["source"] = current
+    try:
+        _write_meta(cache_paths(path)[1], meta)
+    except OSError:
+        pass
+    return True
+
+
+def _build_cache(path: str, df: pd.DataFrame) -> None:
+    data_file, meta_file = cache_paths(path)
+    os.makedirs(os.path.dirname(data_file), exist_ok=True)
+
+    if CACHE_FORMAT == "parquet":
+        _write_atomic(data_file, lambda tmp: df.to_parquet(tmp, index=False))
+    else:
+        _write_atomic(data_file, df.to_pickle)
+
+    _write_meta(
+        meta_file,
+        {
+            "format": CACHE_FORMAT,
+            "version": CACHE_VERSION,
+            "source": file_fingerprint(path),
+            "columns": list(df.columns),
+        },
+    )
+
+
+def _add_derived(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Columns parsed once from the raw CSV and stored with the cache:
+      - Value_million : Value as £ millions (NaN if unparseable)
+    """
+    if "Value" in df.columns and "Value_million" not in df.columns:
+        df["Value_million"] = convert_values_to_millions(df["Value"])
+    return df
+
+
+def _project(columns, available) -> list | None:
+    """Keep requested columns that exist, in source order."""
+    if columns is None:
+        return None
+    wanted = set(columns)
+    return [c for c in available if c in wanted]
+
+
+
+# PUBLIC LOADER
+
+
+def read_player_data(path: str, columns=None) -> pd.DataFrame:
+    """
+    Read the player-season CSV through a columnar cache.
+
+    - The first read parses the CSV and writes a Parquet (or pickle) copy
+      to <csv folder>/.cache/, tagged with the CSV's size, mtime and hash.
+    - Later reads load the copy instead, and rebuild it automatically
+      whenever the CSV changes.
+    - `columns` projects the result onto those columns; names missing
+      from the file are ignored. Parquet only materialises the requested
+      columns.
+    - Derived columns (see _add_derived) are computed when the CSV is
+      parsed and stored alongside the raw ones.
+    - If the cache folder cannot be written, the CSV is read directly.
+    """
+    data_file, meta_file = cache_paths(path)
+    meta = _read_meta(meta_file)
+
+    if _cache_is_fresh(path, meta, data_file):
+        cols = _project(columns, meta.get("columns", []))
+        if CACHE_FORMAT == "parquet":
+            return pd.read_parquet(data_file, columns=cols)
+        df = pd.read_pickle(data_file)
+        return df if cols is None else df[cols]
+
+    df = _add_derived(pd.read_csv(path))
+    try:
+        _build_cache(path, df)
+    except Exception as exc:  # unwritable folder, unsupported dtypes, ...
+        warnings.warn(f"Could not write columnar cache for {path}: {exc}")
+
+    cols = _project(columns, df.columns)
+    return df if cols is None else df[cols]
+
+
+def player_data_columns(path: str) -> list:
+    """
+    Column names of the player-season data (raw plus derived), in source
+    order. Read from the cache metadata; a stale or missing cache is
+    rebuilt first.
+    """
+    data_file, meta_file = cache_paths(path)
+    meta = _read_meta(meta_file)
+    if _cache_is_fresh(path, meta, data_file):
+        return list(meta.get("columns", []))
+    return list(read_player_data(path).columns)
+
+
+def iter_player_data(path: str, chunk_rows: int, columns=None):
+    """
+    Yield the player-season data as frames of at most `chunk_rows` rows
+    without loading the whole file. Row labels run on across chunks, so
+    they match read_player_data's RangeIndex.
+
+    Streams from the Parquet copy when it is fresh; otherwise the CSV is
+    parsed chunk by chunk (no cache is written, as that needs the whole
+    frame).
+    """
+    data_file, meta_file = cache_paths(path)
+    meta = _read_meta(meta_file)
+
+    if CACHE_FORMAT == "parquet" and _cache_is_fresh(path, meta, data_file):
+        import pyarrow.parquet as pq
+
+        cols = _project(columns, meta.get("columns", []))
+        start = 0
+        for batch in pq.ParquetFile(data_file).iter_batches(batch_size=chunk_rows, columns=cols):
+            df = batch.to_pandas()
+            df.index = pd.RangeIndex(start, start + len(df))
+            start += len(df)
+            yield df
+        return
+
+    wanted = None if columns is None else set(columns)
+    if wanted is not None and "Value_million" in wanted:
+        wanted.add("Value")
+    usecols = None if wanted is None else (lambda c: c in wanted)
+    for df in pd.read_csv(path, chunksize=chunk_rows, usecols=usecols):
+        df = _add_derived(df)
+        cols = _project(columns, df.columns)
+        yield df if cols is None else df[cols]
+
+
+def clear_cache(path: str) -> None:
+    """Delete the columnar copy of `path` (if any)."""
+    for f in cache_paths(path):
+        if os.path.exists(f):
+            os.remove(f)
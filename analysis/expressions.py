@@ -0,0 +1,213 @@
+import ast
+
+import numpy as np
+import pandas as pd
+
+try:  # numexpr evaluates whole expressions in one multi-threaded pass
+    import numexpr
+except ImportError:
+    numexpr = None
+
+# numexpr only pays off for compound expressions over long columns on a
+# multi-core machine; below this, fused NumPy calls are as fast or faster
+NUMEXPR_MIN_ROWS = 200_000
+_NUMEXPR_OK = numexpr is not None and numexpr.detect_number_of_cores() > 1
+
+
+
+# EXPRESSION FORMAT
+#
+# Baseline metrics are written as arithmetic over column names, e.g.
+#
+#     metric("safe_div(Goals_saved_above_avg, Shots_on_target_faced)")
+#
+# Allowed:
+#   - column references       : Save_percentage, Np_goals_ctx, ...
+#   - numbers                 : 90, 0.15
+#   - + - * / ** and unary -  : (a + b) / 2
+#   - safe_div(num, den)      : num / den where den > 0, else NaN
+#   - get(column, default)    : column if present, else the constant default
+
+
+_BIN_OPS = (ast.Add, ast.Sub, ast.Mult, ast.Div, ast.Pow)
+_UNARY_OPS = (ast.UAdd, ast.USub)
+_DEFAULT_PREFIX = "_d_"
+
+
+def _safe_div(num, den):
+    """NumPy form of utils.safe_div, without divide-by-zero warnings."""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(den > 0, num / den, np.nan)
+
+
+class _Validator(ast.NodeTransformer):
+    """
+    Check an expression against the allowed grammar, collect the columns
+    it reads and rewrite get(col, default) into a plain name lookup.
+    """
+
+    def __init__(self, source: str):
+        self.source = source
+        self.columns = set()
+        self.defaults = {}
+
+    def _fail(self, node, why: str):
+        raise ValueError(f"Invalid metric expression {self.source!r}: {why}")
+
+    def visit_Expression(self, node):
+        node.body = self.visit(node.body)
+        return node
+
+    def visit_BinOp(self, node):
+        if not isinstance(node.op, _BIN_OPS):
+            self._fail(node, f"operator {type(node.op).__name__} not allowed")
+        node.left = self.visit(node.left)
+        node.right = self.visit(node.right)
+        return node
+
+    def visit_UnaryOp(self, node):
+        if not isinstance(node.op, _UNARY_OPS):
+            self._fail(node, f"operator {type(node.op).__name__} not allowed")
+        node.operand = self.visit(node.operand)
+        return node
+
+    def visit_Constant(self, node):
+        if not isinstance(node.value, (int, float)) or isinstance(node.value, bool):
+            self._fail(node, f"constant {node.value!r} not allowed")
+        return node
+
+    def visit_Name(self, node):
+        self.columns.add(node.id)
+        return node
+
+    def visit_Call(self, node):
+        name = getattr(node.func, "id", None)
+        if node.keywords:
+            self._fail(node, "keyword arguments not allowed")
+
+        if name == "safe_div":
+            if len(node.args) != 2:
+                self._fail(node, "safe_div takes (num, den)")
+            node.args = [self.visit(a) for a in node.args]
+            return node
+
+        if name == "get":
+            col, default = (node.args + [None, None])[:2]
+            if len(node.args) != 2 or not isinstance(col, ast.Name) or not (
+                isinstance(default, ast.Constant) and isinstance(default.value, (int, float))
+            ):
+                self._fail(node, "get takes (column, numeric default)")
+            self.columns.add(col.id)
+            self.defaults[col.id] = float(default.value)
+            return ast.copy_location(ast.Name(_DEFAULT_PREFIX + col.id, ast.Load()), node)
+
+        self._fail(node, f"function {name!r} not allowed")
+
+    def generic_visit(self, node):
+        self._fail(node, f"{type(node).__name__} not allowed")
+
+
+
+# COMPILED METRICS
+
+
+class CompiledMetric:
+    """
+    A baseline metric compiled once from its expression.
+
+    - columns : static set of columns the expression reads
+    - __call__: evaluate on a dataframe (drop-in for the old lambdas)
+    - evaluate: evaluate on a {column: ndarray} mapping, no pandas involved
+    """
+
+    def __init__(self, expr: str):
+        self.expr = expr
+        tree = _Validator(expr)
+        parsed = tree.visit(ast.parse(expr.strip(), mode="eval"))
+        ast.fix_missing_locations(parsed)
+
+        self.columns = frozenset(tree.columns)
+        self.defaults = dict(tree.defaults)
+        self.required = frozenset(self.columns - set(self.defaults))
+        self._code = compile(parsed, f"<metric {expr!r}>", "eval")
+
+        compound = not isinstance(parsed.body, (ast.Name, ast.Constant))
+        self._ne_expr = _to_numexpr(parsed) if compound and _NUMEXPR_OK else None
+
+    def __repr__(self):
+        return f"metric({self.expr!r})"
+
+    def _env(self, arrays) -> dict:
+        env = {c: arrays[c] for c in self.required}
+        for c, default in self.defaults.items():
+            env[_DEFAULT_PREFIX + c] = arrays[c] if c in arrays else default
+        return env
+
+    def evaluate(self, arrays) -> np.ndarray:
+        """Evaluate against a mapping of column name -> float array."""
+        env = self._env(arrays)
+        n_rows = max((np.size(v) for v in env.values()), default=0)
+
+        if self._ne_expr is not None and n_rows >= NUMEXPR_MIN_ROWS:
+            return numexpr.evaluate(self._ne_expr, local_dict={**env, "_nan": np.nan})
+        with np.errstate(divide="ignore", invalid="ignore"):
+            out = eval(self._code, {"__builtins__": {}, "safe_div": _safe_div}, env)
+        # always a fresh array: a bare column reference must not alias its input
+        return np.array(out, dtype=float)
+
+    def __call__(self, df: pd.DataFrame) -> np.ndarray:
+        return evaluate_metrics(df, {"_": self})["_"]
+
+
+def _to_numexpr(tree: ast.Expression) -> str:
+    """Rewrite safe_div(a, b) as where(b > 0, a / b, nan) for numexpr."""
+
+    class _Rewrite(ast.NodeTransformer):
+        def visit_Call(self, node):
+            self.generic_visit(node)
+            num, den = node.args
+            return ast.Call(
+                ast.Name("where", ast.Load()),
+                [
+                    ast.Compare(den, [ast.Gt()], [ast.Constant(0)]),
+                    ast.BinOp(num, ast.Div(), den),
+                    ast.Name("_nan", ast.Load()),
+                ],
+                [],
+            )
+
+    return ast.unparse(_Rewrite().visit(ast.parse(ast.unparse(tree), mode="eval")))
+
+
+def metric(expr: str) -> CompiledMetric:
+    """Compile a baseline metric expression (see EXPRESSION FORMAT above)."""
+    return CompiledMetric(expr)
+
+
+
+# BATCH EVALUATION
+
+
+def evaluate_metrics(df: pd.DataFrame, metrics: dict) -> dict:
+    """
+    Evaluate many compiled metrics in one pass over `df`.
+
+    Every referenced column is converted to a float array once and shared
+    by all expressions; no intermediate Series or DataFrame columns are
+    created. A required column missing from `df` raises KeyError.
+    Returns {name: ndarray}.
+    """
+    needed = set().union(*(m.columns for m in metrics.values())) if metrics else set()
+
+    missing = set().union(*(m.required for m in metrics.values())) - set(df.columns) if metrics else set()
+    if missing:
+        raise KeyError(f"Columns missing for baseline metrics: {sorted(missing)}")
+
+    arrays = {c: df[c].to_numpy(dtype=float) for c in needed if c in df.columns}
+
+    out = {}
+    for name, m in metrics.items():
+        values = m.evaluate(arrays)
+        # constant-only expressions (e.g. get(X, 0) with X absent) are scalars
+        out[name] = values if values.ndim else np.full(len(df), float(values))
+    return out
@@ -0,0 +1,166 @@
+import numpy as np
+import pandas as pd
+
+
+
+# GROUP CODES
+
+
+def factorize_groups(df: pd.DataFrame, keys) -> tuple[np.ndarray, pd.Index]:
+    """
+    Map each row to an integer group code for the given key columns.
+
+    Returns (codes, labels):
+      - codes  : int64 array, one per row; -1 where any key is missing
+                 (matching groupby's default of dropping NaN keys)
+      - labels : Index (MultiIndex for several keys) of the groups in
+                 sorted key order; labels[i] is the group with code i
+    """
+    keys = [keys] if isinstance(keys, str) else list(keys)
+
+    combined = np.zeros(len(df), dtype=np.int64)
+    valid = np.ones(len(df), dtype=bool)
+    levels = []
+
+    for k in keys:
+        codes, uniques = pd.factorize(df[k], sort=True)
+        valid &= codes >= 0
+        combined = combined * max(len(uniques), 1) + codes
+        levels.append(uniques)
+
+    codes = np.full(len(df), -1, dtype=np.int64)
+    present, codes[valid] = np.unique(combined[valid], return_inverse=True)
+
+    if len(keys) == 1:
+        labels = pd.Index(levels[0][present], name=keys[0])
+    else:
+        parts = np.unravel_index(present, [max(len(u), 1) for u in levels])
+        labels = pd.MultiIndex.from_arrays(
+            [u[p] for u, p in zip(levels, parts)], names=keys
+        )
+
+    return codes, labels
+
+
+
+# GROUPED SUMS
+
+
+def group_sums(values: np.ndarray, codes: np.ndarray, n_groups: int) -> np.ndarray:
+    """
+    Column-wise sums of a 2D block per group.
+
+    Each column is reduced with one np.bincount over the shared group
+    codes, so no per-group Python work happens. NaNs propagate (like
+    np.sum); rows with code -1 are ignored. Returns (n_groups, n_cols).
+    """
+    values = np.asarray(values, dtype=float)
+    if values.ndim == 1:
+        values = values[:, None]
+
+    valid = codes >= 0
+    if not valid.all():
+        codes = codes[valid]
+        values = values[valid]
+
+    out = np.empty((n_groups, values.shape[1]))
+    for j in range(values.shape[1]):
+        out[:, j] = np.bincount(codes, weights=values[:, j], minlength=n_groups)
+    return out
+
+
+
+# WEIGHTED GROUP MEANS
+
+
+def weighted_group_means(
+    df: pd.DataFrame,
+    keys,
+    value_cols,
+    weight_col: str,
+    return_codes: bool = False,
+):
+    """
+    Weighted mean of every column in `value_cols` per group of `keys`,
+    computed as sum(w * x) / sum(w) over factorised group codes.
+
+    Semantics match np.average on each group:
+      - any NaN value (or weight) in a group makes that group's mean NaN
+      - a column missing from `df` gives an all-NaN result column
+      - a group whose weights sum to zero gets NaN (np.average raises)
+
+    Returns a frame indexed by the group keys, plus a `<weight_col>_sum`
+    column holding the NaN-skipping total weight of each group. With
+    return_codes=True, also returns each row's group position (-1 for
+    rows with a missing key) so results can be broadcast back by `take`.
+    """
+    codes, labels = factorize_groups(df, keys)
+    n = len(labels)
+
+    present = [c for c in value_cols if c in df.columns]
+    w = df[weight_col].to_numpy(dtype=float)
+
+    block = np.column_stack(
+        [w, np.nan_to_num(w, nan=0.0)]
+        + [df[c].to_numpy(dtype=float) * w for c in present]
+    )
+    sums = group_sums(block, codes, n)
+
+    weight_sum = sums[:, 0]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        means = sums[:, 2:] / weight_sum[:, None]
+    means[weight_sum == 0] = np.nan
+
+    data = {f"{weight_col}_sum": sums[:, 1]}
+    for c in value_cols:
+        data[c] = means[:, present.index(c)] if c in present else np.full(n, np.nan)
+
+    out = pd.DataFrame(data, index=labels)
+    return (out, codes) if return_codes else out
+
+
+
+# GROUPED Z-SCORES
+
+
+def grouped_zscore(
+    values: np.ndarray,
+    codes: np.ndarray,
+    n_groups: int,
+    clip: float | None = 3.0,
+) -> np.ndarray:
+    """
+    Z-score every column of `values` within its group.
+
+    Matches groupby(...).transform("mean" / "std") semantics: NaNs are
+    skipped, std uses ddof=1, groups with zero or undefined spread give
+    z = 0, rows with code -1 get 0. Results are clipped to [-clip, clip].
+    Accepts a 1D array (returns 1D) or an (n_rows, n_cols) block.
+    """
+    values = np.asarray(values, dtype=float)
+    one_d = values.ndim == 1
+    if one_d:
+        values = values[:, None]
+
+    if n_groups == 0:
+        z = np.zeros_like(values)
+        return z[:, 0] if one_d else z
+
+    present = ~np.isnan(values)
+    counts = group_sums(present, codes, n_groups)
+    sums = group_sums(np.where(present, values, 0.0), codes, n_groups)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        means = sums / counts
+        dev = values - means[codes]
+        sq = group_sums(np.where(present, dev * dev, 0.0), codes, n_groups)
+        std = np.sqrt(sq / (counts - 1))
+        std[(counts <= 1) | (std == 0)] = np.nan
+        z = dev / std[codes]
+
+    z[codes < 0] = np.nan
+    z[np.isnan(z)] = 0.0
+    if clip:
+        z = np.clip(z, -clip, clip)
+
+    return z[:, 0] if one_d else z
@@ -1,6 +1,6 @@
 # MODEL CONFIGURATION – ALL ROLES STORED IN ONE STRUCTURED DICTIONARY
 
-from .utils import safe_div
+from .expressions import metric
 
 
 ROLE_CONFIG = {
@@ -18,39 +18,35 @@ ROLE_CONFIG = {
         "positions": {"Goalkeeper"},
 
         "baseline": {
-            "Save Efficiency": lambda df: (
-                df["Save_percentage"] - df["Xsave_percentage"]
-            ),
+            "Save Efficiency": metric("Save_percentage - Xsave_percentage"),
 
-            "Goals Prevented per Shot": lambda df: safe_div(
-                df["Goals_saved_above_avg"], df["Shots_on_target_faced"]
+            "Goals Prevented per Shot": metric(
+                "safe_div(Goals_saved_above_avg, Shots_on_target_faced)"
             ),
 
-            "Goals Prevented": lambda df: df["Goals_saved_above_avg"],
+            "Goals Prevented": metric("Goals_saved_above_avg"),
 
-            "Passing Under Pressure": lambda df: (
-                df["Passing_percentage_under_pressure"]
-                * (df["Percentage_passes_under_pressure"] / 100)
+            "Passing Under Pressure": metric(
+                "Passing_percentage_under_pressure * (Percentage_passes_under_pressure / 100)"
             ),
 
-            "Long Pass Accuracy": lambda df: (
-                df["Long_ball_percentage"] * df["Successful_pass_length"]
+            "Long Pass Accuracy": metric(
+                "Long_ball_percentage * Successful_pass_length"
             ),
 
-            "Progressive Passing": lambda df: (
-                df["Forward_pass_proportion"] * df["Successful_pass_length"]
+            "Progressive Passing": metric(
+                "Forward_pass_proportion * Successful_pass_length"
             ),
 
-            "Pass Accuracy": lambda df: df["Passing_percentage"],
+            "Pass Accuracy": metric("Passing_percentage"),
 
-            "Sweeper Range": lambda df: df["Gk_defesive_action_distance"],
+            "Sweeper Range": metric("Gk_defesive_action_distance"),
 
-            "Sweeper Actions": lambda df: df["Defensive_actions"],
+            "Sweeper Actions": metric("Defensive_actions"),
 
             # renamed to match indices / invert / groups
-            "Errors per 90": lambda df: safe_div(
-                df.get("Errors", 0) + df.get("Turnovers", 0),
-                df["Minutes"] / 90,
+            "Errors per 90": metric(
+                "safe_div(get(Errors, 0) + get(Turnovers, 0), Minutes / 90)"
             ),
         },
 
@@ -135,54 +131,47 @@ ROLE_CONFIG = {
         "baseline": {
             # BALL CARRIER
             # upgraded: net dribble performance (success – failures)
-            "Dribble Success": lambda df: (
-                df["Dribbles_successful_ctx"] - df["Failed_dribbles_ctx"]
+            "Dribble Success": metric(
+                "Dribbles_successful_ctx - Failed_dribbles_ctx"
             ),
             # combined carry volume * success * distance
-            "Progressive Carries": lambda df: (
-                df["Carries_ctx"]
-                * (df["Successful_carries_percentage"] / 100)
-                * df["Carry_length_ctx"]
+            "Progressive Carries": metric(
+                "Carries_ctx * (Successful_carries_percentage / 100) * Carry_length_ctx"
             ),
-            "Turnovers from Dribbles": lambda df: safe_div(
-                df["Failed_dribbles_ctx"] + df["Dispossessed_ctx"],
-                df["Minutes"] / 90
+            "Turnovers from Dribbles": metric(
+                "safe_div(Failed_dribbles_ctx + Dispossessed_ctx, Minutes / 90)"
             ),
 
             # WIDE CREATOR
-            "Open-Play Creativity": lambda df: (
-                df["Op_xa_ctx"] + df["Op_key_passes_ctx"] * 0.1
+            "Open-Play Creativity": metric(
+                "Op_xa_ctx + Op_key_passes_ctx * 0.1"
             ),
-            "Box Entry Passes": lambda df: (
-                df["Op_passes_into_box_ctx"] + df["Passes_inside_box_ctx"]
+            "Box Entry Passes": metric(
+                "Op_passes_into_box_ctx + Passes_inside_box_ctx"
             ),
-            "Through Balls": lambda df: df["Through_balls_ctx"],
-            "Crossing Impact": lambda df: (
-                df["Crosses_completed_ctx"] * df["Crossing_percentage"]
+            "Through Balls": metric("Through_balls_ctx"),
+            "Crossing Impact": metric(
+                "Crosses_completed_ctx * Crossing_percentage"
             ),
             # new: xA – Assists → how much creativity isn't turning into assists
-            "Expected Assist Differential": lambda df: (
-                df["Op_xa_ctx"] - df["Assists_ctx"]
-            ),
+            "Expected Assist Differential": metric("Op_xa_ctx - Assists_ctx"),
 
             # GOAL THREAT
-            "Chance Quality": lambda df: df["Np_xg_per_shot"],
-            "Shots": lambda df: df["Np_shots_ctx"],
-            "Finishing Rate": lambda df: df["Goal_conversion"],
-            "Touches in Box": lambda df: df["Touches_in_box_ctx"],
-            "Finishing Efficiency": lambda df: (
-                df["Np_goals_ctx"] - df["Np_xg_ctx"]
-            ),
+            "Chance Quality": metric("Np_xg_per_shot"),
+            "Shots": metric("Np_shots_ctx"),
+            "Finishing Rate": metric("Goal_conversion"),
+            "Touches in Box": metric("Touches_in_box_ctx"),
+            "Finishing Efficiency": metric("Np_goals_ctx - Np_xg_ctx"),
 
             # DEFENSIVE / PRESSING
-            "Pressures": lambda df: df["Padj_pressures_ctx"],
-            "Press Success": lambda df: safe_div(
-                df["Successful_pressures_ctx"], df["Padj_pressures_ctx"]
+            "Pressures": metric("Padj_pressures_ctx"),
+            "Press Success": metric(
+                "safe_div(Successful_pressures_ctx, Padj_pressures_ctx)"
             ),
-            "Counterpresses": lambda df: df["Opp_half_counterpressures_ctx"],
-            "Counterpress Success": lambda df: df["Successful_counterpressures_ctx"],
-            "High Press Actions": lambda df: df["Opp_half_pressures_ctx"],
-            "Dribbles Prevented": lambda df: df["Dribbles_faced_stopped_percentage"],
+            "Counterpresses": metric("Opp_half_counterpressures_ctx"),
+            "Counterpress Success": metric("Successful_counterpressures_ctx"),
+            "High Press Actions": metric("Opp_half_pressures_ctx"),
+            "Dribbles Prevented": metric("Dribbles_faced_stopped_percentage"),
         },
 
         "indices": {
@@ -286,51 +275,43 @@ ROLE_CONFIG = {
 
         "baseline": {
             # BALL WINNER
-            "Tackle Success": lambda df: safe_div(
-                df["Tackles_ctx"], df["Minutes"] / 90
+            "Tackle Success": metric("safe_div(Tackles_ctx, Minutes / 90)"),
+            "Interceptions": metric(
+                "safe_div(Interceptions_ctx, Minutes / 90)"
             ),
-            "Interceptions": lambda df: safe_div(
-                df["Interceptions_ctx"], df["Minutes"] / 90
-            ),
-            "Adj Tackles": lambda df: df["Padj_tackles_ctx"],
-            "Adj Interceptions": lambda df: df["Padj_interceptions_ctx"],
-            "Dribbles Prevented": lambda df: df["Dribbles_faced_stopped_percentage"],
-            "Recoveries": lambda df: df["Ball_recoveries_ctx"],
+            "Adj Tackles": metric("Padj_tackles_ctx"),
+            "Adj Interceptions": metric("Padj_interceptions_ctx"),
+            "Dribbles Prevented": metric("Dribbles_faced_stopped_percentage"),
+            "Recoveries": metric("Ball_recoveries_ctx"),
 
             # DEEP-LYING PLAYMAKER
-            "Forward Passing": lambda df: (
-                df["Forward_pass_proportion"] * df["Passing_percentage"]
+            "Forward Passing": metric(
+                "Forward_pass_proportion * Passing_percentage"
             ),
-            "Long Passing": lambda df: (
-                df["Long_ball_percentage"] * df["Successful_pass_length"]
+            "Long Passing": metric(
+                "Long_ball_percentage * Successful_pass_length"
             ),
-            "Build-Up Involvement": lambda df: df["Op_xgbuildup_ctx"],
-            "xGChain Involvement": lambda df: df["Op_xgchain_ctx"],
-            "Final Third Passes": lambda df: df["Op_last_3rd_passes_ctx"],
+            "Build-Up Involvement": metric("Op_xgbuildup_ctx"),
+            "xGChain Involvement": metric("Op_xgchain_ctx"),
+            "Final Third Passes": metric("Op_last_3rd_passes_ctx"),
 
             # BOX TO BOX
-            "Final Third Carries": lambda df: df["Pass_and_carry_last_3rd_ctx"],
-            "Counterpresses": lambda df: df["Counterpressures_ctx"],
-            "Carry Impact": lambda df: (
-                df["Carries_ctx"] * df["Carry_length_ctx"]
-            ),
-            "Transition Defence": lambda df: df["Successful_counterpressures_ctx"],
-            "Pressing Distance": lambda df: df["Pressing_distance"],
+            "Final Third Carries": metric("Pass_and_carry_last_3rd_ctx"),
+            "Counterpresses": metric("Counterpressures_ctx"),
+            "Carry Impact": metric("Carries_ctx * Carry_length_ctx"),
+            "Transition Defence": metric("Successful_counterpressures_ctx"),
+            "Pressing Distance": metric("Pressing_distance"),
 
             # ATTACKING PLAYMAKER
-            "Final Third Creativity": lambda df: (
-                df["Op_key_passes_ctx"] + df["Op_xa_ctx"]
+            "Final Third Creativity": metric("Op_key_passes_ctx + Op_xa_ctx"),
+            "Through Balls": metric("Through_balls_ctx"),
+            "Box Entry Passes": metric(
+                "Op_passes_into_box_ctx + Passes_inside_box_ctx"
             ),
-            "Through Balls": lambda df: df["Through_balls_ctx"],
-            "Box Entry Passes": lambda df: (
-                df["Op_passes_into_box_ctx"] + df["Passes_inside_box_ctx"]
-            ),
-            "Shot Assists": lambda df: df["Key_passes_ctx"],
-            "Assists": lambda df: df["Assists_ctx"],
+            "Shot Assists": metric("Key_passes_ctx"),
+            "Assists": metric("Assists_ctx"),
             # new: xA – Assists to capture under/over-assisting
-            "Expected Assist Differential": lambda df: (
-                df["Op_xa_ctx"] - df["Assists_ctx"]
-            ),
+            "Expected Assist Differential": metric("Op_xa_ctx - Assists_ctx"),
         },
 
         "indices": {
@@ -439,44 +420,38 @@ ROLE_CONFIG = {
 
         "baseline": {
             # FINISHER
-            "Chance Quality": lambda df: df["Np_xg_per_shot"],
-            "Shots": lambda df: df["Np_shots_ctx"],
-            "Finishing Rate": lambda df: df["Goal_conversion"],
-            "Finishing Efficiency": lambda df: (
-                df["Np_goals_ctx"] - df["Np_xg_ctx"]
-            ),
-            "Shot Accuracy": lambda df: df["Shot_target_percentage"],
+            "Chance Quality": metric("Np_xg_per_shot"),
+            "Shots": metric("Np_shots_ctx"),
+            "Finishing Rate": metric("Goal_conversion"),
+            "Finishing Efficiency": metric("Np_goals_ctx - Np_xg_ctx"),
+            "Shot Accuracy": metric("Shot_target_percentage"),
 
             # TARGET MAN
-            "Aerial Success": lambda df: df["Aerial_percentage"],
-            "Aerial Wins": lambda df: df["Aerial_won"],
-            "Hold-Up Passing": lambda df: (
-                df["Passing_percentage"] * df["Backward_pass_proportion"]
+            "Aerial Success": metric("Aerial_percentage"),
+            "Aerial Wins": metric("Aerial_won"),
+            "Hold-Up Passing": metric(
+                "Passing_percentage * Backward_pass_proportion"
             ),
-            "Touches in Box": lambda df: df["Touches_in_box_ctx"],
-            "Layoffs": lambda df: df["Op_xgbuildup_per_possession_ctx"],
+            "Touches in Box": metric("Touches_in_box_ctx"),
+            "Layoffs": metric("Op_xgbuildup_per_possession_ctx"),
 
             # FALSE 9
-            "Link-Up Play": lambda df: (
-                df["Op_xa_ctx"] + df["Op_key_passes_ctx"] * 0.15
-            ),
-            "Through Balls": lambda df: df["Through_balls_ctx"],
-            "Key Passes": lambda df: df["Key_passes_ctx"],
-            "Box Entry Passes": lambda df: df["Op_passes_into_box_ctx"],
-            "Set-Piece Key Passes": lambda df: df["Sp_key_passes"],
+            "Link-Up Play": metric("Op_xa_ctx + Op_key_passes_ctx * 0.15"),
+            "Through Balls": metric("Through_balls_ctx"),
+            "Key Passes": metric("Key_passes_ctx"),
+            "Box Entry Passes": metric("Op_passes_into_box_ctx"),
+            "Set-Piece Key Passes": metric("Sp_key_passes"),
             # new: xA – Assists to capture creative under/overperformance
-            "Expected Assist Differential": lambda df: (
-                df["Op_xa_ctx"] - df["Assists_ctx"]
-            ),
+            "Expected Assist Differential": metric("Op_xa_ctx - Assists_ctx"),
 
             # DEFENSIVE FORWARD
-            "Pressures": lambda df: df["Padj_pressures_ctx"],
-            "Press Success": lambda df: safe_div(
-                df["Successful_pressures_ctx"], df["Padj_pressures_ctx"]
+            "Pressures": metric("Padj_pressures_ctx"),
+            "Press Success": metric(
+                "safe_div(Successful_pressures_ctx, Padj_pressures_ctx)"
             ),
-            "Counterpresses": lambda df: df["Counterpressures_ctx"],
-            "High Press Actions": lambda df: df["Opp_half_pressures_ctx"],
-            "Turnovers Won": lambda df: df["Turnovers_ctx"],
+            "Counterpresses": metric("Counterpressures_ctx"),
+            "High Press Actions": metric("Opp_half_pressures_ctx"),
+            "Turnovers Won": metric("Turnovers_ctx"),
         },
 
         "indices": {
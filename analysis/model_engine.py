@@ -1,11 +1,29 @@
+import os
+import threading
+import warnings
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+
 import pandas as pd
 import numpy as np
 
 from .utils import (
-    convert_value_to_millions, 
+    convert_values_to_millions,
     LEAGUE_MULTIPLIERS,
 )
 from .model_config import ROLE_CONFIG
+from .data_cache import read_player_data, file_fingerprint, player_data_columns
+from .expressions import CompiledMetric, evaluate_metrics
+from .percentiles import PercentileIndex, column_percentiles
+from .tracing import traced
+from . import compact
+from .group_ops import (
+    factorize_groups,
+    group_sums,
+    grouped_zscore,
+    weighted_group_means,
+)
+from .parallel import sharded_grouped_zscore
 
 
 
@@ -17,18 +35,217 @@ DEFAULT_PATH = GLOBAL["DEFAULT_PATH"]
 DEFAULT_BUDGET = GLOBAL["DEFAULT_BUDGET"]
 DEFAULT_MINUTES = GLOBAL["DEFAULT_MINUTES"]
 
+# Celtic-optimised BuyScore weights on the per-league z-scored components
+BUY_WEIGHTS = {
+    "ValueEff": 0.10,
+    "AgePremium": 0.20,
+    "Reliability": 0.10,
+    "Sustainability": 0.05,
+    "Perf": 0.60,  # sliders heavily steer Perf via Overall_adj
+}
+
+
+
+# CONTEXT METRIC FAMILIES
+
+
+# Possession-controlled creation / passing metrics
+POSS_METRICS = [
+    "Op_passes",
+    "Op_key_passes",
+    "Op_passes_into_box",
+    "Passes_inside_box",
+    "Through_balls",
+    "Op_xa",
+    "Key_passes",
+    "Assists",
+    "Op_last_3rd_passes",
+    "Xgchain",
+    "Op_xgchain",
+    "Xgbuildup",
+    "Op_xgbuildup",
+    "Xgchain_per_possession",
+    "Op_xgchain_per_possession",
+    "Xgbuildup_per_possession",
+    "Op_xgbuildup_per_possession",
+    "Pass_and_carry_last_3rd",
+    "Crosses_completed",
+    "Sp_pass_into_box",
+    "Touches_in_box",
+]
+
+# Pressure environment
+PRESS_METRICS = [
+    "Pressures",
+    "Padj_pressures",
+    "Counterpressures",
+    "Opp_half_pressures",
+    "Opp_half_counterpressures",
+    "Successful_pressures",
+    "Successful_counterpressures",
+    "Defensive_actions",
+    "Tackles",
+    "Interceptions",
+    "Padj_tackles",
+    "Padj_interceptions",
+    "Ball_recoveries",
+]
+
+# Tempo / transition environment
+TEMPO_METRICS = [
+    "Carries",
+    "Dribbles_attempts",
+    "Dribbles_successful",
+    "Turnovers",
+    "Carry_length",
+    "Failed_dribbles",
+    "Dispossessed",
+]
+
+# xG strength (attacking)
+XG_METRICS = ["Np_xg", "Np_goals", "Np_shots"]
+
+
+
+# COLUMN DEPENDENCIES
+
+
+# Identity / market columns used by the app, summaries and BuyScore
+ID_COLUMNS = ["ID", "Age", "Value", "Value_million", "Position_1", "Position_2"]
+
+# Inputs of the team-context stage
+TEAM_INPUT_COLUMNS = [
+    "League", "Team", "Minutes", "Op_passes", "Pressures", "Turnovers",
+    "Np_xg", "Np_xg_faced",
+]
+
+# Columns created by the team-context stage
+TEAM_CONTEXT_COLUMNS = [
+    "Team_Minutes", "Team_PossessionProxy", "Team_PressIntensity",
+    "Team_TempoProxy", "Team_Att_xg_per90", "Team_Def_xg_per90",
+    "Team_xGD_proxy",
+]
+
+# Team context column -> the player column it is a minute-weighted mean of
+TEAM_SOURCES = {
+    "Team_PossessionProxy": "Op_passes",
+    "Team_PressIntensity": "Pressures",
+    "Team_TempoProxy": "Turnovers",
+    "Team_Att_xg_per90": "Np_xg",
+    "Team_Def_xg_per90": "Np_xg_faced",
+}
+
+# Every source column the context stages can use
+CONTEXT_COLUMNS = (
+    TEAM_INPUT_COLUMNS + POSS_METRICS + PRESS_METRICS + TEMPO_METRICS + XG_METRICS
+)
+
+# Columns compute_buy_score reads on top of a role's baseline
+BUY_COLUMNS = [
+    "Age", "Value", "Value_million", "Minutes", "League",
+    "Np_goals_ctx", "Np_xg_ctx", "Assists_ctx", "Op_xa_ctx",
+]
+
+# Columns of an exported shortlist (batch files, service responses), on
+# top of ROLE_CONFIG[role]["columns"]
+SHORTLIST_COLUMNS = [
+    "ID", "Team", "League", "Age", "Minutes", "Position_1", "Position_2",
+    "Value", "Value_million", "Overall_adj", "Overall_pct", "BuyScore",
+]
+
+
+class _ColumnRecorder:
+    """
+    Stand-in dataframe that records every column a baseline lambda reads.
+    Each lookup returns a one-row Series so the lambda's arithmetic runs.
+    """
+
+    def __init__(self):
+        self.columns = set()
+
+    def __getitem__(self, col):
+        self.columns.add(col)
+        return pd.Series([1.0])
+
+    def get(self, col, default=None):
+        self.columns.add(col)
+        return pd.Series([1.0])
+
+
+def traced_columns(baseline: dict) -> set:
+    """
+    Columns (raw and *_ctx) read by a role's baseline metrics. Compiled
+    metrics declare theirs statically; plain lambdas are traced by running
+    them against a recording stand-in.
+    """
+    rec = _ColumnRecorder()
+    for fn in baseline.values():
+        if isinstance(fn, CompiledMetric):
+            rec.columns |= fn.columns
+        else:
+            fn(rec)
+    return rec.columns
+
+
+def baseline_columns(baseline: dict) -> set:
+    """
+    Raw source columns read by a role's baseline lambdas.
+    *_ctx inputs are mapped back to the raw metric they are built from.
+    """
+    return {
+        c[: -len("_ctx")] if c.endswith("_ctx") else c
+        for c in traced_columns(baseline)
+    }
+
+
+def role_dependencies(role: str) -> list:
+    """
+    Raw and *_ctx columns needed to score `role`: the role's declared
+    ROLE_CONFIG[role]["requires"] list if present, else the columns traced
+    from its baseline lambdas, plus the BuyScore inputs.
+    """
+    cfg = ROLE_CONFIG[role]
+    if "requires" in cfg:
+        cols = set(cfg["requires"])
+    else:
+        cols = traced_columns(cfg["baseline"])
+    return sorted(cols | set(BUY_COLUMNS))
+
+
+def role_columns(role: str, path: str) -> list:
+    """
+    Columns a scored role frame starts from: every column of the data
+    file at `path` plus the *_ctx columns `role` reads. Raw columns are
+    only read; the context work stays limited to role_dependencies.
+    """
+    return sorted(set(role_dependencies(role)) | set(player_data_columns(path)))
+
+
+def model_columns(roles=None) -> list:
+    """
+    Every source column the engine needs to score `roles`
+    (default: all configured roles).
+    """
+    roles = roles or [r for r in ROLE_CONFIG if not r.startswith("__")]
+    cols = set(ID_COLUMNS) | set(CONTEXT_COLUMNS)
+    for role in roles:
+        cols |= baseline_columns(ROLE_CONFIG[role]["baseline"])
+    return sorted(cols)
+
 
 
 # DATA LOADING
 
 
-def load_data(path: str, min_minutes: int) -> pd.DataFrame:
+def load_data(path: str, min_minutes: int, columns=None) -> pd.DataFrame:
     """
     Load raw player-season data and apply a minutes threshold.
+
+    Reads go through the columnar cache in `data_cache`; `columns`
+    restricts the frame to those source columns (default: all).
     """
-    df = pd.read_csv(path)
-    df = df[df["Minutes"] >= min_minutes].copy()
-    return df
+    df = read_player_data(path, columns)
+    return _take_rows(df, df["Minutes"].to_numpy() >= min_minutes)
 
 
 
@@ -57,184 +274,222 @@ def add_team_context_metrics(df: pd.DataFrame) -> pd.DataFrame:
         if col not in df.columns:
             raise ValueError(f"Missing required column for team context: {col}")
 
-    grp = df.groupby(["League", "Team"])
-
-    def wavg(g: pd.DataFrame, col: str) -> float:
-        if col not in g.columns or g[col].isna().all():
-            return np.nan
-        return np.average(g[col], weights=g["Minutes"])
-
-    team_stats = grp.apply(
-        lambda g: pd.Series(
-            {
-                "Team_Minutes": g["Minutes"].sum(),
-                # These three are proxies, not strict possession/tempo:
-                "Team_PossessionProxy": wavg(g, "Op_passes"),
-                "Team_PressIntensity": wavg(g, "Pressures"),
-                "Team_TempoProxy": wavg(g, "Turnovers"),
-                "Team_Att_xg_per90": wavg(g, "Np_xg"),
-                "Team_Def_xg_per90": wavg(g, "Np_xg_faced")
-                if "Np_xg_faced" in g.columns
-                else np.nan,
-            }
-        )
+    # All minute-weighted team means in one vectorised pass
+    # (factorised group codes, weighted sums / weight sums)
+    means, codes = weighted_group_means(
+        df, ["League", "Team"], list(TEAM_SOURCES.values()), "Minutes",
+        return_codes=True,
     )
 
+    team_stats = pd.DataFrame({"Team_Minutes": means["Minutes_sum"]})
+    for team_col, src in TEAM_SOURCES.items():
+        team_stats[team_col] = means[src]
+
     team_stats["Team_xGD_proxy"] = (
         team_stats["Team_Att_xg_per90"] - team_stats["Team_Def_xg_per90"]
     )
 
-    df = df.merge(
-        team_stats,
-        left_on=["League", "Team"],
-        right_index=True,
-        how="left",
-        validate="many_to_one",
+    # Broadcast back to players by group code (rows with a missing
+    # League/Team key get NaN, as with a left merge)
+    values = np.vstack([team_stats.to_numpy(), np.full(team_stats.shape[1], np.nan)])
+    per_player = pd.DataFrame(
+        values[codes], index=df.index, columns=team_stats.columns
     )
 
-    return df
+    return pd.concat([df, per_player], axis=1)
 
 
 
 # HYBRID NORMALISATION
 
 
-def _hybrid_norm(
-    df: pd.DataFrame,
-    col: str,
-    team_col: str,
-    league_mean_col: str,
-    suffix: str = "_ctx",
+def _context_factor(
+    team: np.ndarray,
+    league_mean: np.ndarray,
     min_std: float = 1e-6,
-) -> pd.DataFrame:
+) -> np.ndarray | None:
     """
-    Context-normalise a metric by scaling it according to how its
-    team environment compares to the league average.
+    Per-player scaling factor for one context family, comparing the
+    team environment to the league average:
 
-    Example:
         metric_ctx = metric * clip( league_mean(team_col) / team_col , 0.5, 1.5 )
 
-    - If the team_col has very little variance across the league (std < min_std),
-      the function is a no-op.
-    - If any required column is missing, it is a no-op.
+    Returns None (family is a no-op) if the team driver has very little
+    variance across the dataset (std < min_std).
     """
-    if col not in df.columns or team_col not in df.columns or league_mean_col not in df.columns:
-        return df
-
     # If there's no meaningful spread, don't normalise
-    if df[team_col].std(skipna=True) < min_std:
+    if not _has_spread(team, min_std):
+        return None
+
+    return _scale_factor(team, league_mean)
+
+
+def _has_spread(team: np.ndarray, min_std: float = 1e-6) -> bool:
+    """The spread check of _context_factor (an undefined std passes)."""
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        return not np.nanstd(team, ddof=1) < min_std
+
+
+def _scale_factor(team: np.ndarray, league_mean: np.ndarray) -> np.ndarray:
+    """The clipped league_mean / team factor, without the spread check."""
+    denom = np.where(team == 0, np.nan, team)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        factor = np.clip(league_mean / denom, 0.5, 1.5)
+    return np.where(np.isnan(factor), 1.0, factor)
+
+
+def _take_rows(df: pd.DataFrame, mask: np.ndarray) -> pd.DataFrame:
+    """
+    Rows of `df` where `mask` holds, as a new frame built with one take
+    (boolean indexing + .copy() copies twice). `df` itself when every
+    row is kept.
+    """
+    if mask.all():
         return df
+    return df.take(np.flatnonzero(mask))
 
-    denom = df[team_col].replace(0, np.nan)
-    factor = (df[league_mean_col] / denom).clip(0.5, 1.5).fillna(1.0)
 
-    df[col + suffix] = df[col] * factor
+def _attach_block(df: pd.DataFrame, cols: list, values: np.ndarray) -> pd.DataFrame:
+    """
+    Set a 2D block of columns in one assignment (replacing any that exist).
+    Columns go onto `df` in place; the frame is not consolidated (that
+    would copy it), so pandas' fragmentation warning is silenced.
+    """
+    stale = [c for c in cols if c in df.columns]
+    if stale:
+        df = df.drop(columns=stale)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", pd.errors.PerformanceWarning)
+        df[cols] = values
+    return df
+
+def _attach_scaled(df: pd.DataFrame, cols: list, factor: np.ndarray) -> pd.DataFrame:
+    """
+    Add <col>_ctx = col * factor for each of `cols`, one column at a time.
+    Each product is attached as its own array, so the only temporary is
+    one column, not a (rows x metrics) block that is then copied in.
+    """
+    stale = [c + "_ctx" for c in cols if c + "_ctx" in df.columns]
+    if stale:
+        df = df.drop(columns=stale)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", pd.errors.PerformanceWarning)
+        for c in cols:
+            df[c + "_ctx"] = df[c].to_numpy(dtype=float) * factor
     return df
 
 
 
+
 # CONTEXT-NORMALISED METRICS
 
 
-def add_context_normalised_metrics(df: pd.DataFrame) -> pd.DataFrame:
+# League mean column -> team context driver it averages
+LEAGUE_MEANS = {
+    "Lg_Team_PossessionProxy": "Team_PossessionProxy",
+    "Lg_Team_PressIntensity": "Team_PressIntensity",
+    "Lg_Team_TempoProxy": "Team_TempoProxy",
+    "Lg_Team_Att_xg": "Team_Att_xg_per90",
+    "Lg_Team_xGD": "Team_xGD_proxy",
+}
+
+# Family -> (metrics, team driver, league mean of that driver)
+CONTEXT_FAMILIES = {
+    "possession": (POSS_METRICS, "Team_PossessionProxy", "Lg_Team_PossessionProxy"),
+    "press": (PRESS_METRICS, "Team_PressIntensity", "Lg_Team_PressIntensity"),
+    "tempo": (TEMPO_METRICS, "Team_TempoProxy", "Lg_Team_TempoProxy"),
+    "xg": (XG_METRICS, "Team_Att_xg_per90", "Lg_Team_Att_xg"),
+}
+
+
+def add_league_context_means(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Add the per-league mean of each team context driver (Lg_Team_*),
+    averaged over player rows, in one grouped pass.
+    """
+    if "League" not in df.columns:
+        raise ValueError("League column is required for context normalisation.")
+
+    codes, leagues = factorize_groups(df, "League")
+
+    drivers = [(lg_col, t) for lg_col, t in LEAGUE_MEANS.items() if t in df.columns]
+    block = df[[t for _, t in drivers]].to_numpy(dtype=float)
+    present = ~np.isnan(block)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        lg_means = group_sums(np.where(present, block, 0.0), codes, len(leagues)) / (
+            group_sums(present, codes, len(leagues))
+        )
+    lg_means = np.vstack([lg_means, np.full(len(drivers), np.nan)])[codes]
+
+    return _attach_block(df, [lg_col for lg_col, _ in drivers], lg_means)
+
+
+def context_active_families(df: pd.DataFrame) -> dict:
+    """
+    {family: True if _context_factor would normalise it over `df`}, for
+    passing as `active` to add_context_normalised_metrics on parts of df.
+    """
+    return {
+        fam: team_col not in df.columns or _has_spread(df[team_col].to_numpy(dtype=float))
+        for fam, (_, team_col, _) in CONTEXT_FAMILIES.items()
+    }
+
+
+def add_context_normalised_metrics(df: pd.DataFrame, metrics=None, active=None) -> pd.DataFrame:
     """
     Build context-normalised metrics ( *_ctx ) using team-level proxies
     for possession, press intensity, tempo, and attacking xG.
 
-    All normalisations are per league.
+    All normalisations are per league. Each family computes one factor
+    vector, shared by all its metrics; the scaled columns are attached one
+    at a time (see _attach_scaled) so the peak stays one column above the
+    output.
+
+    `metrics` restricts the work to those raw metric names (default:
+    every family metric). League means are only added if missing.
+    `active` ({family: bool}) replaces the dataset-wide spread check of
+    _context_factor, for frames that are one shard of a larger dataset.
     """
     if "League" not in df.columns:
         raise ValueError("League column is required for context normalisation.")
 
-    lg = df.groupby("League")
-
     # League means for context drivers
-    df["Lg_Team_PossessionProxy"] = lg["Team_PossessionProxy"].transform("mean")
-    df["Lg_Team_PressIntensity"] = lg["Team_PressIntensity"].transform("mean")
-    df["Lg_Team_TempoProxy"] = lg["Team_TempoProxy"].transform("mean")
-    df["Lg_Team_Att_xg"] = lg["Team_Att_xg_per90"].transform("mean")
-    df["Lg_Team_xGD"] = lg["Team_xGD_proxy"].transform("mean")
-
-
-    # POSSESSION-CONTROLLED CREATION / PASSING METRICS
-
-    poss_metrics = [
-        "Op_passes",
-        "Op_key_passes",
-        "Op_passes_into_box",
-        "Passes_inside_box",
-        "Through_balls",
-        "Op_xa",
-        "Key_passes",
-        "Assists",
-        "Op_last_3rd_passes",
-        "Xgchain",
-        "Op_xgchain",
-        "Xgbuildup",
-        "Op_xgbuildup",
-        "Xgchain_per_possession",
-        "Op_xgchain_per_possession",
-        "Xgbuildup_per_possession",
-        "Op_xgbuildup_per_possession",
-        "Pass_and_carry_last_3rd",
-        "Crosses_completed",
-        "Sp_pass_into_box",
-        "Touches_in_box",
-    ]
-
-    for col in poss_metrics:
-        _hybrid_norm(df, col, "Team_PossessionProxy", "Lg_Team_PossessionProxy")
-
-
-    # PRESSURE ENVIRONMENT
-
-    press_metrics = [
-        "Pressures",
-        "Padj_pressures",
-        "Counterpressures",
-        "Opp_half_pressures",
-        "Opp_half_counterpressures",
-        "Successful_pressures",
-        "Successful_counterpressures",
-        "Defensive_actions",
-        "Tackles",
-        "Interceptions",
-        "Padj_tackles",
-        "Padj_interceptions",
-        "Ball_recoveries",
-    ]
-
-    for col in press_metrics:
-        _hybrid_norm(df, col, "Team_PressIntensity", "Lg_Team_PressIntensity")
-
-
-    # TEMPO / TRANSITION ENVIRONMENT
-
-    tempo_metrics = [
-        "Carries",
-        "Dribbles_attempts",
-        "Dribbles_successful",
-        "Turnovers",
-        "Carry_length",
-        "Failed_dribbles",
-        "Dispossessed",
-    ]
-
-    for col in tempo_metrics:
-        _hybrid_norm(df, col, "Team_TempoProxy", "Lg_Team_TempoProxy")
-
-
-    # XG STRENGTH (ATTACKING)
-
-    xg_metrics = ["Np_xg", "Np_goals", "Np_shots"]
-
-    for col in xg_metrics:
-        _hybrid_norm(df, col, "Team_Att_xg_per90", "Lg_Team_Att_xg")
-
-    # Convenience: context-adjusted finishing difference if available
-    if "Np_xg_ctx" in df.columns and "Np_goals_ctx" in df.columns:
-        df["Actual_vs_xG_ctx"] = df["Np_goals_ctx"] - df["Np_xg_ctx"]
+    if any(t in df.columns and lg not in df.columns for lg, t in LEAGUE_MEANS.items()):
+        df = add_league_context_means(df)
+
+    wanted = None if metrics is None else set(metrics)
+
+    # POSSESSION / PRESSURE / TEMPO / XG STRENGTH: one factor per family
+    for fam, (fam_metrics, team_col, league_mean_col) in CONTEXT_FAMILIES.items():
+        cols = [
+            c for c in fam_metrics
+            if c in df.columns and (wanted is None or c in wanted)
+        ]
+        if not cols or team_col not in df.columns or league_mean_col not in df.columns:
+            continue
+
+        team = df[team_col].to_numpy(dtype=float)
+        league_mean = df[league_mean_col].to_numpy(dtype=float)
+        if active is None:
+            factor = _context_factor(team, league_mean)
+        else:
+            factor = _scale_factor(team, league_mean) if active.get(fam, True) else None
+        if factor is None:
+            continue
+
+        df = _attach_scaled(df, cols, factor)
 
+    return _attach_finishing_diff(df)
+
+
+def _attach_finishing_diff(df: pd.DataFrame) -> pd.DataFrame:
+    """Convenience: context-adjusted finishing difference if available."""
+    if "Np_xg_ctx" in df.columns and "Np_goals_ctx" in df.columns:
+        df = _attach_block(
+            df, ["Actual_vs_xG_ctx"],
+            (df["Np_goals_ctx"].to_numpy() - df["Np_xg_ctx"].to_numpy())[:, None],
+        )
     return df
 
 
@@ -242,35 +497,42 @@ def add_context_normalised_metrics(df: pd.DataFrame) -> pd.DataFrame:
 # PER-LEAGUE Z-SCORING (IDEMPOTENT)
 
 
-def zscore_once(df: pd.DataFrame, metrics, prefix: str = "z_") -> pd.DataFrame:
+def zscore_once(
+    df: pd.DataFrame, metrics, prefix: str = "z_", workers: int | None = None
+) -> pd.DataFrame:
     """
     Compute z-scores within each league for the given metrics.
 
     - Idempotent: if z_<metric> already exists, it is NOT recomputed.
     - Missing metrics get a z-score of 0.0.
     - Values are clipped to [-3, 3] to avoid extreme outliers.
+
+    All pending metrics are z-scored together as one 2D block (league
+    codes factorised once) and added to `df` in place, like the other
+    stages' columns, rather than concatenated onto a copy of the frame.
+    With workers > 1 (default: CONTEXT_WORKERS) the block is z-scored
+    per league shard in a process pool (analysis.parallel).
     """
     if "League" not in df.columns:
         raise ValueError("League column is required for z-scoring.")
 
-    for m in metrics:
-        zcol = f"{prefix}{m}"
-        if zcol in df.columns:
-            # Already computed – don't re-normalise
-            continue
-
-        if m not in df.columns:
-            df[zcol] = 0.0
-            continue
-
-        g = df.groupby("League")[m]
-        mean = g.transform("mean")
-        std = g.transform("std").replace(0, np.nan)
+    # Already computed – don't re-normalise
+    todo = [m for m in dict.fromkeys(metrics) if f"{prefix}{m}" not in df.columns]
+    if not todo:
+        return df
 
-        z = (df[m] - mean) / std
-        df[zcol] = z.fillna(0.0).clip(-3.0, 3.0)
+    present = [m for m in todo if m in df.columns]
+    codes, leagues = factorize_groups(df, "League")
+    z = sharded_grouped_zscore(
+        df[present].to_numpy(dtype=float), codes, len(leagues), clip=3.0,
+        workers=CONTEXT_WORKERS if workers is None else workers,
+    )
 
-    return df
+    block = np.zeros((len(df), len(todo)))
+    for j, m in enumerate(todo):
+        if m in present:
+            block[:, j] = z[:, present.index(m)]
+    return _attach_block(df, [f"{prefix}{m}" for m in todo], block)
 
 
 
@@ -281,9 +543,18 @@ def compute_baseline(df: pd.DataFrame, baseline: dict) -> pd.DataFrame:
     """
     Compute all custom baseline metrics defined in ROLE_CONFIG[role]["baseline"].
     Many of these now use *_ctx metrics as inputs.
+
+    Compiled metrics are evaluated together in one pass over shared input
+    arrays, so no temporary Series are built; each result array is then
+    set directly (cheaper than a block assignment here, since some metric
+    names replace existing raw columns). Plain lambdas still run one at a
+    time.
     """
+    compiled = {n: m for n, m in baseline.items() if isinstance(m, CompiledMetric)}
+    values = evaluate_metrics(df, compiled) if compiled else {}
+
     for name, fn in baseline.items():
-        df[name] = fn(df)
+        df[name] = values[name] if name in values else fn(df)
     return df
 
 
@@ -317,13 +588,52 @@ def add_index_percentiles(df: pd.DataFrame, indices: dict) -> pd.DataFrame:
     for idx_name in indices.keys():
         pct_col = idx_name.replace("_Index", "_pct")
         if idx_name in df.columns:
-            df[pct_col] = df[idx_name].rank(pct=True) * 100
+            df[pct_col] = column_percentiles(df[idx_name])
         else:
             df[pct_col] = 0.0
     return df
 
 
 
+# GROUP METRIC PERCENTILES (PIZZA CHART)
+
+
+PCT_PREFIX = "pct_"
+
+
+def group_metrics(groups: dict) -> list:
+    """All group metrics, flattened in group order (the pizza order)."""
+    return [m for metric_list in groups.values() for m in metric_list]
+
+
+def metric_percentile_matrix(df: pd.DataFrame, groups: dict, invert) -> np.ndarray:
+    """
+    (players x metrics) percentiles of every group metric within `df`,
+    in group order, with `invert` metrics flipped (100 - pct) so higher is
+    always better. Metrics missing from `df` are filled with 50.
+    """
+    metrics = group_metrics(groups)
+    out = np.full((len(df), len(metrics)), 50.0)
+    for j, m in enumerate(metrics):
+        if m in df.columns:
+            pct = column_percentiles(df[m])
+            out[:, j] = 100 - pct if m in invert else pct
+    return out
+
+
+def add_metric_percentiles(df: pd.DataFrame, groups: dict, invert) -> pd.DataFrame:
+    """
+    Add pct_<metric> columns (see metric_percentile_matrix) so a pizza
+    chart only has to read one row instead of re-ranking the population.
+    """
+    return _attach_block(
+        df,
+        [PCT_PREFIX + m for m in group_metrics(groups)],
+        metric_percentile_matrix(df, groups, invert),
+    )
+
+
+
 # OVERALL ROLE RATING
 
 
@@ -364,13 +674,14 @@ def compute_overall(
         df["Overall_raw"] += (adj_weights[g] / total_weight) * df[f"{g}_GroupZ"]
 
     # 3) Apply league strength at the final stage
-    df["LeagueMult"] = df["League"].map(LEAGUE_MULTIPLIERS).fillna(
+    # (astype: League may be categorical, whose map() keeps the dtype)
+    df["LeagueMult"] = df["League"].map(LEAGUE_MULTIPLIERS).astype(float).fillna(
         LEAGUE_MULTIPLIERS.get("DEFAULT", 1.0)
     )
     df["Overall_adj"] = df["Overall_raw"] * df["LeagueMult"]
 
     # 4) Percentile within the role-filtered dataset
-    df["Overall_pct"] = df["Overall_adj"].rank(pct=True) * 100
+    df["Overall_pct"] = column_percentiles(df["Overall_adj"])
 
     return df
 
@@ -379,22 +690,26 @@ def compute_overall(
 # BUY SCORE (Celtic-optimised)
 
 
-def compute_buy_score(df: pd.DataFrame, budget_million: float) -> pd.DataFrame:
+def add_buy_components(
+    df: pd.DataFrame,
+    league_mean_minutes: np.ndarray | None = None,
+) -> pd.DataFrame:
     """
-    Level 4 BuyScore for Celtic:
+    Raw BuyScore components (before per-league z-scoring):
+    Value_million, ValueEff, AgePremium, Reliability, FinishingDiff,
+    AssistDiff, Sustainability and Perf.
 
-    Combines:
-      - Value Efficiency
-      - Age Profile
-      - Reliability (availability)
-      - Sustainability (regression risk on G/xG + A/xA)
-      - Performance (Overall_adj)
-
-    Then filters to players within the transfer budget.
+    `league_mean_minutes` (one value per row) replaces the per-league
+    mean of Minutes over `df`, for frames that are a chunk of a larger
+    population.
     """
 
     # 1. VALUE EFFICIENCY  
-    df["Value_million"] = df["Value"].apply(convert_value_to_millions).fillna(99)
+    # (Value_million is parsed once into the cached dataset; frames built
+    # elsewhere are parsed here, vectorised)
+    if "Value_million" not in df.columns:
+        df["Value_million"] = convert_values_to_millions(df["Value"])
+    df["Value_million"] = df["Value_million"].fillna(99)
 
     # ability-per-cost (log dampens inflation)
     df["ValueEff"] = df["Overall_adj"] / np.log(df["Value_million"] + 1.75)
@@ -403,7 +718,8 @@ def compute_buy_score(df: pd.DataFrame, budget_million: float) -> pd.DataFrame:
     df["AgePremium"] = 1 / (1 + np.exp((df["Age"] - 23) / 3))
 
     # 3. RELIABILITY (Minutes availability – league normalised)  
-    league_mean_minutes = df.groupby("League")["Minutes"].transform("mean")
+    if league_mean_minutes is None:
+        league_mean_minutes = df.groupby("League", observed=True)["Minutes"].transform("mean")
     df["Reliability"] = (df["Minutes"] / league_mean_minutes).replace(
         [np.inf, -np.inf], np.nan
     )
@@ -430,21 +746,32 @@ def compute_buy_score(df: pd.DataFrame, budget_million: float) -> pd.DataFrame:
     # 5. PERFORMANCE FIT 
     df["Perf"] = df["Overall_adj"]
 
+    return df
+
+
+def compute_buy_score(df: pd.DataFrame, budget_million: float) -> pd.DataFrame:
+    """
+    Level 4 BuyScore for Celtic:
+
+    Combines:
+      - Value Efficiency
+      - Age Profile
+      - Reliability (availability)
+      - Sustainability (regression risk on G/xG + A/xA)
+      - Performance (Overall_adj)
+
+    Then filters to players within the transfer budget.
+    """
+    df = add_buy_components(df)
+
     # NORMALISE BUY COMPONENTS (per league) 
     df = zscore_once(df, ["ValueEff", "AgePremium", "Reliability", "Sustainability", "Perf"])
 
     # CELTIC-OPTIMISED WEIGHTING 
-    df["BuyScore"] = (
-        0.10 * df["z_ValueEff"]
-        + 0.20 * df["z_AgePremium"]
-        + 0.10 * df["z_Reliability"]
-        + 0.05 * df["z_Sustainability"]
-        + 0.60 * df["z_Perf"]  # sliders heavily steer Perf via Overall_adj
-    )
+    df["BuyScore"] = sum(w * df[f"z_{c}"] for c, w in BUY_WEIGHTS.items())
 
     # APPLY BUDGET FILTER 
-    df = df[df["Value_million"] <= budget_million].copy()
-    return df
+    return _take_rows(df, (df["Value_million"] <= budget_million).to_numpy())
 
 
 
@@ -466,24 +793,634 @@ def run_pipeline(
     weights = cfg["weights"]
 
     # 1) Compute baseline metrics (many use *_ctx)
-    df = compute_baseline(df, baseline)
+    df = traced("baseline", compute_baseline, df, baseline)
 
     # 2) Compute role indices + index percentiles
-    df = compute_indices(df, indices)
-    df = add_index_percentiles(df, indices)
+    df = traced("indices", compute_indices, df, indices)
+    df = traced("index_percentiles", add_index_percentiles, df, indices)
+
+    # Stages add their columns in place; consolidate the role-sized frame
+    # once here so later inserts do not work on hundreds of 1-column blocks
+    df = df.copy()
 
     # 3) Compute OVERALL (performance ability score, with league strength)
-    df = compute_overall(df, groups, weights, sliders)
+    df = traced("overall", compute_overall, df, groups, weights, sliders)
 
-    # 4) GLOBAL OVERALL PERCENTILE (before budget filter)
-    df["Overall_pct_global"] = df["Overall_adj"].rank(pct=True) * 100
+    # 4) GLOBAL OVERALL PERCENTILE (before budget filter). Same column and
+    #    population as Overall_pct, so reuse it rather than rank again.
+    df["Overall_pct_global"] = df["Overall_pct"]
 
     # 5) BUY SCORE (handles age, value, and budget, and filters by budget)
-    df = compute_buy_score(df, budget_million)
+    df = traced("buy_score", compute_buy_score, df, budget_million)
+
+    # 6) PIZZA PERCENTILES within the in-budget pool
+    df = traced("metric_percentiles", add_metric_percentiles, df, groups, cfg["invert"])
+
+    return df
+
+
+
+# SHARED CONTEXT FRAME
+
+
+# The context-normalised universe (load + team context + *_ctx) does not
+# depend on the role, so it is built once per (path, min_minutes, data
+# version) and shared by every role. Bounded LRU; oldest entry evicted.
+#
+# Columns are materialised lazily: the cached frame starts with identity
+# and team-context columns, and each caller adds only the raw / *_ctx
+# columns it asks for. Added columns stay cached for later callers.
+CONTEXT_CACHE_SIZE = 4
+
+# Workers for building a context frame per league shard (see
+# sharded_context); 1 builds it serially. Opt in with
+# ANALYSIS_CONTEXT_WORKERS=<n> or build_context_frame(..., workers=n).
+CONTEXT_WORKERS = int(os.environ.get("ANALYSIS_CONTEXT_WORKERS", "1"))
+
+_CONTEXT_CACHE: OrderedDict = OrderedDict()
+_CONTEXT_LOCK = threading.Lock()
+
+
+def all_context_columns() -> list:
+    """Every raw and *_ctx column the engine can materialise."""
+    ctx = [m + "_ctx" for fam in CONTEXT_FAMILIES.values() for m in fam[0]]
+    return model_columns() + ctx
+
+
+def materialise_columns(
+    df: pd.DataFrame, path: str, columns, workers: int | None = None
+) -> pd.DataFrame:
+    """
+    Return `df` extended with any of `columns` it lacks.
+
+    Raw columns are read from the columnar cache of `path` (aligned on the
+    frame's row labels); *_ctx columns are computed from their raw metric,
+    per league shard in a process pool when workers > 1 (default:
+    CONTEXT_WORKERS). Names the source file does not have are skipped.
+    The input frame is never modified: new columns go onto a shallow copy.
+    """
+    workers = CONTEXT_WORKERS if workers is None else workers
+    ctx = [c for c in columns if c.endswith("_ctx") and c not in df.columns]
+    raw = {c for c in columns if not c.endswith("_ctx")}
+    raw |= {c[: -len("_ctx")] for c in ctx}
+    raw = sorted(c for c in raw if c not in df.columns)
+
+    if not raw and not ctx:
+        return df
+
+    df = df.copy(deep=False)
+
+    if raw:
+        extra = read_player_data(path, raw)
+        if len(extra.columns):
+            df = _attach_block(df, list(extra.columns), extra.loc[df.index])
+
+    if ctx:
+        metrics = [c[: -len("_ctx")] for c in ctx]
+        if workers > 1:
+            # Imported here: sharded_context imports this module
+            from .sharded_context import add_context_normalised_sharded
+
+            df = add_context_normalised_sharded(df, metrics=metrics, workers=workers)
+        else:
+            df = add_context_normalised_metrics(df, metrics=metrics)
 
     return df
 
 
+def build_context_frame(
+    path: str, min_minutes: int, columns=None, workers: int | None = None
+) -> pd.DataFrame:
+    """
+    Load the dataset with team context and league means, then materialise
+    `columns` (default: every raw and *_ctx column). Uncached; see
+    get_context_frame.
+
+    With workers > 1 (default: CONTEXT_WORKERS) the raw columns are read
+    first and team context, league means and the *_ctx columns are built
+    per league shard in a process pool (add_context_sharded). The result
+    is the same frame; only frames of SHARD_MIN_ROWS rows or more are
+    actually split.
+    """
+    columns = all_context_columns() if columns is None else columns
+    workers = CONTEXT_WORKERS if workers is None else workers
+
+    df = traced(
+        "load", load_data, path, min_minutes, columns=ID_COLUMNS + TEAM_INPUT_COLUMNS
+    )
+
+    if workers > 1:
+        # Imported here: sharded_context imports this module
+        from .sharded_context import add_context_sharded
+
+        ctx = [c[: -len("_ctx")] for c in columns if c.endswith("_ctx")]
+        raw = [c for c in columns if not c.endswith("_ctx")] + ctx
+        df = traced("materialise", materialise_columns, df, path, raw)
+        return traced(
+            "context_sharded", add_context_sharded, df, metrics=ctx, workers=workers
+        )
+
+    df = traced("team_context", add_team_context_metrics, df)
+    df = traced("league_means", add_league_context_means, df)
+    return traced("materialise", materialise_columns, df, path, columns)
+
+
+def context_key(path: str, min_minutes: int) -> tuple:
+    """Cache key: (absolute path, min_minutes, content hash of the file)."""
+    version = file_fingerprint(path)["sha256"]
+    return (os.path.abspath(path), min_minutes, version)
+
+
+def get_context_frame(path: str, min_minutes: int, columns=None) -> pd.DataFrame:
+    """
+    Return the shared context-normalised frame for (path, min_minutes),
+    with at least `columns` materialised (default: every raw and *_ctx
+    column).
+
+    The frame is cached and shared between callers, so treat it as
+    read-only: take a filtered copy (see role_frame) before adding columns.
+    A changed source file gets a new key, so stale frames are never served.
+
+    Columns are materialised outside _CONTEXT_LOCK, on a new frame that is
+    then swapped into the cache; the lock only guards the lookups and the
+    swap. If another caller swapped in a frame meanwhile, the work is
+    redone on top of that one so neither caller's columns are lost.
+    """
+    key = context_key(path, min_minutes)
+    columns = all_context_columns() if columns is None else columns
+
+    with _CONTEXT_LOCK:
+        df = _CONTEXT_CACHE.get(key)
+
+    if df is None:
+        df = traced("build_context", build_context_frame, path, min_minutes, columns=[])
+
+    while True:
+        out = traced("materialise", materialise_columns, df, path, columns)
+        if compact.COMPACT_MEMORY:
+            out = traced("compact", compact.compact_frame, out)
+
+        with _CONTEXT_LOCK:
+            current = _CONTEXT_CACHE.get(key)
+            if current is None or current is df:
+                _store_context(key, out)
+                return out
+
+        df = current
+
+
+def set_context_frame(path: str, min_minutes: int, df: pd.DataFrame) -> None:
+    """
+    Install `df` as the shared context frame for (path, min_minutes), e.g.
+    one get_context_frame built in another process for the same file
+    contents. Later calls materialise any missing columns on top of it.
+    """
+    key = context_key(path, min_minutes)
+    with _CONTEXT_LOCK:
+        _store_context(key, df)
+
+
+def _store_context(key: tuple, df: pd.DataFrame) -> None:
+    """Cache `df` under `key`, evicting the oldest frames. Hold _CONTEXT_LOCK."""
+    _CONTEXT_CACHE[key] = df
+    _CONTEXT_CACHE.move_to_end(key)
+    while len(_CONTEXT_CACHE) > CONTEXT_CACHE_SIZE:
+        _CONTEXT_CACHE.popitem(last=False)
+
+
+def invalidate_context(path: str | None = None) -> None:
+    """
+    Drop cached context frames (and the role states and results built on
+    them) for `path`, or for every path if None.
+    """
+    global _RESULT_BYTES
+
+    with _CONTEXT_LOCK:
+        for cache in (_CONTEXT_CACHE, _ROLE_CACHE, _RESULT_CACHE):
+            if path is None:
+                cache.clear()
+                continue
+            target = os.path.abspath(path)
+            for key in [k for k in cache if k[0] == target]:
+                del cache[key]
+        _RESULT_BYTES = sum(size for _, size in _RESULT_CACHE.values())
+
+
+def cache_megabytes() -> dict:
+    """Deep size in MB of the cached context frames, role frames and results."""
+    with _CONTEXT_LOCK:
+        contexts = list(_CONTEXT_CACHE.values())
+        roles = [s["frame"] for s in _ROLE_CACHE.values() if s is not None]
+        results = _RESULT_BYTES
+    return {
+        "context": sum(compact.frame_megabytes(df) for df in contexts),
+        "roles": sum(compact.frame_megabytes(df) for df in roles),
+        "results": results / 1e6,
+    }
+
+
+def role_frame(ctx: pd.DataFrame, positions, columns=None) -> pd.DataFrame:
+    """
+    Filter the shared context frame to players whose primary or secondary
+    position is in `positions`. Returns an independent copy.
+
+    `columns` keeps only those columns plus the identity, team-context and
+    league-mean columns, so the result does not depend on what other
+    callers happened to materialise in the shared frame. That result is
+    consolidated: the shared frame is built up one column block at a
+    time, and the pipeline stages add a column per metric on top.
+    """
+    mask = (
+        ctx["Position_1"].isin(positions)
+        | ctx["Position_2"].isin(positions)
+    )
+    if columns is not None:
+        keep = (
+            set(columns) | set(ID_COLUMNS) | set(TEAM_INPUT_COLUMNS)
+            | set(TEAM_CONTEXT_COLUMNS) | set(LEAGUE_MEANS) | {"Actual_vs_xG_ctx"}
+        )
+        return ctx.loc[mask, [c for c in ctx.columns if c in keep]].copy()
+    return ctx.take(np.flatnonzero(mask.to_numpy()))
+
+
+
+# SHORTLIST SELECTION
+
+
+def top_k_positions(scores: np.ndarray, k: int) -> np.ndarray:
+    """
+    Positions of the k highest scores, best first, without sorting the
+    whole array: np.argpartition finds the k candidates in O(n) and only
+    those k are ordered. NaN scores rank last; equal scores keep their
+    original order (like a stable descending sort).
+    """
+    scores = np.asarray(scores, dtype=float)
+    n = len(scores)
+    k = max(0, min(int(k), n))
+    if k == 0:
+        return np.empty(0, dtype=np.int64)
+
+    key = np.where(np.isnan(scores), -np.inf, scores)
+    if k == n:
+        cand = np.arange(n)
+    else:
+        cand = np.argpartition(-key, k - 1)[:k]
+        # the partition boundary may split a tie: pull in every equal
+        # score so the stable tie-break below picks the earliest rows
+        cutoff = key[cand].min()
+        cand = np.union1d(cand[key[cand] > cutoff], np.flatnonzero(key == cutoff))
+
+    order = np.lexsort((cand, np.isnan(scores[cand]), -key[cand]))
+    return cand[order][:k]
+
+
+def top_k(df: pd.DataFrame, k: int, by: str = "BuyScore") -> pd.DataFrame:
+    """The k best rows of `df` by `by`, best first (see top_k_positions)."""
+    return df.iloc[top_k_positions(df[by].to_numpy(dtype=float), k)]
+
+
+
+# SLIDER-ONLY RESCORING
+
+
+# Sliders only rescale the group weights inside compute_overall. Everything
+# upstream (baseline, indices, *_GroupZ) and most BuyScore components are
+# slider-independent, so each role's scored frame is cached once and a
+# slider change is re-applied as a (players x groups) @ (groups,) product.
+ROLE_CACHE_SIZE = 16
+
+# Columns recomputed by rescore(); everything else comes from the cache
+SLIDER_COLUMNS = [
+    "Overall_raw", "Overall_adj", "Overall_pct", "Overall_pct_global",
+    "ValueEff", "Perf", "z_ValueEff", "z_Perf", "BuyScore",
+]
+
+_ROLE_CACHE: OrderedDict = OrderedDict()
+
+# Role states being built right now: key -> Future. A second caller that
+# misses the cache waits on the running build instead of starting its own
+_ROLE_BUILDS: dict = {}
+
+# Kept on every cached role frame in compact mode (identity and the team
+# context the summaries describe), on top of compact.output_columns
+ROLE_OUTPUT_COLUMNS = (
+    ID_COLUMNS + ["League", "Team", "Minutes"] + TEAM_CONTEXT_COLUMNS + list(LEAGUE_MEANS)
+)
+
+
+def build_role_state(ctx: pd.DataFrame, role: str, columns=None) -> dict | None:
+    """
+    Score `role` once at neutral sliders with no budget cut and keep the
+    slider-independent pieces needed to re-score it. `columns` are the
+    context columns the role frame keeps (default: role_dependencies):
+
+      - frame       : full scored role frame (pre-budget)
+      - group_z     : (players x groups) matrix of *_GroupZ columns
+      - groups      : group names, in group_z column order
+      - base_weight : ROLE_CONFIG weight per group
+      - league_mult, value_log, league_codes, n_leagues
+      - buy_fixed   : weighted z_AgePremium + z_Reliability + z_Sustainability
+      - pct_by_budget : pizza percentile matrices per budget, filled lazily
+
+    Returns None if no players match the role's positions.
+    """
+    cfg = ROLE_CONFIG[role]
+    columns = role_dependencies(role) if columns is None else columns
+    df = traced("role_filter", role_frame, ctx, cfg["positions"], columns=columns)
+    if df.empty:
+        return None
+
+    df = traced("pipeline", run_pipeline, df, cfg, {}, np.inf)
+
+    groups = [g for g in cfg["groups"] if f"{g}_GroupZ" in df.columns]
+    codes, leagues = factorize_groups(df, "League")
+    group_z = df[[f"{g}_GroupZ" for g in groups]].to_numpy(dtype=float)
+
+    frame = df
+    if compact.COMPACT_MEMORY:
+        frame = compact.compact_frame(
+            compact.drop_intermediates(df, cfg, keep=ROLE_OUTPUT_COLUMNS)
+        )
+
+    return {
+        "frame": frame,
+        "group_z": group_z,
+        "groups": groups,
+        "base_weight": cfg["weights"],
+        "league_mult": df["LeagueMult"].to_numpy(dtype=float),
+        "value_log": np.log(df["Value_million"].to_numpy(dtype=float) + 1.75),
+        "league_codes": codes,
+        "n_leagues": len(leagues),
+        "buy_fixed": sum(
+            BUY_WEIGHTS[c] * df[f"z_{c}"].to_numpy(dtype=float)
+            for c in ("AgePremium", "Reliability", "Sustainability")
+        ),
+        "pct_by_budget": {},
+    }
+
+
+def get_role_state(role: str, path: str, min_minutes: int) -> dict | None:
+    """
+    Cached build_role_state, keyed by the context key plus role. Only one
+    build per key runs at a time: concurrent callers (e.g. the warm-up
+    and a first request) wait for it and share its result or error.
+    """
+    key = context_key(path, min_minutes) + (role,)
+
+    with _CONTEXT_LOCK:
+        if key in _ROLE_CACHE:
+            _ROLE_CACHE.move_to_end(key)
+            return _ROLE_CACHE[key]
+        pending = _ROLE_BUILDS.get(key)
+        if pending is None:
+            building = _ROLE_BUILDS[key] = Future()
+
+    if pending is not None:
+        return traced("role_state_wait", pending.result)
+
+    try:
+        # Only the *_ctx columns this role reads are computed; the raw
+        # columns are all kept, so callers can read any of them
+        columns = role_columns(role, path)
+        ctx = traced(
+            "context_frame", get_context_frame, path, min_minutes, columns=columns
+        )
+        state = traced("score_role", build_role_state, ctx, role, columns)
+    except BaseException as exc:
+        with _CONTEXT_LOCK:
+            del _ROLE_BUILDS[key]
+        building.set_exception(exc)
+        raise
+
+    with _CONTEXT_LOCK:
+        _ROLE_CACHE[key] = state
+        _ROLE_CACHE.move_to_end(key)
+        while len(_ROLE_CACHE) > ROLE_CACHE_SIZE:
+            _ROLE_CACHE.popitem(last=False)
+        del _ROLE_BUILDS[key]
+
+    building.set_result(state)
+    return state
+
+
+def budget_percentiles(
+    state: dict,
+    role: str,
+    in_budget: np.ndarray,
+    budget_million: float,
+) -> np.ndarray:
+    """
+    Pizza percentile matrix for the in-budget pool. It depends only on the
+    budget (the group metrics ignore the sliders), so it is computed once
+    per budget and kept on the role state.
+    """
+    with _CONTEXT_LOCK:
+        cached = state["pct_by_budget"].get(budget_million)
+    if cached is None:
+        cfg = ROLE_CONFIG[role]
+        pool = state["frame"].iloc[in_budget]
+        cached = metric_percentile_matrix(pool, cfg["groups"], cfg["invert"])
+        # The role state is shared: store under the lock, first writer wins
+        with _CONTEXT_LOCK:
+            cached = state["pct_by_budget"].setdefault(budget_million, cached)
+    return cached
+
+
+def slider_weights(state: dict, sliders: dict) -> np.ndarray:
+    """
+    Normalised group weights (one per state["groups"]) for a slider dict,
+    exactly as compute_overall derives adj_weights / total_weight.
+    """
+    base = state["base_weight"]
+    adj = {g: base[g] * sliders.get(g, 1.0) for g in base}
+    total = sum(adj.values()) or 1.0
+    return np.array([adj[g] / total for g in state["groups"]])
+
+
+def rescore(
+    role: str,
+    sliders: dict | None = None,
+    *,
+    path: str = DEFAULT_PATH,
+    min_minutes: int | None = None,
+    budget_million: float | None = None,
+    top_k: int | None = None,
+) -> pd.DataFrame:
+    """
+    Re-rank a role for new slider values without re-running the pipeline.
+
+    Only Overall_adj, the per-league re-z-scored Perf / ValueEff and
+    BuyScore (plus the Overall percentiles) are recomputed, from the
+    cached *_GroupZ matrix. Output matches run_model for the same inputs.
+
+    With top_k, only the k best in-budget players by BuyScore are
+    returned (best first), picked by partial selection; the rest of the
+    frame is never copied.
+    """
+    if role not in ROLE_CONFIG:
+        raise ValueError(f"Unknown role: {role}")
+
+    cfg = ROLE_CONFIG[role]
+    min_minutes = min_minutes or cfg.get("min_minutes", DEFAULT_MINUTES)
+    budget_million = budget_million or DEFAULT_BUDGET
+
+    state = traced("role_state", get_role_state, role, path, min_minutes)
+    if state is None:
+        columns = role_columns(role, path)
+        return role_frame(
+            get_context_frame(path, min_minutes, columns=columns),
+            cfg["positions"],
+            columns=columns,
+        )
+
+    df = state["frame"]
+    codes, n_leagues = state["league_codes"], state["n_leagues"]
+
+    # OVERALL (group z-aggregates x slider weights, then league strength)
+    overall_raw = state["group_z"] @ slider_weights(state, sliders or {})
+    overall_adj = overall_raw * state["league_mult"]
+
+    # BUY SCORE (only ValueEff and Perf depend on the sliders)
+    value_eff = overall_adj / state["value_log"]
+    z_value_eff = grouped_zscore(value_eff, codes, n_leagues)
+    z_perf = grouped_zscore(overall_adj, codes, n_leagues)
+    buy = (
+        BUY_WEIGHTS["ValueEff"] * z_value_eff
+        + state["buy_fixed"]
+        + BUY_WEIGHTS["Perf"] * z_perf
+    )
+
+    # APPLY BUDGET FILTER (then the shortlist, if asked for)
+    in_budget = np.flatnonzero((df["Value_million"] <= budget_million).to_numpy())
+    if top_k is None:
+        sel = np.arange(len(in_budget))
+    else:
+        sel = top_k_positions(buy[in_budget], top_k)
+    keep = in_budget[sel]
+    out = df.take(keep)
+
+    # Overall percentile is relative to every role player; a shortlist
+    # only looks its k rows up in the sorted population
+    if top_k is None:
+        overall_pct = column_percentiles(overall_adj)[keep]
+    else:
+        overall_pct = PercentileIndex(overall_adj).percentile(overall_adj[keep])
+
+    updates = {
+        "Overall_raw": overall_raw[keep],
+        "Overall_adj": overall_adj[keep],
+        "Overall_pct": overall_pct,
+        "Overall_pct_global": overall_pct,
+        "ValueEff": value_eff[keep],
+        "Perf": overall_adj[keep],
+        "z_ValueEff": z_value_eff[keep],
+        "z_Perf": z_perf[keep],
+        "BuyScore": buy[keep],
+    }
+    for col in SLIDER_COLUMNS:
+        out[col] = updates[col]
+
+    # Pizza percentiles are relative to the whole in-budget pool
+    pct = budget_percentiles(state, role, in_budget, budget_million)
+    out[[PCT_PREFIX + m for m in group_metrics(cfg["groups"])]] = pct[sel]
+
+    return out
+
+
+
+# BATCH SCORING (MANY SLIDER CONFIGURATIONS)
+
+
+def _slider_table(cfg: dict, slider_matrix) -> pd.DataFrame:
+    """
+    Normalise a batch of slider configurations to an (N x groups) frame.
+
+    Accepts a DataFrame (one row per configuration, columns = group
+    names), a list of slider dicts, or an (N x groups) array whose
+    columns follow ROLE_CONFIG[role]["groups"] order. Missing groups
+    default to 1.0, as in run_model.
+    """
+    groups = list(cfg["groups"])
+
+    if isinstance(slider_matrix, pd.DataFrame):
+        table = slider_matrix
+    elif isinstance(slider_matrix, np.ndarray):
+        if slider_matrix.ndim != 2 or slider_matrix.shape[1] != len(groups):
+            raise ValueError(
+                f"slider_matrix must have shape (N, {len(groups)}) "
+                f"with columns {groups}"
+            )
+        table = pd.DataFrame(slider_matrix, columns=groups)
+    else:
+        table = pd.DataFrame(list(slider_matrix))
+
+    unknown = set(table.columns) - set(groups)
+    if unknown:
+        raise ValueError(f"Unknown slider groups: {sorted(unknown)}")
+
+    return table.reindex(columns=groups).astype(float).fillna(1.0)
+
+
+def run_model_batch(
+    role: str,
+    slider_matrix,
+    *,
+    path: str = DEFAULT_PATH,
+    min_minutes: int | None = None,
+    budget_million: float | None = None,
+) -> dict:
+    """
+    Score one role under N slider configurations in a single vectorised
+    pass over the cached group z-scores.
+
+    Returns {"Overall_adj": df, "BuyScore": df}, each a players x N frame
+    indexed like run_model's output (budget-filtered) with one column per
+    configuration (the slider table's index labels). Column j equals
+    run_model(role, **configuration_j) for that player.
+    """
+    if role not in ROLE_CONFIG:
+        raise ValueError(f"Unknown role: {role}")
+
+    cfg = ROLE_CONFIG[role]
+    min_minutes = min_minutes or cfg.get("min_minutes", DEFAULT_MINUTES)
+    budget_million = budget_million or DEFAULT_BUDGET
+
+    table = _slider_table(cfg, slider_matrix)
+
+    state = get_role_state(role, path, min_minutes)
+    if state is None:
+        empty = pd.DataFrame(columns=table.index, dtype=float)
+        return {"Overall_adj": empty, "BuyScore": empty.copy()}
+
+    df = state["frame"]
+    codes, n_leagues = state["league_codes"], state["n_leagues"]
+
+    # (groups x N) weights -> (players x N) overall scores
+    weights = np.column_stack(
+        [slider_weights(state, row) for row in table.to_dict("records")]
+    )
+    overall_adj = (state["group_z"] @ weights) * state["league_mult"][:, None]
+
+    # Per-league z of Perf and ValueEff for every configuration at once
+    z_perf = grouped_zscore(overall_adj, codes, n_leagues)
+    z_value_eff = grouped_zscore(
+        overall_adj / state["value_log"][:, None], codes, n_leagues
+    )
+    buy = (
+        BUY_WEIGHTS["ValueEff"] * z_value_eff
+        + state["buy_fixed"][:, None]
+        + BUY_WEIGHTS["Perf"] * z_perf
+    )
+
+    keep = (df["Value_million"] <= budget_million).to_numpy()
+    index = df.index[keep]
+
+    return {
+        "Overall_adj": pd.DataFrame(overall_adj[keep], index=index, columns=table.index),
+        "BuyScore": pd.DataFrame(buy[keep], index=index, columns=table.index),
+    }
+
+
 
 # UNIVERSAL ENTRY POINT
 
@@ -494,40 +1431,175 @@ def run_model(
     path: str = DEFAULT_PATH,
     min_minutes: int | None = None,
     budget_million: float | None = None,
+    top_k: int | None = None,
     **sliders,
 ) -> pd.DataFrame:
     """
     Generic runner for any configured role.
 
     Example:
-        run_model("winger", Ball Carrier=1.2, Goal Threat=0.8)
+        run_model("winger", **{"Ball Carrier": 1.2, "Goal Threat": 0.8})
+        run_model("winger", top_k=4)   # shortlist only, best first
+
+    The shared context frame and each role's slider-independent scores
+    are cached (see get_context_frame / get_role_state), so repeat calls
+    only redo the slider-dependent part via rescore().
+
+    By default every in-budget player is returned, unsorted; pass top_k
+    to get just the k highest BuyScores without ranking the whole pool.
+    Rows carry every column of the data file plus the role's scores, as
+    only the *_ctx columns are built lazily (compact mode, see
+    analysis.compact, drops the raw inputs no output reads).
+
+    Inside analysis.tracing.trace_pipeline() every stage is recorded
+    (time, rows, columns added, peak memory); otherwise tracing is off.
     """
-    if role not in ROLE_CONFIG:
-        raise ValueError(f"Unknown role: {role}")
+    return traced(
+        "run_model",
+        rescore,
+        role,
+        sliders,
+        path=path,
+        min_minutes=min_minutes,
+        budget_million=budget_million,
+        top_k=top_k,
+    )
+
+
+
+# RESULT CACHE
+
+
+# Finished run_model outputs, keyed by the context key (path, min_minutes,
+# file hash) plus role, budget, top_k and slider signature. Shared by every
+# caller in the process (all Streamlit sessions), LRU, and bounded by the
+# total size of the stored frames rather than the number of entries.
+RESULT_CACHE_MB = 256
+
+_RESULT_CACHE: OrderedDict = OrderedDict()   # key -> (frame, bytes)
+_RESULT_BYTES = 0
+
+
+def slider_signature(sliders: dict) -> tuple:
+    """
+    Hashable form of a slider dict. Neutral (1.0) entries are dropped, as
+    they score the same as a missing slider.
+    """
+    return tuple(sorted((g, float(v)) for g, v in sliders.items() if float(v) != 1.0))
 
+
+def result_key(role, path, min_minutes, budget_million, top_k, sliders) -> tuple:
+    """Result cache key, with the same defaults as rescore()."""
     cfg = ROLE_CONFIG[role]
     min_minutes = min_minutes or cfg.get("min_minutes", DEFAULT_MINUTES)
     budget_million = budget_million or DEFAULT_BUDGET
+    return context_key(path, min_minutes) + (
+        role, float(budget_million), top_k, slider_signature(sliders)
+    )
 
-    # 1) Load FULL dataset (all positions)
-    df = load_data(path, min_minutes)
 
-    # 2) Add team context & *_ctx metrics on the FULL dataset
-    df = add_team_context_metrics(df)
-    df = add_context_normalised_metrics(df)
+def cached_run_model(
+    role: str,
+    *,
+    path: str = DEFAULT_PATH,
+    min_minutes: int | None = None,
+    budget_million: float | None = None,
+    top_k: int | None = None,
+    **sliders,
+) -> pd.DataFrame:
+    """
+    run_model through the shared result cache. A repeat of any earlier
+    query (same file contents, role, minutes, budget, top_k and sliders)
+    returns a copy of the stored frame without touching the engine.
 
-    # 3) Now filter to role positions (AFTER context is built)
-    mask = (
-        df["Position_1"].isin(cfg["positions"])
-        | df["Position_2"].isin(cfg["positions"])
+    Least recently used results are evicted once the stored frames
+    exceed RESULT_CACHE_MB; a result larger than the cap is not stored.
+    Under trace_pipeline() a hit is recorded as one "result_cache" stage.
+    """
+    global _RESULT_BYTES
+
+    if role not in ROLE_CONFIG:
+        raise ValueError(f"Unknown role: {role}")
+
+    key = result_key(role, path, min_minutes, budget_million, top_k, sliders)
+    with _CONTEXT_LOCK:
+        hit = _RESULT_CACHE.get(key)
+        if hit is not None:
+            _RESULT_CACHE.move_to_end(key)
+
+    # A hit runs no pipeline stage; record it so a trace says why
+    if hit is not None:
+        return traced("result_cache", hit[0].copy)
+
+    df = run_model(
+        role, path=path, min_minutes=min_minutes,
+        budget_million=budget_million, top_k=top_k, **sliders,
     )
-    df = df[mask].copy()
+    size = int(df.memory_usage(deep=True).sum())
+
+    with _CONTEXT_LOCK:
+        if size <= RESULT_CACHE_MB * 1e6 and key not in _RESULT_CACHE:
+            _RESULT_CACHE[key] = (df.copy(), size)
+            _RESULT_BYTES += size
+            while _RESULT_BYTES > RESULT_CACHE_MB * 1e6:
+                _, (_, evicted) = _RESULT_CACHE.popitem(last=False)
+                _RESULT_BYTES -= evicted
+
+    return df
 
-    if df.empty:
-        return df
 
-    # 4) Run role-specific pipeline
-    return run_pipeline(df, cfg, sliders, budget_million)
+
+# WARM START
+
+
+def warm_start(
+    roles,
+    *,
+    path: str = DEFAULT_PATH,
+    min_minutes=None,
+    budget_million: float | None = None,
+    top_k: int | None = None,
+    workers: int | None = None,
+) -> dict:
+    """
+    Fill the caches in the background for each role at neutral sliders:
+    the shared context frame first (with every column the roles read),
+    then cached_run_model per role, the roles running concurrently in a
+    thread pool.
+
+    `min_minutes` is one value or a {role: minutes} mapping. Returns
+    {role: Future} straight away; a caller that needs a role before the
+    warm-up finishes can wait on its future. Failures are left on the
+    futures, so a bad file surfaces on the first real query instead.
+    """
+    roles = list(roles)
+    minutes = {}
+    for r in roles:
+        m = min_minutes.get(r) if isinstance(min_minutes, dict) else min_minutes
+        minutes[r] = m or ROLE_CONFIG[r].get("min_minutes", DEFAULT_MINUTES)
+
+    def build_context():
+        for m in set(minutes.values()):
+            deps = sorted({c for r in roles if minutes[r] == m for c in role_columns(r, path)})
+            get_context_frame(path, m, columns=deps)
+
+    def score(role):
+        context.result()
+        return cached_run_model(
+            role, path=path, min_minutes=minutes[role],
+            budget_million=budget_million, top_k=top_k,
+        )
+
+    pool = ThreadPoolExecutor(
+        max_workers=workers or max(1, min(len(roles), os.cpu_count() or 1)),
+        thread_name_prefix="warm-start",
+    )
+    # The context task is queued first, so a worker always picks it up
+    # before any role task can block on it
+    context = pool.submit(build_context)
+    futures = {role: pool.submit(score, role) for role in roles}
+    pool.shutdown(wait=False)
+    return futures
 
  
 # ROLE WRAPPERS 
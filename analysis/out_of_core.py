@@ -0,0 +1,348 @@
+import numpy as np
+import pandas as pd
+
+from .context_stats import (
+    _N_STATS,
+    _frame_getter,
+    _row_stats,
+    league_values,
+    spread_ok,
+    team_values,
+)
+from .data_cache import iter_player_data, player_data_columns
+from .group_ops import factorize_groups, group_sums
+from .model_config import ROLE_CONFIG
+from .model_engine import (
+    BUY_WEIGHTS,
+    DEFAULT_BUDGET,
+    DEFAULT_MINUTES,
+    DEFAULT_PATH,
+    ID_COLUMNS,
+    LEAGUE_MEANS,
+    PCT_PREFIX,
+    TEAM_CONTEXT_COLUMNS,
+    TEAM_INPUT_COLUMNS,
+    add_buy_components,
+    add_context_normalised_metrics,
+    add_index_percentiles,
+    compute_baseline,
+    compute_indices,
+    compute_overall,
+    group_metrics,
+    role_dependencies,
+    role_frame,
+    top_k_positions,
+)
+
+# Rows read per chunk; peak memory scales with this, not with the file
+CHUNK_ROWS = 200_000
+
+
+
+# OUT-OF-CORE SCORING
+#
+# run_model_chunked streams the source file several times. Each pass
+# re-derives a chunk from its raw rows and keeps only small summary state:
+#
+#   1. per-(League, Team) sufficient statistics (see context_stats) and
+#      per-league Minutes of the role's players  -> Team_*, Lg_Team_*,
+#      the spread check, Reliability's league mean
+#   2. per-league count / mean / M2 of the index and group metrics
+#      -> their z-scores
+#   3. per-league moments of the five BuyScore components
+#   4. BuyScore, keeping a running top-K of in-budget players
+#   5. exact ranks of the K shortlisted values -> Overall_pct, *_pct and
+#      the pizza pct_* columns
+#
+# Each dependency in the chain (context -> league z-scores -> Overall ->
+# league z-scores of the buy components -> ranks) needs the previous
+# pass's statistics, hence five passes rather than two. Every stage is
+# the in-memory function; chunk-wide grouping is replaced by the global
+# statistics, either passed in (league_mean_minutes, `active`) or as
+# precomputed z_* columns, which zscore_once leaves alone.
+
+
+def _global_ids(chunk: pd.DataFrame, keys, registry: dict) -> np.ndarray:
+    """Dataset-wide id of each row's key (-1 if missing), registering new keys."""
+    codes, labels = factorize_groups(chunk, keys)
+    ids = [registry.setdefault(label, len(registry)) for label in labels]
+    return np.append(np.array(ids, dtype=np.int64), -1)[codes]
+
+
+class _ContextStats:
+    """Pass 1 state: team statistics and the role's per-league Minutes."""
+
+    def __init__(self, positions):
+        self.positions = positions
+        self.leagues: dict = {}
+        self.teams: dict = {}
+        self.team_league = np.empty(0, dtype=np.int64)
+        self.stats = np.zeros((0, _N_STATS))
+        self.minutes = np.zeros((0, 2))  # per league: sum, count
+
+    def _ids(self, chunk: pd.DataFrame) -> tuple[np.ndarray, np.ndarray]:
+        lid = _global_ids(chunk, "League", self.leagues)
+        tid = _global_ids(chunk, ["League", "Team"], self.teams)
+        return lid, tid
+
+    def add(self, chunk: pd.DataFrame) -> None:
+        lid, tid = self._ids(chunk)
+
+        n_teams, n_leagues = len(self.teams), len(self.leagues)
+        grown = np.full(n_teams, -1, dtype=np.int64)
+        grown[: len(self.team_league)] = self.team_league
+        grown[tid[tid >= 0]] = lid[tid >= 0]
+        self.team_league = grown
+
+        self.stats = np.vstack([self.stats, np.zeros((n_teams - len(self.stats), _N_STATS))])
+        self.stats += group_sums(_row_stats(_frame_getter(chunk), len(chunk)), tid, n_teams)
+
+        role = _role_mask(chunk, self.positions)
+        w = chunk["Minutes"].to_numpy(dtype=float)
+        block = np.column_stack([np.nan_to_num(w, nan=0.0), ~np.isnan(w)])
+        self.minutes = np.vstack([self.minutes, np.zeros((n_leagues - len(self.minutes), 2))])
+        self.minutes += group_sums(block[role], lid[role], n_leagues)
+
+    def finish(self) -> None:
+        self.team_table = team_values(self.stats)
+        self.league_table = league_values(
+            self.team_table, self.stats, self.team_league, len(self.leagues)
+        )
+        self.active = spread_ok(self.team_table, self.stats)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            self.league_minutes = self.minutes[:, 0] / self.minutes[:, 1]
+
+    def attach(self, chunk: pd.DataFrame) -> tuple[pd.DataFrame, np.ndarray]:
+        """`chunk` plus Team_* and Lg_Team_* columns, and its league ids."""
+        lid, tid = self._ids(chunk)
+        teams = np.vstack([self.team_table, np.full(len(TEAM_CONTEXT_COLUMNS), np.nan)])
+        leagues = np.vstack([self.league_table, np.full(len(LEAGUE_MEANS), np.nan)])
+        block = pd.DataFrame(
+            np.hstack([teams[tid], leagues[lid]]),
+            index=chunk.index,
+            columns=TEAM_CONTEXT_COLUMNS + list(LEAGUE_MEANS),
+        )
+        return pd.concat([chunk, block], axis=1), lid
+
+
+def _role_mask(chunk: pd.DataFrame, positions) -> np.ndarray:
+    return (
+        chunk["Position_1"].isin(positions) | chunk["Position_2"].isin(positions)
+    ).to_numpy()
+
+
+
+# RUNNING STATISTICS
+
+
+class _LeagueMoments:
+    """Running per-league count / mean / M2 of several columns (Chan et al.)."""
+
+    def __init__(self, columns):
+        self.columns = list(columns)
+        self.count = np.zeros((0, len(self.columns)))
+        self.mean = np.zeros_like(self.count)
+        self.m2 = np.zeros_like(self.count)
+
+    def _values(self, chunk: pd.DataFrame) -> np.ndarray:
+        return chunk.reindex(columns=self.columns).to_numpy(dtype=float)
+
+    def add(self, chunk: pd.DataFrame, lid: np.ndarray) -> None:
+        n = max(len(self.count), int(lid.max()) + 1 if len(lid) else 0)
+        if n == 0:
+            return
+        pad = ((0, n - len(self.count)), (0, 0))
+        self.count, self.mean, self.m2 = (np.pad(a, pad) for a in (self.count, self.mean, self.m2))
+
+        values = self._values(chunk)
+        present = ~np.isnan(values)
+        count = group_sums(present, lid, n)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            mean = np.nan_to_num(group_sums(np.where(present, values, 0.0), lid, n) / count)
+            dev = np.where(present, values - mean[lid], 0.0)
+            m2 = group_sums(dev * dev, lid, n)
+
+            total = self.count + count
+            frac = np.where(total > 0, count / total, 0.0)
+        delta = mean - self.mean
+        self.m2 += m2 + delta * delta * self.count * frac
+        self.mean += delta * frac
+        self.count = total
+
+    def zscores(self, chunk: pd.DataFrame, lid: np.ndarray, clip: float = 3.0) -> pd.DataFrame:
+        """z_<column> block for `chunk`, with grouped_zscore's rules."""
+        nan_row = np.full((1, len(self.columns)), np.nan)
+        count = np.vstack([self.count, nan_row])[lid]
+        mean = np.vstack([self.mean, nan_row])[lid]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            std = np.sqrt(np.vstack([self.m2, nan_row])[lid] / (count - 1))
+            std[(count <= 1) | (std == 0)] = np.nan
+            z = (self._values(chunk) - mean) / std
+        z[np.isnan(z)] = 0.0
+        return pd.DataFrame(
+            np.clip(z, -clip, clip), index=chunk.index, columns=[f"z_{c}" for c in self.columns]
+        )
+
+
+class _RankCounter:
+    """Exact average ranks of fixed target values within a streamed population."""
+
+    def __init__(self, targets: pd.DataFrame):
+        self.columns = list(targets.columns)
+        self.targets = targets.to_numpy(dtype=float)
+        self.below = np.zeros_like(self.targets)
+        self.upto = np.zeros_like(self.targets)
+        self.n = np.zeros(len(self.columns))
+
+    def add(self, chunk: pd.DataFrame) -> None:
+        for j, c in enumerate(self.columns):
+            v = chunk[c].to_numpy(dtype=float)
+            v = np.sort(v[~np.isnan(v)])
+            self.below[:, j] += np.searchsorted(v, self.targets[:, j], side="left")
+            self.upto[:, j] += np.searchsorted(v, self.targets[:, j], side="right")
+            self.n[j] += len(v)
+
+    def percentiles(self) -> np.ndarray:
+        """As column_percentiles: ties averaged, NaN targets -> NaN."""
+        with np.errstate(divide="ignore", invalid="ignore"):
+            pct = (self.below + self.upto + 1) / 2 / self.n * 100
+        pct[np.isnan(self.targets)] = np.nan
+        return pct
+
+
+
+# CHUNKED PIPELINE
+
+
+def _role_chunks(ctx: _ContextStats, chunks, cfg, deps, sliders, z_moments=None, buy_moments=None):
+    """
+    Yield (scored role chunk, league ids) as far down the pipeline as the
+    available statistics allow: baseline only; then indices, Overall and
+    the buy components; then BuyScore.
+    """
+    ctx_metrics = [c[: -len("_ctx")] for c in deps if c.endswith("_ctx")]
+
+    for raw in chunks:
+        role = _role_mask(raw, cfg["positions"])
+        if not role.any():
+            continue
+        chunk, lid = ctx.attach(raw[role])
+        chunk = add_context_normalised_metrics(chunk, metrics=ctx_metrics, active=ctx.active)
+        chunk = role_frame(chunk, cfg["positions"], columns=deps)
+        chunk = compute_baseline(chunk, cfg["baseline"])
+
+        if z_moments is not None:
+            chunk = pd.concat([chunk, z_moments.zscores(chunk, lid)], axis=1)
+            chunk = compute_indices(chunk, cfg["indices"])
+            chunk = add_index_percentiles(chunk, cfg["indices"])
+            chunk = compute_overall(chunk, cfg["groups"], cfg["weights"], sliders)
+            chunk["Overall_pct_global"] = chunk["Overall_pct"]
+            chunk = add_buy_components(
+                chunk, np.append(ctx.league_minutes, np.nan)[lid]
+            )
+
+        if buy_moments is not None:
+            chunk = pd.concat([chunk, buy_moments.zscores(chunk, lid)], axis=1)
+            chunk["BuyScore"] = sum(w * chunk[f"z_{c}"] for c, w in BUY_WEIGHTS.items())
+
+        yield chunk, lid
+
+
+def run_model_chunked(
+    role: str,
+    *,
+    path: str = DEFAULT_PATH,
+    min_minutes: int | None = None,
+    budget_million: float | None = None,
+    top_k: int = 10,
+    chunk_rows: int = CHUNK_ROWS,
+    **sliders,
+) -> pd.DataFrame:
+    """
+    run_model(role, top_k=top_k, **sliders) for files too large to hold
+    in memory: the source is streamed in `chunk_rows` pieces over five
+    passes (see OUT-OF-CORE SCORING), so peak memory is bounded by the
+    chunk size plus per-team / per-league statistics and the shortlist.
+    A sixth pass reads the raw columns the role does not use, for the
+    shortlisted rows only.
+
+    Returns the top_k in-budget players, best first, with the columns and
+    values run_model returns (up to floating-point summation order).
+    """
+    if role not in ROLE_CONFIG:
+        raise ValueError(f"Unknown role: {role}")
+
+    cfg = ROLE_CONFIG[role]
+    min_minutes = min_minutes or cfg.get("min_minutes", DEFAULT_MINUTES)
+    budget_million = budget_million or DEFAULT_BUDGET
+
+    deps = role_dependencies(role)
+    columns = set(ID_COLUMNS) | set(TEAM_INPUT_COLUMNS)
+    columns |= {c[: -len("_ctx")] if c.endswith("_ctx") else c for c in deps}
+
+    def chunks():
+        for chunk in iter_player_data(path, chunk_rows, columns):
+            yield chunk[chunk["Minutes"] >= min_minutes]
+
+    # 1) Team / league context statistics
+    ctx = _ContextStats(cfg["positions"])
+    for chunk in chunks():
+        ctx.add(chunk)
+    ctx.finish()
+
+    def role_chunks(**moments):
+        return _role_chunks(ctx, chunks(), cfg, deps, sliders, **moments)
+
+    # 2) League moments of the z-scored index and group metrics
+    z_metrics = [m for weights in cfg["indices"].values() for m in weights]
+    z_moments = _LeagueMoments(dict.fromkeys(z_metrics + group_metrics(cfg["groups"])))
+    for chunk, lid in role_chunks():
+        z_moments.add(chunk, lid)
+
+    # 3) League moments of the BuyScore components
+    buy_moments = _LeagueMoments(BUY_WEIGHTS)
+    for chunk, lid in role_chunks(z_moments=z_moments):
+        buy_moments.add(chunk, lid)
+
+    # 4) BuyScore with a running top-K of in-budget players
+    best = None
+    for chunk, _ in role_chunks(z_moments=z_moments, buy_moments=buy_moments):
+        pool = chunk[chunk["Value_million"] <= budget_million]
+        best = pool if best is None else pd.concat([best, pool])
+        best = best.iloc[top_k_positions(best["BuyScore"].to_numpy(dtype=float), top_k)]
+    if best is None or best.empty:
+        return pd.DataFrame() if best is None else best
+
+    # 5) Exact percentiles of the shortlisted values
+    indices = [i for i in cfg["indices"] if i in best.columns]
+    metrics = group_metrics(cfg["groups"])
+    present = [m for m in metrics if m in best.columns]
+    role_ranks = _RankCounter(best[["Overall_adj"] + indices])
+    pool_ranks = _RankCounter(best[present])
+    for chunk, _ in role_chunks(z_moments=z_moments):
+        role_ranks.add(chunk)
+        pool_ranks.add(chunk[chunk["Value_million"] <= budget_million])
+
+    best = best.copy()
+    pct = role_ranks.percentiles()
+    best["Overall_pct"] = best["Overall_pct_global"] = pct[:, 0]
+    for j, idx_name in enumerate(indices, start=1):
+        best[idx_name.replace("_Index", "_pct")] = pct[:, j]
+
+    pizza = np.full((len(best), len(metrics)), 50.0)
+    pool_pct = pool_ranks.percentiles()
+    for j, m in enumerate(present):
+        col = pool_pct[:, j]
+        pizza[:, metrics.index(m)] = 100 - col if m in cfg["invert"] else col
+    best[[PCT_PREFIX + m for m in metrics]] = pizza
+
+    # 6) The raw columns the passes did not read, for the shortlist only
+    rest = [c for c in player_data_columns(path) if c not in best.columns]
+    if rest:
+        found = [
+            chunk.loc[chunk.index.intersection(best.index)]
+            for chunk in iter_player_data(path, chunk_rows, rest)
+        ]
+        best[rest] = pd.concat(found).reindex(best.index)
+
+    return best
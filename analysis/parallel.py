@@ -0,0 +1,118 @@
+"""
+Process pools shared by the sharded context stages and the batch CLI.
+
+Pools are never started with fork. The engine runs in multithreaded
+processes (warm-start threads, Streamlit sessions, HTTP request threads)
+that also hold pyarrow's thread pools and _CONTEXT_LOCK; a forked child
+inherits whatever locks another thread held at that moment and can
+deadlock on the first of them it touches. Forkserver (or spawn where
+that is unavailable) starts workers from a clean process instead.
+"""
+
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from .group_ops import grouped_zscore
+
+# Below this many rows the pool round trip (pickling each shard both
+# ways) costs more than the stages themselves, so work runs inline
+SHARD_MIN_ROWS = 50_000
+
+# Modules imported once by the forkserver, so its workers start warm
+PRELOAD_MODULES = ["analysis.model_engine", "analysis.sharded_context"]
+
+_POOLS: dict = {}   # workers -> ProcessPoolExecutor, kept for the process lifetime
+_POOLS_LOCK = threading.Lock()
+
+
+
+# POOLS
+
+
+def process_pool_context():
+    """Forkserver where available, else spawn; never fork (see module docstring)."""
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        ctx = multiprocessing.get_context("forkserver")
+        ctx.set_forkserver_preload(PRELOAD_MODULES)
+        return ctx
+    return multiprocessing.get_context("spawn")
+
+
+def shard_pool(workers: int) -> ProcessPoolExecutor:
+    """
+    A process pool of `workers` kept open across calls. Workers start
+    from a clean interpreter (see process_pool_context), which takes far
+    longer than one stage, so the engine reuses one pool per size rather
+    than starting one per stage.
+    """
+    with _POOLS_LOCK:
+        pool = _POOLS.get(workers)
+        if pool is None:
+            pool = _POOLS[workers] = ProcessPoolExecutor(
+                max_workers=workers, mp_context=process_pool_context()
+            )
+        return pool
+
+
+
+# LEAGUE SHARDS
+
+
+def shard_positions(codes: np.ndarray, n_groups: int, n_shards: int) -> list:
+    """
+    Split row positions into at most `n_shards` groups of whole groups
+    (leagues), balanced by row count: largest group first onto the
+    lightest shard. Rows with code -1 go to the first shard.
+    """
+    sizes = np.bincount(codes[codes >= 0], minlength=n_groups)
+
+    n_shards = max(1, min(n_shards, n_groups))
+    load = np.zeros(n_shards)
+    owner = np.empty(n_groups, dtype=np.int64)
+    for gid in np.argsort(-sizes, kind="stable"):
+        owner[gid] = np.argmin(load)
+        load[owner[gid]] += sizes[gid]
+
+    shard = np.where(codes >= 0, owner[codes], 0) if n_groups else np.zeros(len(codes), int)
+    order = np.argsort(shard, kind="stable")
+    bounds = np.searchsorted(shard[order], np.arange(1, n_shards))
+    return [p for p in np.split(order, bounds) if len(p)]
+
+
+
+# SHARDED Z-SCORES
+
+
+def sharded_grouped_zscore(
+    values: np.ndarray,
+    codes: np.ndarray,
+    n_groups: int,
+    clip: float | None = 3.0,
+    workers: int = 1,
+) -> np.ndarray:
+    """
+    grouped_zscore with the groups split over `workers` processes. Each
+    shard holds whole groups and keeps its rows in order, so every group
+    is reduced over the same values in the same order: the result is
+    identical to the serial kernel. Small inputs run inline.
+    """
+    values = np.asarray(values, dtype=float)
+    shards = (
+        shard_positions(codes, n_groups, workers)
+        if workers > 1 and len(values) >= SHARD_MIN_ROWS else []
+    )
+    if len(shards) <= 1:
+        return grouped_zscore(values, codes, n_groups, clip=clip)
+
+    parts = shard_pool(workers).map(
+        grouped_zscore,
+        [values[pos] for pos in shards], [codes[pos] for pos in shards],
+        [n_groups] * len(shards), [clip] * len(shards),
+    )
+    z = np.empty_like(values)
+    for pos, part in zip(shards, parts):
+        z[pos] = part
+    return z
@@ -0,0 +1,79 @@
+import weakref
+
+import numpy as np
+import pandas as pd
+
+
+
+# PERCENTILE INDEX
+
+
+class PercentileIndex:
+    """
+    Sorted copy of one column's non-missing values, used to answer
+    percentile queries by binary search instead of re-ranking.
+
+    Percentiles follow Series.rank(pct=True) * 100 exactly: ties share
+    their average rank, NaN values are excluded from the population and
+    map to NaN. Building costs one sort; each lookup is O(log n).
+    """
+
+    __slots__ = ("sorted", "n")
+
+    def __init__(self, values):
+        values = np.asarray(values, dtype=float)
+        self.sorted = np.sort(values[~np.isnan(values)])
+        self.n = len(self.sorted)
+
+    def __len__(self):
+        return self.n
+
+    def rank(self, x):
+        """Average 1-based rank of `x` (scalar or array) in the population."""
+        x = np.asarray(x, dtype=float)
+        lo = np.searchsorted(self.sorted, x, side="left")
+        hi = np.searchsorted(self.sorted, x, side="right")
+        return np.where(np.isnan(x), np.nan, (lo + hi + 1) / 2)
+
+    def percentile(self, x):
+        """
+        Percentile (0-100] of `x` (scalar or array) within the population.
+        A scalar in gives a float out.
+        """
+        if self.n == 0:
+            pct = np.full(np.shape(x), np.nan)
+        else:
+            pct = self.rank(x) / self.n * 100
+        return float(pct) if np.ndim(pct) == 0 else pct
+
+
+def column_percentiles(values) -> np.ndarray:
+    """Percentile of every value in `values` within `values` itself."""
+    values = np.asarray(values, dtype=float)
+    return np.asarray(PercentileIndex(values).percentile(values), dtype=float)
+
+
+
+# PER-FRAME CACHE
+
+
+# id(frame) -> {column: PercentileIndex}; entries are dropped when their
+# frame is garbage-collected (DataFrames are unhashable, so no WeakKeyDict)
+_FRAME_INDEXES: dict = {}
+
+
+def percentile_index(df: pd.DataFrame, col: str) -> PercentileIndex:
+    """
+    PercentileIndex of df[col], built on first use and reused for later
+    lookups on the same frame (e.g. one pizza chart per shortlisted
+    player). The frame is treated as read-only once indexed.
+    """
+    key = id(df)
+    per_frame = _FRAME_INDEXES.get(key)
+    if per_frame is None:
+        per_frame = _FRAME_INDEXES[key] = {}
+        weakref.finalize(df, _FRAME_INDEXES.pop, key, None)
+
+    if col not in per_frame:
+        per_frame[col] = PercentileIndex(df[col].to_numpy(dtype=float))
+    return per_frame[col]
@@ -6,6 +6,8 @@
 import plotly.graph_objects as go
 import streamlit.components.v1 as components
 
+from .percentiles import percentile_index
+
 
 # --------------------------------------------------
 # DARK CUSTOM COLOR PALETTE (used for category groups)
@@ -152,16 +154,21 @@ def pizza_plot_combined(row, df, groups, invert):
 
     metric_ids = list(range(1, len(all_metrics) + 1))
 
-    # Percentiles
+    # Percentiles: read the pct_<metric> columns the pipeline precomputed
+    # (invert already applied); otherwise rank against `df`
     values = []
     for m in all_metrics:
 
+        if f"pct_{m}" in row.index:
+            values.append(row[f"pct_{m}"])
+            continue
+
         if m not in df.columns:
             values.append(50)
             continue
 
-        pct = df[m].rank(pct=True) * 100
-        v = pct.loc[row.name]
+        # sorted once per frame + metric, then a binary-search lookup
+        v = percentile_index(df, m).percentile(row[m])
 
         if m in invert:
             v = 100 - v
@@ -0,0 +1,378 @@
+"""
+Local HTTP scoring service over a preloaded, context-normalised dataset.
+
+Usage:
+    python -m analysis.service --port 8765
+    python -m analysis.service --path analysis/Final_Task_Data.csv --host 0.0.0.0
+
+Endpoints (GET, JSON responses):
+    /health                         status and data file
+    /top?role=winger&top_k=5        k best in-budget players by BuyScore
+    /score?role=winger              the whole in-budget pool, best first
+    /player?id=1234[&role=winger]   one player's row, plus their role
+                                    scores and BuyScore rank if role given
+    /stats                          request counts, latency percentiles
+                                    and coalesced requests per endpoint
+
+/top and /score take budget, min_minutes and any ROLE_CONFIG group name
+as a slider, e.g. /top?role=striker&budget=5&Goal%20Threat=1.5.
+
+Requests are served on threads over the engine's shared caches (context
+frame, role states, results), warmed at start-up. Identical requests
+that arrive while one is being computed wait for that result instead of
+computing it again.
+"""
+
+import argparse
+import json
+import threading
+import time
+from collections import OrderedDict, defaultdict, deque
+from concurrent.futures import Future, wait
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+import pandas as pd
+
+from .model_config import ROLE_CONFIG
+from .model_engine import (
+    CONTEXT_CACHE_SIZE,
+    DEFAULT_MINUTES,
+    DEFAULT_PATH,
+    SHORTLIST_COLUMNS,
+    TEAM_CONTEXT_COLUMNS,
+    cached_run_model,
+    context_key,
+    get_context_frame,
+    warm_start,
+)
+
+DEFAULT_PORT = 8765
+DEFAULT_TOP_K = 10
+
+# Latencies kept per endpoint for the percentiles in /stats
+LATENCY_WINDOW = 10_000
+
+# Endpoints whose identical in-flight requests are coalesced
+COALESCED_ENDPOINTS = {"/top", "/score", "/player"}
+
+# Query parameters that are not sliders
+RESERVED_PARAMS = {"role", "budget", "min_minutes", "top_k", "id"}
+
+PLAYER_COLUMNS = ["ID", "Team", "League", "Age", "Minutes", "Position_1",
+                  "Position_2", "Value", "Value_million"] + TEAM_CONTEXT_COLUMNS
+
+
+
+# IN-FLIGHT COALESCING
+
+
+class Coalescer:
+    """
+    Runs fn() once per key at a time: callers arriving with a key that
+    is already being computed wait for (and share) that result.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = {}
+        self.coalesced = defaultdict(int)
+
+    def run(self, key, fn):
+        with self._lock:
+            future = self._pending.get(key)
+            owner = future is None
+            if owner:
+                future = self._pending[key] = Future()
+            else:
+                self.coalesced[key[0]] += 1
+
+        if not owner:
+            return future.result()
+
+        try:
+            result = fn()
+            future.set_result(result)
+            return result
+        except BaseException as exc:
+            future.set_exception(exc)
+            raise
+        finally:
+            with self._lock:
+                del self._pending[key]
+
+
+
+# LATENCY STATISTICS
+
+
+class LatencyStats:
+    """Rolling per-endpoint latencies (seconds) and error counts."""
+
+    def __init__(self, window: int = LATENCY_WINDOW):
+        self._lock = threading.Lock()
+        self._latency = defaultdict(lambda: deque(maxlen=window))
+        self._count = defaultdict(int)
+        self._errors = defaultdict(int)
+
+    def record(self, endpoint: str, seconds: float, ok: bool) -> None:
+        with self._lock:
+            self._latency[endpoint].append(seconds)
+            self._count[endpoint] += 1
+            if not ok:
+                self._errors[endpoint] += 1
+
+    def summary(self) -> dict:
+        """{endpoint: {requests, errors, p50_ms, p90_ms, p99_ms, max_ms}}."""
+        with self._lock:
+            snapshot = {e: np.array(v) for e, v in self._latency.items()}
+            counts, errors = dict(self._count), dict(self._errors)
+
+        out = {}
+        for endpoint, lat in snapshot.items():
+            p50, p90, p99 = np.percentile(lat, [50, 90, 99]) * 1000
+            out[endpoint] = {
+                "requests": counts[endpoint],
+                "errors": errors.get(endpoint, 0),
+                "p50_ms": p50, "p90_ms": p90, "p99_ms": p99,
+                "max_ms": lat.max() * 1000,
+            }
+        return out
+
+
+
+# SCORING SERVICE
+
+
+class ScoringService:
+    """
+    The service state behind the HTTP handler: data file, coalescer and
+    latency statistics. Scoring goes through cached_run_model, so repeat
+    queries are served from the shared result cache.
+    """
+
+    def __init__(self, path: str = DEFAULT_PATH, min_minutes: int = DEFAULT_MINUTES):
+        self.path = path
+        self.min_minutes = min_minutes
+        self.coalescer = Coalescer()
+        self.stats = LatencyStats()
+        # context key -> Index of str(ID) in context row order; an LRU the
+        # size of the engine's context cache, shared by request threads
+        self._id_index = OrderedDict()
+        self._id_lock = threading.Lock()
+
+    def warm(self) -> None:
+        """Build the context and score every role at neutral sliders."""
+        roles = [r for r in ROLE_CONFIG if not r.startswith("__")]
+        futures = warm_start(roles, path=self.path, min_minutes=self.min_minutes)
+        wait(list(futures.values()))
+        for f in futures.values():
+            f.result()
+
+    # ---- request parsing ----
+
+    def _role(self, params: dict) -> str:
+        role = params.get("role")
+        if role not in ROLE_CONFIG or role.startswith("__"):
+            raise ValueError(f"Unknown or missing role: {role}")
+        return role
+
+    def _query(self, params: dict) -> dict:
+        """run_model keyword arguments from query parameters."""
+        try:
+            sliders = {k: float(v) for k, v in params.items() if k not in RESERVED_PARAMS}
+            query = {
+                "path": self.path,
+                "min_minutes": int(params.get("min_minutes", self.min_minutes)),
+                "budget_million": float(params["budget"]) if "budget" in params else None,
+            }
+        except ValueError as exc:
+            raise ValueError(f"Bad query parameter: {exc}") from None
+        return {**query, **sliders}
+
+    def _player_ids(self, key: tuple, ctx: pd.DataFrame) -> pd.Index:
+        """str(ID) of every row of the context frame `ctx` cached under `key`."""
+        with self._id_lock:
+            ids = self._id_index.get(key)
+            if ids is not None:
+                self._id_index.move_to_end(key)
+                return ids
+
+        ids = pd.Index(ctx["ID"].astype(str))
+        with self._id_lock:
+            self._id_index[key] = ids
+            self._id_index.move_to_end(key)
+            while len(self._id_index) > CONTEXT_CACHE_SIZE:
+                self._id_index.popitem(last=False)
+        return ids
+
+    # ---- endpoints ----
+
+    def top(self, params: dict) -> str:
+        role = self._role(params)
+        top_k = int(params.get("top_k", DEFAULT_TOP_K))
+        df = cached_run_model(role, top_k=top_k, **self._query(params))
+        return _players_json(role, df, ROLE_CONFIG[role]["columns"])
+
+    def score(self, params: dict) -> str:
+        role = self._role(params)
+        df = cached_run_model(role, **self._query(params))
+        df = df.sort_values("BuyScore", ascending=False, kind="stable")
+        return _players_json(role, df, ROLE_CONFIG[role]["columns"])
+
+    def player(self, params: dict) -> str:
+        if "id" not in params:
+            raise ValueError("Missing id")
+        query = self._query({k: v for k, v in params.items() if k != "role"})
+        ctx = get_context_frame(self.path, query["min_minutes"], columns=[])
+
+        ids = self._player_ids(context_key(self.path, query["min_minutes"]), ctx)
+        rows = ctx.iloc[np.flatnonzero(ids == params["id"])]
+        if rows.empty:
+            raise LookupError(f"No player with id {params['id']}")
+
+        body = {"player": _records(rows, PLAYER_COLUMNS)[0]}
+        if "role" in params:
+            role = self._role(params)
+            pool = cached_run_model(role, **query)
+            match = pool[pool["ID"].astype(str) == params["id"]]
+            body["role"] = role
+            if match.empty:
+                body["scores"] = None
+            else:
+                buy = match["BuyScore"].iloc[0]
+                body["scores"] = _records(match, ROLE_CONFIG[role]["columns"])[0]
+                body["rank"] = int((pool["BuyScore"] > buy).sum()) + 1
+                body["pool"] = len(pool)
+        return json.dumps(body)
+
+    def health(self, params: dict) -> str:
+        return json.dumps({"status": "ok", "path": self.path, "min_minutes": self.min_minutes})
+
+    def stats_json(self, params: dict) -> str:
+        return json.dumps({
+            "latency": self.stats.summary(),
+            "coalesced": dict(self.coalescer.coalesced),
+        })
+
+    @property
+    def endpoints(self) -> dict:
+        return {
+            "/top": self.top, "/score": self.score, "/player": self.player,
+            "/health": self.health, "/stats": self.stats_json,
+        }
+
+    def handle(self, endpoint: str, params: dict) -> str:
+        """JSON body for one request; identical in-flight requests share it."""
+        handlers = self.endpoints
+        if endpoint not in handlers:
+            raise LookupError(f"Unknown endpoint: {endpoint}")
+        if endpoint not in COALESCED_ENDPOINTS:
+            return handlers[endpoint](params)
+
+        key = (endpoint, tuple(sorted(params.items())))
+        return self.coalescer.run(key, lambda: handlers[endpoint](params))
+
+
+def _records(df: pd.DataFrame, columns) -> list:
+    """Rows as JSON-safe dicts (NaN -> null), restricted to `columns`."""
+    cols = [c for c in dict.fromkeys(columns) if c in df.columns]
+    return json.loads(df[cols].to_json(orient="records"))
+
+
+def _players_json(role: str, df: pd.DataFrame, columns) -> str:
+    cols = [c for c in dict.fromkeys(SHORTLIST_COLUMNS + list(columns)) if c in df.columns]
+    return (
+        '{"role": ' + json.dumps(role) + ', "count": ' + str(len(df))
+        + ', "players": ' + df[cols].to_json(orient="records") + "}"
+    )
+
+
+
+# HTTP
+
+
+class _Handler(BaseHTTPRequestHandler):
+    service: ScoringService = None
+    verbose = False
+
+    def do_GET(self):
+        t0 = time.perf_counter()
+        url = urlparse(self.path)
+        params = {k: v[-1] for k, v in parse_qs(url.query).items()}
+
+        try:
+            status, body = 200, self.service.handle(url.path, params)
+        except LookupError as exc:
+            status, body = 404, json.dumps({"error": str(exc)})
+        except ValueError as exc:
+            status, body = 400, json.dumps({"error": str(exc)})
+        except Exception as exc:  # keep serving; report the failure
+            status, body = 500, json.dumps({"error": f"{type(exc).__name__}: {exc}"})
+
+        data = body.encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+        # Unknown paths share one entry so the stats stay bounded
+        endpoint = url.path if url.path in self.service.endpoints else "other"
+        if endpoint != "/stats":
+            self.service.stats.record(endpoint, time.perf_counter() - t0, status == 200)
+
+    def log_message(self, format, *args):
+        if self.verbose:
+            super().log_message(format, *args)
+
+
+def make_server(
+    service: ScoringService,
+    host: str = "127.0.0.1",
+    port: int = DEFAULT_PORT,
+    verbose: bool = False,
+) -> ThreadingHTTPServer:
+    """
+    A threaded HTTP server for `service` (not yet serving; call
+    serve_forever). port=0 picks a free port: see server.server_port.
+    """
+    handler = type("Handler", (_Handler,), {"service": service, "verbose": verbose})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+
+# CLI
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local BuyScore HTTP service")
+    parser.add_argument("--path", default=DEFAULT_PATH, help="Player-season CSV")
+    parser.add_argument("--min-minutes", type=int, default=DEFAULT_MINUTES)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--no-warm", action="store_true", help="Skip the start-up warm-up")
+    parser.add_argument("--verbose", action="store_true", help="Log every request")
+    args = parser.parse_args(argv)
+
+    service = ScoringService(args.path, args.min_minutes)
+    if not args.no_warm:
+        t0 = time.perf_counter()
+        service.warm()
+        print(f"Warmed {args.path} in {time.perf_counter() - t0:.1f} s")
+
+    server = make_server(service, args.host, args.port, args.verbose)
+    print(f"Serving on http://{args.host}:{server.server_port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,221 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from .model_engine import (
+    CONTEXT_COLUMNS,
+    CONTEXT_FAMILIES,
+    LEAGUE_MEANS,
+    _attach_finishing_diff,
+    add_context_normalised_metrics,
+    add_league_context_means,
+    add_team_context_metrics,
+    context_active_families,
+    zscore_once,
+)
+from .parallel import SHARD_MIN_ROWS, shard_pool, shard_positions
+
+
+
+# LEAGUE SHARDS
+#
+# Team context, league means, *_ctx factors and z-scores are all computed
+# within a league, so a frame split by League can be processed shard by
+# shard and concatenated back. The one dataset-wide step is the spread
+# check of _context_factor (std of the team driver over every row): each
+# shard reports (count, mean, M2) of the drivers, the parent merges them
+# and drops the families the serial path would have skipped.
+
+
+def league_shards(df: pd.DataFrame, n_shards: int) -> list:
+    """
+    Split row positions into at most `n_shards` groups of whole leagues,
+    balanced by row count (largest league first onto the lightest shard).
+    Rows without a League go to the first shard.
+    """
+    codes, leagues = pd.factorize(df["League"])
+    return shard_positions(codes, len(leagues), n_shards)
+
+
+def _driver_moments(df: pd.DataFrame) -> dict:
+    """{family: (count, mean, M2)} of each team driver over the rows of df."""
+    out = {}
+    for fam, (_, team_col, _) in CONTEXT_FAMILIES.items():
+        v = df[team_col].to_numpy(dtype=float)
+        v = v[~np.isnan(v)]
+        mean = v.mean() if len(v) else 0.0
+        out[fam] = (len(v), mean, ((v - mean) ** 2).sum())
+    return out
+
+
+def _active_families(moments: list, min_std: float = 1e-6) -> dict:
+    """
+    Merge per-shard driver moments (Chan et al.) and apply the
+    nanstd(ddof=1) >= min_std check of _context_factor.
+    """
+    active = {}
+    for fam in CONTEXT_FAMILIES:
+        n, mean, m2 = 0, 0.0, 0.0
+        for shard in moments:
+            n_b, mean_b, m2_b = shard[fam]
+            if not n_b:
+                continue
+            delta = mean_b - mean
+            total = n + n_b
+            m2 += m2_b + delta * delta * n * n_b / total
+            mean += delta * n_b / total
+            n = total
+        # one row or fewer: std is NaN and the serial check does not fire
+        active[fam] = n <= 1 or not np.sqrt(m2 / (n - 1)) < min_std
+    return active
+
+
+def _context_shard(df: pd.DataFrame, metrics, zscore_metrics) -> tuple:
+    """
+    Run the context stages on one shard, with every family normalised.
+    Returns (the new columns only, driver moments).
+    """
+    out = add_team_context_metrics(df)
+    moments = _driver_moments(out)
+    out = add_context_normalised_metrics(
+        out, metrics=metrics, active={fam: True for fam in CONTEXT_FAMILIES}
+    )
+    if zscore_metrics:
+        out = zscore_once(out, zscore_metrics, workers=1)
+    return out[[c for c in out.columns if c not in df.columns]], moments
+
+
+def _normalise_shard(df: pd.DataFrame, metrics, active: dict) -> pd.DataFrame:
+    """The *_ctx columns of one shard, with the dataset-wide `active` families."""
+    before = set(df.columns)
+    # The stage adds its columns in place: work on a shallow copy
+    out = add_context_normalised_metrics(df.copy(deep=False), metrics=metrics, active=active)
+    return out[[c for c in out.columns if c not in before]]
+
+
+def _map_shards(fn, frames: list, args: tuple, workers: int, use_processes: bool) -> list:
+    """fn(frame, *args) for every shard frame, in a process or thread pool."""
+    columns = [[a] * len(frames) for a in args]
+    if use_processes:
+        return list(shard_pool(workers).map(fn, frames, *columns))
+    with ThreadPoolExecutor(max_workers=min(workers, len(frames))) as ex:
+        return list(ex.map(fn, frames, *columns))
+
+
+
+# SHARDED EXECUTION
+
+
+def add_context_sharded(
+    df: pd.DataFrame,
+    metrics=None,
+    zscore_metrics=(),
+    workers: int | None = None,
+    use_processes: bool = True,
+) -> pd.DataFrame:
+    """
+    add_team_context_metrics -> add_context_normalised_metrics(metrics)
+    -> zscore_once(zscore_metrics), run per league shard in a pool.
+
+    `workers` defaults to the CPU count; shards are whole leagues balanced
+    by row count. Processes (a shared forkserver pool, see
+    analysis.parallel) sidestep the GIL at the cost of pickling each
+    shard both ways; threads share memory but only overlap where NumPy
+    and pandas release the GIL. Small frames or one worker run inline.
+
+    Expects a frame without context columns yet (as loaded). Returns the
+    same columns and values as the serial stages, in the input's row order.
+    build_context_frame (and so get_context_frame / run_model) routes
+    through here when CONTEXT_WORKERS > 1.
+    """
+    if "League" not in df.columns:
+        raise ValueError("League column is required for sharded context.")
+
+    workers = workers or os.cpu_count() or 1
+    shards = league_shards(df, workers) if len(df) >= SHARD_MIN_ROWS else []
+
+    # Workers get only the columns the stages read and send back only the
+    # columns they add, which keeps pickling to a minimum
+    needed = set(CONTEXT_COLUMNS) | set(zscore_metrics)
+    inputs = df[[c for c in df.columns if c in needed]]
+
+    if len(shards) > 1:
+        results = _map_shards(
+            _context_shard, [inputs.iloc[pos] for pos in shards],
+            (metrics, zscore_metrics), workers, use_processes,
+        )
+        added = pd.concat([r[0] for r in results])
+        added = added.iloc[np.argsort(np.concatenate(shards), kind="stable")]
+    else:
+        results = [_context_shard(inputs, metrics, zscore_metrics)]
+        added = results[0][0]
+
+    out = pd.concat([df, added], axis=1)
+
+    # Families whose driver has no dataset-wide spread are no-ops serially:
+    # drop their *_ctx columns and zero their z-scores
+    active = _active_families([r[1] for r in results])
+    dropped = [
+        m + "_ctx"
+        for fam, (fam_metrics, _, _) in CONTEXT_FAMILIES.items()
+        if not active[fam]
+        for m in fam_metrics
+        if m + "_ctx" in out.columns and m + "_ctx" not in df.columns
+    ]
+    if {"Np_xg_ctx", "Np_goals_ctx"} & set(dropped) and "Actual_vs_xG_ctx" not in df.columns:
+        dropped.append("Actual_vs_xG_ctx")
+    if dropped:
+        out = out.drop(columns=dropped)
+        zeroed = [f"z_{c}" for c in dropped if f"z_{c}" in out.columns]
+        out[zeroed] = 0.0
+
+    return out
+
+
+def add_context_normalised_sharded(
+    df: pd.DataFrame,
+    metrics=None,
+    workers: int | None = None,
+    use_processes: bool = True,
+) -> pd.DataFrame:
+    """
+    add_context_normalised_metrics(df, metrics) per league shard in a
+    pool, for a frame that already carries team context (as the shared
+    context frame does). The spread check runs once over the whole frame
+    and every shard uses its outcome, so the *_ctx columns match the
+    serial stage. materialise_columns routes through here when
+    CONTEXT_WORKERS > 1.
+    """
+    if "League" not in df.columns:
+        raise ValueError("League column is required for sharded context.")
+
+    workers = workers or os.cpu_count() or 1
+    shards = league_shards(df, workers) if len(df) >= SHARD_MIN_ROWS else []
+    if len(shards) <= 1:
+        return add_context_normalised_metrics(df, metrics=metrics)
+
+    # League means are whole-frame columns: add them here, not per shard
+    if any(t in df.columns and lg not in df.columns for lg, t in LEAGUE_MEANS.items()):
+        df = add_league_context_means(df)
+
+    wanted = None if metrics is None else set(metrics)
+    needed = {"League"} | set(LEAGUE_MEANS) | set(LEAGUE_MEANS.values())
+    needed |= {
+        m for fam_metrics, _, _ in CONTEXT_FAMILIES.values()
+        for m in fam_metrics if wanted is None or m in wanted
+    }
+    inputs = df[[c for c in df.columns if c in needed]]
+
+    added = pd.concat(_map_shards(
+        _normalise_shard, [inputs.iloc[pos] for pos in shards],
+        (metrics, context_active_families(df)), workers, use_processes,
+    ))
+    added = added.iloc[np.argsort(np.concatenate(shards), kind="stable")]
+
+    stale = [c for c in added.columns if c in df.columns]
+    out = pd.concat([df.drop(columns=stale), added], axis=1)
+
+    # Refreshed last, as the serial stage does, whichever shard inputs it had
+    return _attach_finishing_diff(out)
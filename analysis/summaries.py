@@ -93,7 +93,7 @@ def team_style_description(row: pd.Series, league_df: pd.DataFrame | None = None
             agg_dict = {v: "mean" for v in team_group_cols.values() if v in lg.columns}
 
             if agg_dict:
-                team_group = lg.groupby("Team", as_index=False).agg(agg_dict)
+                team_group = lg.groupby("Team", as_index=False, observed=True).agg(agg_dict)
                 num_teams = len(team_group)
 
                 def _rank_metric(col_name: str) -> int | None:
@@ -0,0 +1,286 @@
+"""
+Synthetic player-season data for benchmarks and load tests.
+
+Frames carry every column the engine reads (model_columns(): identity,
+market value, team-context inputs and each role's baseline metrics) in
+the same formats as the real file, so they can be written to CSV and
+fed through load_data / run_model unchanged.
+"""
+
+import numpy as np
+import pandas as pd
+
+from .model_engine import TEAM_INPUT_COLUMNS, model_columns
+from .utils import LEAGUE_MULTIPLIERS
+
+
+
+# DISTRIBUTIONS
+
+
+SEASON_MINUTES = 3420
+
+# Share of a squad listed at each primary position
+POSITION_WEIGHTS = {
+    "Goalkeeper": 0.08,
+    "Centre Back": 0.08,
+    "Left Centre Back": 0.05,
+    "Right Centre Back": 0.05,
+    "Left Back": 0.05,
+    "Right Back": 0.05,
+    "Left Wing Back": 0.02,
+    "Right Wing Back": 0.02,
+    "Centre Defensive Midfielder": 0.03,
+    "Left Defensive Midfielder": 0.025,
+    "Right Defensive Midfielder": 0.025,
+    "Defensive Midfielder": 0.02,
+    "Left Centre Midfielder": 0.035,
+    "Right Centre Midfielder": 0.035,
+    "Central Midfielder": 0.02,
+    "Centre Midfielder": 0.01,
+    "Centre Attacking Midfielder": 0.03,
+    "Left Attacking Midfielder": 0.01,
+    "Right Attacking Midfielder": 0.01,
+    "Attacking Midfielder": 0.01,
+    "Left Midfielder": 0.02,
+    "Right Midfielder": 0.02,
+    "Left Winger": 0.05,
+    "Right Winger": 0.05,
+    "Left Wing": 0.01,
+    "Centre Forward": 0.07,
+    "Left Centre Forward": 0.035,
+    "Right Centre Forward": 0.035,
+}
+
+# Share of players listed with a secondary position
+SECONDARY_SHARE = 0.45
+
+# Line of each position: 0 goalkeeper, 1 defence, 2 midfield, 3 wide, 4 attack
+_LINES = {
+    "Goalkeeper": 0,
+    "Back": 1,
+    "Defensive Midfielder": 2,
+    "Centre Midfielder": 2,
+    "Central Midfielder": 2,
+    "Attacking Midfielder": 2,
+    "Wing": 3,
+    "Left Midfielder": 3,
+    "Right Midfielder": 3,
+    "Forward": 4,
+}
+
+# Per-line multiplier on attacking / defensive volume metrics
+_ATTACK_BY_LINE = np.array([0.02, 0.3, 0.7, 1.1, 1.5])
+_DEFENCE_BY_LINE = np.array([0.1, 1.4, 1.2, 0.8, 0.5])
+
+ATTACKING_METRICS = {
+    "Np_xg", "Np_goals", "Np_shots", "Touches_in_box", "Op_xa", "Assists",
+    "Key_passes", "Op_key_passes", "Op_passes_into_box", "Passes_inside_box",
+    "Through_balls", "Crosses_completed", "Dribbles_attempts",
+    "Dribbles_successful", "Failed_dribbles", "Xgchain", "Op_xgchain",
+    "Sp_key_passes", "Sp_pass_into_box", "Pass_and_carry_last_3rd",
+}
+DEFENSIVE_METRICS = {
+    "Tackles", "Interceptions", "Padj_tackles", "Padj_interceptions",
+    "Defensive_actions", "Ball_recoveries", "Aerial_won", "Errors",
+}
+GOALKEEPER_METRICS = {
+    "Save_percentage", "Xsave_percentage", "Goals_saved_above_avg",
+    "Shots_on_target_faced", "Gk_defesive_action_distance",
+}
+
+# Typical per-90 mean of volume metrics (others default to 1.0)
+METRIC_MEANS = {
+    "Op_passes": 38.0, "Carries": 26.0, "Pressures": 16.0,
+    "Padj_pressures": 17.0, "Opp_half_pressures": 7.0,
+    "Successful_pressures": 4.5, "Counterpressures": 4.0,
+    "Opp_half_counterpressures": 2.0, "Successful_counterpressures": 1.0,
+    "Defensive_actions": 9.0, "Ball_recoveries": 5.0, "Tackles": 1.6,
+    "Padj_tackles": 1.8, "Interceptions": 1.1, "Padj_interceptions": 1.2,
+    "Turnovers": 2.2, "Dispossessed": 1.1, "Aerial_won": 1.4,
+    "Op_last_3rd_passes": 6.0, "Pass_and_carry_last_3rd": 7.0,
+    "Touches_in_box": 2.5, "Dribbles_attempts": 1.8,
+    "Dribbles_successful": 0.9, "Failed_dribbles": 0.9, "Key_passes": 1.0,
+    "Op_key_passes": 0.85, "Sp_key_passes": 0.15, "Op_passes_into_box": 1.0,
+    "Passes_inside_box": 0.6, "Crosses_completed": 0.35, "Sp_pass_into_box": 0.3,
+    "Through_balls": 0.15, "Np_shots": 1.4, "Np_xg": 0.15, "Np_goals": 0.14,
+    "Np_xg_faced": 1.2, "Op_xa": 0.09, "Assists": 0.1, "Xgchain": 0.35,
+    "Op_xgchain": 0.3, "Xgbuildup": 0.2, "Op_xgbuildup": 0.18,
+    "Xgchain_per_possession": 0.02, "Op_xgchain_per_possession": 0.018,
+    "Xgbuildup_per_possession": 0.012, "Op_xgbuildup_per_possession": 0.011,
+    "Np_xg_per_shot": 0.1, "Goal_conversion": 0.1, "Errors": 0.05,
+    "Carry_length": 9.0, "Pressing_distance": 30.0,
+    "Successful_pass_length": 18.0, "Shots_on_target_faced": 3.5,
+    "Goals_saved_above_avg": 0.0, "Gk_defesive_action_distance": 12.0,
+}
+
+# Team-style columns: every player's value scales with their team's style
+_TEAM_STYLE = {"Op_passes": 0.18, "Pressures": 0.15, "Turnovers": 0.12, "Np_xg": 0.25}
+
+MISSING_SHARE = 0.01
+
+# Never missing: one NaN makes a team's minute-weighted mean NaN (as with
+# np.average), so at large sizes nearly every team would lose its context
+COMPLETE_COLUMNS = set(TEAM_INPUT_COLUMNS)
+
+
+
+# GENERATOR
+
+
+def _position_line(position: str) -> int:
+    for key, line in _LINES.items():
+        if key in position:
+            return line
+    return 2
+
+
+def _league_names(n_leagues: int) -> list:
+    """Configured league names first, then numbered lower-tier leagues."""
+    names = [lg for lg in LEAGUE_MULTIPLIERS if lg != "DEFAULT"]
+    return (names + [f"League {i}" for i in range(len(names), n_leagues)])[:n_leagues]
+
+
+def _format_values(millions: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+    """
+    Market values as the mixed strings of the source file: '£3.2m',
+    '€500k', '1,500k', '2000000', '0.8M', '£750K' and missing.
+    """
+    codes, uniques = pd.factorize(millions)
+    style = rng.integers(0, 6, len(uniques))
+
+    text = []
+    for m, s in zip(uniques, style):
+        if s == 0:
+            text.append(f"£{m:g}m")
+        elif s == 1:
+            text.append(f"€{m * 1000:.0f}k")
+        elif s == 2:
+            text.append(f"{m * 1000:,.0f}k")
+        elif s == 3:
+            text.append(f"{m * 1_000_000:.0f}")
+        elif s == 4:
+            text.append(f"{m:g}M")
+        else:
+            text.append(f"£{m * 1000:.0f}K")
+
+    out = np.asarray(text, dtype=object)[codes]
+    out[rng.random(len(out)) < 0.05] = np.nan
+    return out
+
+
+def synthetic_players(
+    n_rows: int,
+    n_leagues: int | None = None,
+    teams_per_league: int = 18,
+    seed: int = 0,
+) -> pd.DataFrame:
+    """
+    A player-season frame of `n_rows` rows with every model column.
+
+    Leagues default to the configured LEAGUE_MULTIPLIERS names and vary in
+    size; each team has its own style (possession, pressing, tempo, xG)
+    that shifts its players' metrics, which gives the context stages real
+    spread to normalise. Positions follow a typical squad make-up, metrics
+    scale with the position's line, goalkeeper metrics are only set for
+    goalkeepers, and about 1% of metric values are missing (outside the
+    team-context inputs, see COMPLETE_COLUMNS).
+    """
+    rng = np.random.default_rng(seed)
+    leagues = _league_names(n_leagues or len(LEAGUE_MULTIPLIERS) - 1)
+
+    # League sizes vary by about +-30%; teams within a league less so
+    league_share = rng.dirichlet(np.full(len(leagues), 12.0))
+    league = rng.choice(len(leagues), n_rows, p=league_share)
+    team_share = rng.dirichlet(np.full(teams_per_league, 40.0), len(leagues))
+    team_in_league = (
+        rng.random(n_rows)[:, None] > team_share.cumsum(axis=1)[league]
+    ).sum(axis=1).clip(max=teams_per_league - 1)
+    team = league * teams_per_league + team_in_league
+
+    league_names = np.asarray(leagues, dtype=object)
+    team_names = np.asarray(
+        [f"{lg} FC {t + 1}" for lg in leagues for t in range(teams_per_league)],
+        dtype=object,
+    )
+
+    positions = list(POSITION_WEIGHTS)
+    weights = np.fromiter(POSITION_WEIGHTS.values(), float)
+    pos1 = rng.choice(len(positions), n_rows, p=weights / weights.sum())
+    lines = np.array([_position_line(p) for p in positions])
+
+    # Secondary positions come from the same line where possible
+    pos2 = rng.choice(len(positions), n_rows, p=weights / weights.sum())
+    same_line = [np.flatnonzero(lines == lines[i]) for i in range(len(positions))]
+    neighbour = np.array([rng.choice(same_line[p]) for p in range(len(positions))])
+    pos2 = np.where(rng.random(n_rows) < 0.7, neighbour[pos1], pos2)
+    has_pos2 = (rng.random(n_rows) < SECONDARY_SHARE) & (pos2 != pos1)
+    position_names = np.asarray(positions, dtype=object)
+    line = lines[pos1]
+
+    age = np.clip(np.rint(rng.normal(25.5, 4.2, n_rows)), 16, 39).astype(int)
+    minutes = np.rint(SEASON_MINUTES * rng.beta(1.3, 1.1, n_rows))
+
+    # Market value in millions: league strength, age curve, a log-normal
+    # spread; rounded to 50k so many players share a quoted value
+    strength = np.array([LEAGUE_MULTIPLIERS.get(lg, 0.75) for lg in leagues])[league]
+    age_curve = np.exp(-((age - 25) ** 2) / (2 * 5.0 ** 2))
+    value = np.exp(rng.normal(0.2, 1.0, n_rows)) * 12 * (strength - 0.6) * age_curve
+    value = np.maximum(np.round(value * 20) / 20, 0.05)
+
+    df = {
+        "ID": np.arange(1, n_rows + 1),
+        "League": league_names[league],
+        "Team": team_names[team],
+        "Minutes": minutes,
+        "Position_1": position_names[pos1],
+        "Position_2": np.where(has_pos2, position_names[pos2], np.nan),
+        "Age": age,
+        "Value": _format_values(value, rng),
+    }
+
+    n_teams = len(leagues) * teams_per_league
+    style = {
+        col: np.exp(rng.normal(0.0, spread, n_teams))[team]
+        for col, spread in _TEAM_STYLE.items()
+    }
+    style["Np_xg_faced"] = 1.0 / style["Np_xg"]
+    noise = rng.normal(1.0, 0.03, n_teams)[team]
+
+    is_gk = line == 0
+    for col in model_columns():
+        if col in df or col == "Value_million":
+            continue
+        name = col.lower()
+
+        if "percentage" in name:
+            x = 100 * rng.beta(6.0, 3.0, n_rows)
+        elif "proportion" in name:
+            x = rng.beta(4.0, 4.0, n_rows)
+        elif col == "Goals_saved_above_avg":
+            x = rng.normal(0.0, 0.15, n_rows)
+        elif col == "Np_xg_faced":
+            x = METRIC_MEANS[col] * style[col] * noise
+        else:
+            x = rng.gamma(2.5, METRIC_MEANS.get(col, 1.0) / 2.5, n_rows)
+
+        if col in _TEAM_STYLE:
+            x = x * style[col]
+        if col in ATTACKING_METRICS:
+            x = x * _ATTACK_BY_LINE[line]
+        elif col in DEFENSIVE_METRICS:
+            x = x * _DEFENCE_BY_LINE[line]
+
+        if col in GOALKEEPER_METRICS:
+            x = np.where(is_gk, x, np.nan)
+        elif col not in COMPLETE_COLUMNS:
+            x = np.where(rng.random(n_rows) < MISSING_SHARE, np.nan, x)
+        df[col] = x
+
+    return pd.DataFrame(df)
+
+
+def write_synthetic_csv(path: str, n_rows: int, seed: int = 0, **kwargs) -> str:
+    """Write synthetic_players(n_rows, seed=seed, **kwargs) to a CSV at `path`."""
+    synthetic_players(n_rows, seed=seed, **kwargs).to_csv(path, index=False)
+    return path
@@ -0,0 +1,128 @@
+"""
+Optional per-stage instrumentation of the scoring pipeline.
+
+Stages in model_engine call their work through traced(name, fn, ...).
+With no trace active that is a plain fn(...) call behind one ContextVar
+lookup; inside `with trace_pipeline() as trace:` each stage appends a
+record (wall time, rows in / out, columns added, peak allocated memory)
+to the trace. Stages nest: a stage run inside another gets depth + 1.
+"""
+
+import time
+import tracemalloc
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+import pandas as pd
+
+_ACTIVE_TRACE: ContextVar = ContextVar("pipeline_trace", default=None)
+
+
+
+# TRACE
+
+
+class PipelineTrace:
+    """
+    Stage records of one traced run, in start order. Each record is a
+    dict with: stage, depth, seconds, rows_in, rows_out, columns_added
+    (names) and peak_mb (None unless memory tracking is on).
+    """
+
+    def __init__(self, memory: bool = True):
+        self.memory = memory
+        self.records = []
+        self._open = []   # [record, start bytes, peak bytes] per running stage
+
+    def total_seconds(self) -> float:
+        """Wall time of the top-level stages."""
+        return sum(r["seconds"] for r in self.records if r["depth"] == 0)
+
+    def to_frame(self) -> pd.DataFrame:
+        """Records as a DataFrame; columns_added is reduced to a count."""
+        df = pd.DataFrame(
+            self.records,
+            columns=["stage", "depth", "seconds", "rows_in", "rows_out",
+                     "columns_added", "peak_mb"],
+        )
+        df["columns_added"] = df["columns_added"].map(len)
+        return df
+
+    def _sync_peak(self) -> int:
+        """Fold the allocator's peak into every open stage, then reset it."""
+        current, peak = tracemalloc.get_traced_memory()
+        for frame in self._open:
+            frame[2] = max(frame[2], peak)
+        tracemalloc.reset_peak()
+        return current
+
+
+@contextmanager
+def trace_pipeline(memory: bool = True):
+    """
+    Record every traced stage run inside the block:
+
+        with trace_pipeline() as trace:
+            run_model("winger")
+        trace.to_frame()
+
+    memory=True tracks peak allocations with tracemalloc, which slows
+    the traced run down noticeably; timings are only comparable between
+    runs with the same setting.
+    """
+    trace = PipelineTrace(memory=memory)
+    started = memory and not tracemalloc.is_tracing()
+    if started:
+        tracemalloc.start()
+    token = _ACTIVE_TRACE.set(trace)
+    try:
+        yield trace
+    finally:
+        _ACTIVE_TRACE.reset(token)
+        if started:
+            tracemalloc.stop()
+
+
+def _rows(obj):
+    return len(obj) if isinstance(obj, pd.DataFrame) else None
+
+
+def traced(stage: str, fn, *args, **kwargs):
+    """
+    fn(*args, **kwargs), recorded as `stage` on the active trace if any.
+    Rows in and columns added are measured against the first argument
+    when it is a DataFrame.
+    """
+    trace = _ACTIVE_TRACE.get()
+    if trace is None:
+        return fn(*args, **kwargs)
+
+    df_in = args[0] if args and isinstance(args[0], pd.DataFrame) else None
+    cols_in = set(df_in.columns) if df_in is not None else set()
+    rows_in = _rows(df_in)
+
+    record = {"stage": stage, "depth": len(trace._open), "seconds": None,
+              "rows_in": rows_in, "rows_out": None, "columns_added": [],
+              "peak_mb": None}
+    trace.records.append(record)
+
+    if trace.memory:
+        frame = [record, trace._sync_peak(), 0]
+    else:
+        frame = [record, 0, 0]
+    trace._open.append(frame)
+
+    t0 = time.perf_counter()
+    try:
+        out = fn(*args, **kwargs)
+    finally:
+        record["seconds"] = time.perf_counter() - t0
+        if trace.memory:
+            trace._sync_peak()
+            record["peak_mb"] = max(frame[2] - frame[1], 0) / 1e6
+        trace._open.pop()
+
+    record["rows_out"] = _rows(out)
+    if df_in is not None and isinstance(out, pd.DataFrame):
+        record["columns_added"] = [c for c in out.columns if c not in cols_in]
+    return out
@@ -1,6 +1,8 @@
 import numpy as np
 import pandas as pd
 
+from .group_ops import factorize_groups, grouped_zscore
+
 # ---------------------------------------------------------
 # SAFE DIVISION
 # ---------------------------------------------------------
@@ -41,6 +43,32 @@ def convert_value_to_millions(value):
     except:
         return np.nan
 
+# Millions per unit suffix of a market value; no suffix means euros / pounds
+VALUE_UNITS = {"m": 1.0, "k": 1e-3}
+
+
+def convert_values_to_millions(values) -> np.ndarray:
+    """
+    Vectorised convert_value_to_millions over a whole column, with the
+    same results on its formats ('£3.2m', '1,500k', '€500K', '2000000').
+    Each distinct string is parsed once with pandas string methods.
+    Exactly one trailing unit (m or k) is accepted; anything else
+    left over ('1.5mk', 'm', 'approx 2m') gives NaN.
+    """
+    codes, uniques = pd.factorize(pd.Series(values), use_na_sentinel=True)
+
+    text = (
+        pd.Series(uniques, dtype=object).astype(str).str.lower()
+        .str.replace(r"[€£,]", "", regex=True).str.strip()
+    )
+    parts = text.str.extract(r"^(?P<number>.*?)\s*(?P<unit>m|k)?$")
+
+    parsed = pd.to_numeric(parts["number"], errors="coerce").to_numpy(dtype=float, copy=True)
+    parsed *= parts["unit"].map(VALUE_UNITS).fillna(1e-6).to_numpy(dtype=float)
+
+    return np.where(codes >= 0, np.append(parsed, np.nan)[codes], np.nan)
+
+
 # ---------------------------------------------------------
 # AGE MULTIPLIER — RECRUITMENT OPTIMISED
 # ---------------------------------------------------------
@@ -71,19 +99,13 @@ LEAGUE_MULTIPLIERS = {
 
 
 def add_z_by_league(df, metrics, league_col="League", clip=3.0):
-    for m in metrics:
-        if m not in df.columns:
-            df[f"z_{m}"] = 0
-            continue
-
-        g = df.groupby(league_col)[m]
-        mean = g.transform("mean")
-        std = g.transform("std").replace(0, np.nan)
+    """Per-league z-scores of 'metrics' as z_<metric>, in one grouped pass."""
+    present = [m for m in metrics if m in df.columns]
+    codes, leagues = factorize_groups(df, league_col)
+    z = grouped_zscore(df[present].to_numpy(dtype=float), codes, len(leagues), clip=clip)
 
-        df[f"z_{m}"] = (df[m] - mean) / std
-        df[f"z_{m}"] = df[f"z_{m}"].fillna(0.0)
-        if clip:
-            df[f"z_{m}"] = df[f"z_{m}"].clip(-clip, clip)
+    for m in metrics:
+        df[f"z_{m}"] = z[:, present.index(m)] if m in present else 0
 
     return df
 
@@ -2,11 +2,15 @@
 #  STREAMLIT APP — CELTIC FC PLAYER VALUATION (CONFIG-DRIVEN)
 # =====================================================================
 
+import contextlib
+from concurrent.futures import wait
+
 import streamlit as st
 
 
-from analysis.model_engine import run_model
+from analysis.model_engine import cached_run_model, warm_start
 from analysis.model_config import ROLE_CONFIG
+from analysis.tracing import trace_pipeline
 
 from analysis.summaries import (
     generate_gk_summary,
@@ -54,6 +58,16 @@ ROLE_MIN_MINUTES = {
     "striker": DEFAULT_MINUTES,  # as in your original app
 }
 
+# Players shown per role: the top pick plus the next three alternatives
+SHORTLIST_SIZE = 4
+
+# Hidden per-stage timing panel, shown when the URL has ?diagnostics=1
+DIAGNOSTICS = st.query_params.get("diagnostics") == "1"
+
+# Role blocks rerun on their own when their widgets change (Streamlit
+# >= 1.37); older versions rerun the whole script as before
+fragment = getattr(st, "fragment", None) or (lambda fn: fn)
+
 # =====================================================================
 # PAGE CONFIG
 # =====================================================================
@@ -62,6 +76,27 @@ st.set_page_config(
     layout="centered",
 )
 
+# =====================================================================
+# WARM START
+# =====================================================================
+@st.cache_resource(show_spinner=False)
+def start_warm_up():
+    """
+    Once per server process: build the shared context and score every
+    role at "Balanced" sliders in the background, so the first click on
+    each role is served from the shared result cache.
+    """
+    return warm_start(
+        [role_key for role_key, _ in ROLE_ORDER],
+        path=DEFAULT_PATH,
+        min_minutes=ROLE_MIN_MINUTES,
+        budget_million=DEFAULT_BUDGET,
+        top_k=SHORTLIST_SIZE,
+    )
+
+
+WARM_UP = start_warm_up()
+
 # =====================================================================
 # GLOBAL CSS + ROBOTO FONT
 # =====================================================================
@@ -155,13 +190,46 @@ PRIORITY_MULT = {
     "Maximum": 2
 }
 
+# =====================================================================
+# DIAGNOSTICS PANEL
+# =====================================================================
+def diagnostics_panel(trace):
+    """Per-stage time, rows and columns added of one run."""
+    cache_hit = any(r["stage"] == "result_cache" for r in trace.records)
+    title = f"Diagnostics ({trace.total_seconds() * 1000:.0f} ms"
+    title += ", result cache hit)" if cache_hit else ")"
+
+    with st.expander(title):
+        if cache_hit:
+            st.caption(
+                "This shortlist was served from the shared result cache, so no "
+                "pipeline stage ran. Change a slider to see a traced full run."
+            )
+        stages = trace.to_frame()
+        stages["stage"] = [
+            "\u2003" * d + s for d, s in zip(stages["depth"], stages["stage"])
+        ]
+        stages["ms"] = stages.pop("seconds") * 1000
+        st.dataframe(
+            stages.drop(columns=["depth", "peak_mb"]),
+            hide_index=True,
+            use_container_width=True,
+        )
+
+
 # =====================================================================
 # UNIVERSAL ROLE SECTION
 # =====================================================================
+@fragment
 def role_section(role_key: str, display_name: str):
     """
     Render one role block (Goalkeeper, Winger, Central Midfielder, Striker)
-    using ROLE_CONFIG and run_model.
+    using ROLE_CONFIG and run_model (through the shared result cache).
+
+    In live mode the shortlist is re-ranked on every slider change instead
+    of on the Find button. Sliders only report a value when released, and
+    each change reruns just this block; scoring goes through the cached
+    group z-scores (rescore), so an update takes milliseconds.
     """
     cfg = ROLE_CONFIG[role_key]
     text = cfg["text"]
@@ -201,30 +269,50 @@ def role_section(role_key: str, display_name: str):
             label_visibility="collapsed",
         )
 
-    # Run the model when the user clicks the button
-    if st.button(f"Find {display_name}", key=f"find_{role_key}"):
+    live = st.toggle(
+        "Live re-ranking",
+        key=f"live_{role_key}",
+        help="Update the shortlist as the sliders move",
+    )
+
+    # Run the model on every change in live mode, else on the button
+    if live or st.button(f"Find {display_name}", key=f"find_{role_key}"):
 
         # Convert slider words → numeric multipliers
         multiplier_dict = {k: PRIORITY_MULT[v] for k, v in slider_vals.items()}
 
         min_minutes = ROLE_MIN_MINUTES.get(role_key, DEFAULT_MINUTES)
 
-        df = run_model(
-            role_key,
-            path=DEFAULT_PATH,
-            min_minutes=min_minutes,
-            budget_million=DEFAULT_BUDGET,
-            **multiplier_dict,
+        # A click during the warm-up waits for it rather than redoing it
+        wait([WARM_UP[role_key]])
+
+        # No memory tracking: tracemalloc is process-wide and would slow
+        # every other session on the server while this run is traced
+        tracing = (
+            trace_pipeline(memory=False) if DIAGNOSTICS
+            else contextlib.nullcontext()
         )
+        with tracing as trace:
+            df = cached_run_model(
+                role_key,
+                path=DEFAULT_PATH,
+                min_minutes=min_minutes,
+                budget_million=DEFAULT_BUDGET,
+                top_k=SHORTLIST_SIZE,
+                **multiplier_dict,
+            )
+
+        if trace is not None:
+            diagnostics_panel(trace)
 
         if df.empty:
             st.warning("No players matched the filters for this position.")
             return
 
-        # Rank by BuyScore
-        df_sorted = df.sort_values("BuyScore", ascending=False)
-        top = df_sorted.iloc[0]
-        others = df_sorted.iloc[1:4].copy()
+        # Shortlist arrives ranked by BuyScore, with pizza percentiles
+        # already computed against the whole in-budget pool
+        top = df.iloc[0]
+        others = df.iloc[1:].copy()
 
         # Hit summary
         st.success(f"{display_name} found: **{top['ID']} – {top['Team']}**")
@@ -243,7 +331,7 @@ def role_section(role_key: str, display_name: str):
         render_category_header(groups)
         render_id_key(groups)
 
-        fig = pizza_plot_combined(top, df_sorted, groups, invert)
+        fig = pizza_plot_combined(top, df, groups, invert)
         st.plotly_chart(fig, use_container_width=True)
 
 
@@ -0,0 +1,24 @@
+import pytest
+
+from analysis import invalidate_context
+from analysis.synthetic import write_synthetic_csv
+
+# Large enough for every role to have players in most leagues, small
+# enough that a cold run_model stays well under a second
+SYNTHETIC_ROWS = 4_000
+
+
+@pytest.fixture(scope="session")
+def player_csv(tmp_path_factory) -> str:
+    """A synthetic player-season CSV shared by the whole test session."""
+    return write_synthetic_csv(
+        str(tmp_path_factory.mktemp("data") / "players.csv"), SYNTHETIC_ROWS
+    )
+
+
+@pytest.fixture(autouse=True)
+def cold_engine():
+    """Every test starts and ends with empty engine caches."""
+    invalidate_context()
+    yield
+    invalidate_context()
@@ -0,0 +1,94 @@
+import json
+import os
+
+import pandas as pd
+import pytest
+
+from analysis import run_model
+from analysis.batch import expand_scenarios, main, run_batch
+
+
+@pytest.fixture
+def spec(player_csv) -> dict:
+    return {
+        "path": player_csv,
+        "top_k": 5,
+        "roles": ["winger", "striker"],
+        "min_minutes": [900, 1500],
+        "budgets": [10, 30],
+        "presets": {"balanced": {}, "goal_threat": {"Goal Threat": 1.5}},
+        "scenarios": [{"role": "goalkeeper", "budget": 3, "sliders": {"Distribution": 1.75}}],
+    }
+
+
+def _shortlists(out_dir) -> pd.DataFrame:
+    df = pd.read_parquet(os.path.join(out_dir, "shortlists"))
+    return df.sort_values(["scenario", "rank"], ignore_index=True)
+
+
+def test_expand_scenarios(spec):
+    scenarios = expand_scenarios(spec)
+
+    assert len(scenarios) == 2 * 2 * 2 * 2 + 1
+    extra = scenarios[-1]
+    assert extra["name"] == "goalkeeper/custom/min900/budget3"
+    assert extra["path"] == spec["path"]
+
+    with pytest.raises(ValueError, match="Unknown role"):
+        expand_scenarios({"roles": ["libero"]})
+
+
+def test_run_batch_writes_every_scenario(spec, tmp_path):
+    index = run_batch(spec, str(tmp_path / "out"), workers=1)
+
+    assert index["run"]["scenarios"] == 17
+    assert index["run"]["partitions"] == 5
+    with open(tmp_path / "out" / "index.json") as fh:
+        assert json.load(fh)["run"]["scenarios"] == 17
+
+    shortlists = _shortlists(tmp_path / "out")
+    assert set(shortlists["scenario"]) == {e["scenario"] for e in index["scenarios"]}
+    assert (shortlists.groupby("scenario").size() <= 5).all()
+
+    entry = next(e for e in index["scenarios"] if e["scenario"] == "striker/goal_threat/min1500/budget10")
+    expected = run_model(
+        "striker", path=spec["path"], min_minutes=1500, budget_million=10, top_k=5,
+        **{"Goal Threat": 1.5},
+    )
+    got = shortlists[shortlists["scenario"] == entry["scenario"]]
+    assert got["ID"].astype(str).tolist() == expected["ID"].astype(str).tolist()
+    assert entry["top_id"] == str(expected["ID"].iloc[0])
+
+
+def test_pooled_run_matches_serial(spec, tmp_path):
+    serial = run_batch(spec, str(tmp_path / "serial"), workers=1)
+    pooled = run_batch(spec, str(tmp_path / "pooled"), workers=2)
+
+    assert pooled["run"]["workers"] == 2
+    pd.testing.assert_frame_equal(_shortlists(tmp_path / "pooled"), _shortlists(tmp_path / "serial"))
+    assert [e["top_id"] for e in pooled["scenarios"]] == [e["top_id"] for e in serial["scenarios"]]
+
+
+def test_non_empty_output_needs_overwrite(spec, tmp_path):
+    out = tmp_path / "out"
+    run_batch(spec, str(out), workers=1)
+    (out / "notes.txt").write_text("keep me")
+
+    with pytest.raises(FileExistsError):
+        run_batch(spec, str(out), workers=1)
+
+    small = {**spec, "roles": ["winger"], "min_minutes": [900], "scenarios": []}
+    run_batch(small, str(out), workers=1, overwrite=True)
+
+    assert set(_shortlists(out)["scenario"].str.split("/").str[0]) == {"winger"}
+    assert (out / "notes.txt").read_text() == "keep me"
+
+
+def test_cli(spec, tmp_path, capsys):
+    spec_file = tmp_path / "scenarios.json"
+    spec_file.write_text(json.dumps({**spec, "roles": ["winger"], "scenarios": []}))
+
+    main([str(spec_file), "--out", str(tmp_path / "out"), "--workers", "1"])
+
+    assert "8 scenarios in 2 partitions" in capsys.readouterr().out
+    assert (tmp_path / "out" / "index.json").exists()
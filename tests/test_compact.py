@@ -0,0 +1,48 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from analysis import compact, invalidate_context, run_model, top_k
+from analysis.model_config import ROLE_CONFIG
+
+ROLES = [r for r in ROLE_CONFIG if not r.startswith("__")]
+
+
+@pytest.mark.parametrize("role", ROLES)
+def test_compact_scores_match_float64(player_csv, monkeypatch, role):
+    full = run_model(role, path=player_csv)
+
+    monkeypatch.setattr(compact, "COMPACT_MEMORY", True)
+    invalidate_context()
+    small = run_model(role, path=player_csv)
+
+    assert small.index.sort_values().equals(full.index.sort_values())
+    small = small.loc[full.index]
+    for col in ("BuyScore", "Overall_adj"):
+        np.testing.assert_allclose(
+            small[col].to_numpy(float), full[col].to_numpy(float),
+            rtol=0, atol=compact.COMPACT_TOLERANCE,
+        )
+    assert top_k(small, 20).index.equals(top_k(full, 20).index)
+    assert compact.frame_megabytes(small) < compact.frame_megabytes(full)
+
+
+def test_compact_frame_dtypes():
+    df = pd.DataFrame({
+        "League": pd.Series(["A", "B", "A"], dtype=object),
+        "Team": pd.Series(["x", "y", "x"], dtype="string"),
+        "Position_1": pd.Categorical(["GK", "CB", "GK"]),
+        "Minutes": [900.0, 1800.0, 2700.0],
+        "Pressures_ctx": [1.0, 2.0, 3.0],
+        "z_Pressures": [0.5, -0.5, 0.0],
+        "BuyScore": [0.1, 0.2, 0.3],
+    })
+    out = compact.compact_frame(df)
+
+    for col in ("League", "Team", "Position_1"):
+        assert isinstance(out[col].dtype, pd.CategoricalDtype)
+    assert out["Pressures_ctx"].dtype == np.float32
+    assert out["z_Pressures"].dtype == np.float32
+    assert out["Minutes"].dtype == np.float64
+    assert out["BuyScore"].dtype == np.float64
+    assert compact.compact_frame(out) is out
@@ -0,0 +1,111 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from analysis.benchmark import _synthetic_team_frame
+from analysis.context_stats import IncrementalContext
+from analysis.model_engine import (
+    CONTEXT_FAMILIES,
+    add_context_normalised_metrics,
+    add_team_context_metrics,
+    zscore_once,
+)
+
+METRICS = [m for fam in CONTEXT_FAMILIES.values() for m in fam[0]]
+
+
+def _rebuild(df: pd.DataFrame) -> pd.DataFrame:
+    return add_context_normalised_metrics(add_team_context_metrics(df))
+
+
+def _context_columns(df: pd.DataFrame) -> list:
+    return [c for c in df.columns if c.startswith(("Team_", "Lg_")) or c.endswith("_ctx")]
+
+
+def _assert_matches_rebuild(inc: IncrementalContext, rows: pd.DataFrame) -> None:
+    ref = _rebuild(rows)
+    cols = _context_columns(ref)
+
+    assert sorted(_context_columns(inc.frame)) == sorted(cols)
+    assert sorted(inc.frame.index) == sorted(ref.index)
+    np.testing.assert_allclose(
+        inc.frame.loc[ref.index, cols].to_numpy(dtype=float),
+        ref[cols].to_numpy(dtype=float),
+        rtol=1e-9, atol=1e-9,
+    )
+
+
+@pytest.fixture
+def base() -> pd.DataFrame:
+    df = _synthetic_team_frame(3_000, n_leagues=5, teams_per_league=6, seed=1, metrics=METRICS)
+    df.loc[::97, "Pressures"] = np.nan
+    return df
+
+
+def test_initial_frame_matches_rebuild(base):
+    _assert_matches_rebuild(IncrementalContext(base), base)
+
+
+def test_replace_and_append_match_rebuild(base):
+    inc = IncrementalContext(base.iloc[:2_500])
+
+    snap = base.loc[base["League"] == "League 0"].iloc[:200].copy()
+    snap["Minutes"] += 90
+    snap["Pressures"] *= 1.1
+    affected = inc.update(pd.concat([snap, base.iloc[2_500:]]))
+
+    final = base.copy()
+    final.loc[snap.index] = snap
+    _assert_matches_rebuild(inc, final)
+    assert "League 0" in affected
+
+
+def test_update_touching_one_league_reports_it(base):
+    inc = IncrementalContext(base)
+    snap = base.loc[base["League"] == "League 2"].iloc[:10].copy()
+    snap["Op_passes"] += 1.0
+
+    assert inc.update(snap) == {"League 2"}
+
+
+def test_remove_and_short_minutes_match_rebuild(base):
+    inc = IncrementalContext(base, min_minutes=1_000)
+
+    short = base.iloc[:50].copy()
+    short["Minutes"] = 500
+    short.loc[short.index[:10], "Minutes"] = np.nan
+    inc.update(short)
+    inc.remove(base.index[50:100])
+
+    kept = base.iloc[100:]
+    _assert_matches_rebuild(inc, kept[kept["Minutes"] >= 1_000])
+
+
+def test_spread_check_flip_drops_family(base):
+    inc = IncrementalContext(base)
+    flat = base.copy()
+    flat["Turnovers"] = 1.0
+    inc.update(flat)
+
+    assert not any(c.startswith("Turnovers") and c.endswith("_ctx") for c in inc.frame.columns)
+    _assert_matches_rebuild(inc, flat)
+
+
+def test_zscore_matches_zscore_once(base):
+    inc = IncrementalContext(base)
+    inc.update(base.iloc[:300].assign(Pressures=lambda d: d["Pressures"] * 2))
+
+    final = base.copy()
+    final.iloc[:300, final.columns.get_loc("Pressures")] *= 2
+    ref = zscore_once(_rebuild(final), ["Pressures_ctx"])
+
+    np.testing.assert_allclose(
+        inc.zscore("Pressures_ctx").loc[ref.index], ref["z_Pressures_ctx"], atol=1e-9
+    )
+    moments = inc.league_moments("Pressures_ctx")
+    assert moments["count"].sum() == ref["Pressures_ctx"].notna().sum()
+
+
+def test_duplicate_labels_are_rejected(base):
+    with pytest.raises(ValueError, match="unique index"):
+        IncrementalContext(pd.concat([base.iloc[:5], base.iloc[:5]]))
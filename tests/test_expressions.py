@@ -0,0 +1,88 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from analysis import expressions
+from analysis.expressions import CompiledMetric, evaluate_metrics, metric
+from analysis.model_config import ROLE_CONFIG
+from analysis.utils import safe_div
+
+
+@pytest.fixture
+def df() -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    out = pd.DataFrame(rng.gamma(2.0, 2.0, (500, 3)), columns=["a", "b", "c"])
+    out.loc[::7, "b"] = 0.0
+    out.loc[::11, "c"] = np.nan
+    return out
+
+
+@pytest.mark.parametrize(
+    "expr, reference",
+    [
+        ("a + b * 2 - c", lambda d: d["a"] + d["b"] * 2 - d["c"]),
+        ("-(a - b) / 2 + 90", lambda d: -(d["a"] - d["b"]) / 2 + 90),
+        ("a ** 2", lambda d: d["a"] ** 2),
+        ("safe_div(a, b)", lambda d: safe_div(d["a"], d["b"])),
+        ("safe_div(a + c, b) * 90", lambda d: safe_div(d["a"] + d["c"], d["b"]) * 90),
+        ("a + get(c, 0)", lambda d: d["a"] + d.get("c", 0)),
+        ("a + get(Absent, 1.5)", lambda d: d["a"] + d.get("Absent", 1.5)),
+    ],
+)
+def test_compiled_metric_matches_lambda(df, expr, reference):
+    np.testing.assert_allclose(metric(expr)(df), reference(df), rtol=1e-12)
+
+
+def test_columns_and_defaults_are_static():
+    m = metric("safe_div(a, b) + get(c, 0)")
+
+    assert m.columns == {"a", "b", "c"}
+    assert m.required == {"a", "b"}
+    assert m.defaults == {"c": 0.0}
+    assert repr(m) == "metric('safe_div(a, b) + get(c, 0)')"
+
+
+def test_bare_column_does_not_alias_input(df):
+    out = metric("a")(df)
+    out[:] = -1
+
+    assert (df["a"] > 0).all()
+
+
+def test_constant_expression_broadcasts(df):
+    out = evaluate_metrics(df, {"x": metric("get(Absent, 2)")})["x"]
+
+    assert out.shape == (len(df),)
+    assert (out == 2).all()
+
+
+def test_missing_required_column_raises(df):
+    with pytest.raises(KeyError, match="Absent"):
+        evaluate_metrics(df, {"x": metric("a + Absent")})
+
+
+@pytest.mark.parametrize(
+    "expr",
+    ["a % b", "a < b", "abs(a)", "get(a)", "get(a, b)", "safe_div(a)", "'text'", "a.real", "True + a"],
+)
+def test_rejects_expressions_outside_the_grammar(expr):
+    with pytest.raises(ValueError, match="Invalid metric expression"):
+        CompiledMetric(expr)
+
+
+def test_numexpr_path_matches_numpy(df, monkeypatch):
+    pytest.importorskip("numexpr")
+    monkeypatch.setattr(expressions, "_NUMEXPR_OK", True)
+    monkeypatch.setattr(expressions, "NUMEXPR_MIN_ROWS", 0)
+    m = CompiledMetric("safe_div(a + c, b) * 90")
+
+    assert m._ne_expr is not None
+    np.testing.assert_allclose(m(df), safe_div(df["a"] + df["c"], df["b"]) * 90, rtol=1e-12)
+
+
+def test_role_baselines_are_compiled():
+    for role, cfg in ROLE_CONFIG.items():
+        if role.startswith("__"):
+            continue
+        for name, fn in cfg["baseline"].items():
+            assert isinstance(fn, CompiledMetric), (role, name)
@@ -0,0 +1,103 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from analysis.benchmark import _synthetic_team_frame, _team_context_apply
+from analysis.group_ops import factorize_groups, grouped_zscore, weighted_group_means
+from analysis.model_engine import TEAM_CONTEXT_COLUMNS, add_team_context_metrics, zscore_once
+
+
+@pytest.fixture
+def teams() -> pd.DataFrame:
+    df = _synthetic_team_frame(5_000, n_leagues=6, teams_per_league=8, seed=3)
+    rng = np.random.default_rng(3)
+    df.loc[rng.choice(len(df), 50, replace=False), "Pressures"] = np.nan
+    df.loc[rng.choice(len(df), 20, replace=False), "Team"] = np.nan
+    return df
+
+
+def test_factorize_groups_drops_missing_keys(teams):
+    codes, labels = factorize_groups(teams, ["League", "Team"])
+
+    assert (codes[teams["Team"].isna().to_numpy()] == -1).all()
+    assert len(labels) == teams.dropna(subset=["Team"]).groupby(["League", "Team"]).ngroups
+    assert list(labels) == sorted(labels)
+
+
+def test_weighted_group_means_match_np_average(teams):
+    cols = ["Op_passes", "Pressures", "Missing"]
+    out = weighted_group_means(teams, ["League", "Team"], cols, "Minutes")
+
+    for (league, team), g in teams.groupby(["League", "Team"]):
+        row = out.loc[(league, team)]
+        assert row["Minutes_sum"] == g["Minutes"].sum()
+        np.testing.assert_allclose(row["Op_passes"], np.average(g["Op_passes"], weights=g["Minutes"]))
+        if g["Pressures"].isna().any():
+            assert np.isnan(row["Pressures"])
+        else:
+            np.testing.assert_allclose(row["Pressures"], np.average(g["Pressures"], weights=g["Minutes"]))
+    assert out["Missing"].isna().all()
+
+
+def test_weighted_group_means_zero_weight_is_nan():
+    df = pd.DataFrame({"Team": ["a", "a", "b"], "Minutes": [0.0, 0.0, 90.0], "x": [1.0, 2.0, 3.0]})
+    out = weighted_group_means(df, "Team", ["x"], "Minutes")
+
+    assert np.isnan(out.loc["a", "x"])
+    assert out.loc["b", "x"] == 3.0
+
+
+def test_team_context_matches_groupby_apply(teams):
+    ref = _team_context_apply(teams)
+    out = add_team_context_metrics(teams)
+
+    assert out.index.equals(teams.index)
+    np.testing.assert_allclose(
+        out[TEAM_CONTEXT_COLUMNS].to_numpy(dtype=float),
+        ref.loc[teams.index, TEAM_CONTEXT_COLUMNS].to_numpy(dtype=float),
+        rtol=1e-12,
+    )
+
+
+def _zscore_reference(df: pd.DataFrame, col: str) -> pd.Series:
+    """groupby-transform z-score: ddof=1, no spread -> 0, clipped at 3."""
+    lg = df.groupby("League")[col]
+    z = (df[col] - lg.transform("mean")) / lg.transform("std")
+    return z.replace([np.inf, -np.inf], np.nan).fillna(0.0).clip(-3, 3)
+
+
+def test_grouped_zscore_matches_groupby_transform(teams):
+    teams.loc[teams["League"] == "League 0", "Turnovers"] = 1.0  # no spread
+    cols = ["Op_passes", "Pressures", "Turnovers"]
+    codes, leagues = factorize_groups(teams, "League")
+
+    z = grouped_zscore(teams[cols].to_numpy(dtype=float), codes, len(leagues))
+
+    for j, col in enumerate(cols):
+        np.testing.assert_allclose(z[:, j], _zscore_reference(teams, col), atol=1e-12)
+    assert (z[(teams["League"] == "League 0").to_numpy(), 2] == 0).all()
+
+
+def test_grouped_zscore_one_dimensional_and_unclipped():
+    # One outlier among 20 rows sits 19 / sqrt(20) ~ 4.25 sd out
+    values = np.r_[0.0, 10.0, np.ones(19), 100.0, 5.0]
+    codes = np.r_[0, 0, np.ones(20, dtype=int), -1]
+
+    z = grouped_zscore(values, codes, 2, clip=None)
+
+    assert z.shape == values.shape
+    assert z[-1] == 0.0
+    np.testing.assert_allclose(z[-2], 19 / np.sqrt(20))
+    assert (np.abs(grouped_zscore(values, codes, 2)) <= 3).all()
+
+
+def test_zscore_once_is_idempotent_and_fills_missing(teams):
+    out = zscore_once(teams.copy(), ["Pressures", "Absent"])
+
+    np.testing.assert_allclose(out["z_Pressures"], _zscore_reference(teams, "Pressures"), atol=1e-12)
+    assert (out["z_Absent"] == 0).all()
+
+    out["Pressures"] *= 2
+    again = zscore_once(out, ["Pressures"])
+    assert again is out
+    np.testing.assert_allclose(again["z_Pressures"], _zscore_reference(teams, "Pressures"), atol=1e-12)
@@ -0,0 +1,44 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from analysis import run_model, run_model_chunked
+from analysis.model_config import ROLE_CONFIG
+
+ROLES = [r for r in ROLE_CONFIG if not r.startswith("__")]
+
+
+def _assert_same_shortlist(chunked: pd.DataFrame, full: pd.DataFrame) -> None:
+    assert list(chunked.index) == list(full.index)
+    assert sorted(chunked.columns) == sorted(full.columns)
+    for col in full.columns:
+        a, b = chunked[col], full[col]
+        if pd.api.types.is_numeric_dtype(b):
+            np.testing.assert_allclose(
+                a.to_numpy(dtype=float), b.to_numpy(dtype=float), rtol=1e-9, atol=1e-9,
+                err_msg=col,
+            )
+        else:
+            assert a.astype(object).equals(b.astype(object)), col
+
+
+@pytest.mark.parametrize("role", ROLES)
+def test_chunked_matches_in_memory(player_csv, role):
+    full = run_model(role, path=player_csv, top_k=10)
+    chunked = run_model_chunked(role, path=player_csv, top_k=10, chunk_rows=700)
+
+    _assert_same_shortlist(chunked, full)
+
+
+def test_chunked_matches_with_sliders_and_budget(player_csv):
+    sliders = {group: 1.5 for group, _ in ROLE_CONFIG["winger"]["sliders"][:2]}
+    kwargs = dict(path=player_csv, top_k=15, budget_million=20, **sliders)
+
+    _assert_same_shortlist(
+        run_model_chunked("winger", chunk_rows=1_000, **kwargs), run_model("winger", **kwargs)
+    )
+
+
+def test_chunked_rejects_unknown_role(player_csv):
+    with pytest.raises(ValueError, match="Unknown role"):
+        run_model_chunked("libero", path=player_csv)
@@ -0,0 +1,64 @@
+import gc
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from analysis import percentiles
+from analysis.percentiles import PercentileIndex, column_percentiles, percentile_index
+
+
+@pytest.fixture
+def values() -> np.ndarray:
+    rng = np.random.default_rng(0)
+    v = rng.integers(0, 50, 2_000).astype(float)  # many ties
+    v[rng.choice(len(v), 100, replace=False)] = np.nan
+    return v
+
+
+def test_column_percentiles_match_rankdata(values):
+    rankdata = pytest.importorskip("scipy.stats").rankdata
+    ok = ~np.isnan(values)
+    expected = np.full(len(values), np.nan)
+    expected[ok] = rankdata(values[ok], method="average") / ok.sum() * 100
+
+    np.testing.assert_allclose(column_percentiles(values), expected, rtol=1e-12)
+
+
+def test_column_percentiles_match_series_rank(values):
+    expected = pd.Series(values).rank(pct=True).to_numpy() * 100
+
+    np.testing.assert_allclose(column_percentiles(values), expected, rtol=1e-12)
+
+
+def test_percentile_lookups_outside_the_population(values):
+    index = PercentileIndex(values)
+
+    assert len(index) == (~np.isnan(values)).sum()
+    assert index.percentile(-1.0) == 0.5 / len(index) * 100
+    assert index.percentile(1e9) == (len(index) + 0.5) / len(index) * 100
+    assert np.isnan(index.percentile(np.nan))
+    assert isinstance(index.percentile(10.0), float)
+    np.testing.assert_allclose(
+        index.percentile(np.array([values[0], values[1]])), column_percentiles(values)[:2]
+    )
+
+
+def test_empty_population_gives_nan():
+    index = PercentileIndex([np.nan, np.nan])
+
+    assert np.isnan(index.percentile(1.0))
+    assert np.isnan(index.percentile(np.array([1.0, 2.0]))).all()
+
+
+def test_percentile_index_is_cached_per_frame():
+    df = pd.DataFrame({"x": [3.0, 1.0, 2.0]})
+
+    first = percentile_index(df, "x")
+    assert percentile_index(df, "x") is first
+    assert first.percentile(2.0) == pytest.approx(200 / 3)
+
+    key = id(df)
+    del df
+    gc.collect()
+    assert key not in percentiles._FRAME_INDEXES
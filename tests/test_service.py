@@ -0,0 +1,108 @@
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+
+import pytest
+
+from analysis import run_model
+from analysis.service import Coalescer, ScoringService, make_server
+
+
+@pytest.fixture
+def service(player_csv) -> ScoringService:
+    return ScoringService(player_csv, min_minutes=900)
+
+
+def test_top_matches_run_model(service, player_csv):
+    body = json.loads(service.handle("/top", {"role": "winger", "top_k": "5"}))
+    expected = run_model("winger", path=player_csv, min_minutes=900, top_k=5)
+
+    assert body["role"] == "winger"
+    assert body["count"] == 5
+    assert [p["ID"] for p in body["players"]] == expected["ID"].tolist()
+    scores = [p["BuyScore"] for p in body["players"]]
+    assert scores == sorted(scores, reverse=True)
+
+
+def test_score_returns_the_sorted_pool(service, player_csv):
+    body = json.loads(service.handle("/score", {"role": "striker", "budget": "15"}))
+    expected = run_model("striker", path=player_csv, min_minutes=900, budget_million=15)
+
+    assert body["count"] == len(expected)
+    scores = [p["BuyScore"] for p in body["players"]]
+    assert scores == sorted(scores, reverse=True)
+
+
+def test_player_reports_role_rank(service):
+    top = json.loads(service.handle("/top", {"role": "midfielder", "top_k": "3"}))
+    second = str(top["players"][1]["ID"])
+
+    body = json.loads(service.handle("/player", {"id": second, "role": "midfielder"}))
+
+    assert str(body["player"]["ID"]) == second
+    assert body["rank"] == 2
+    assert body["pool"] >= 3
+
+
+def test_errors(service):
+    with pytest.raises(LookupError):
+        service.handle("/nope", {})
+    with pytest.raises(LookupError):
+        service.handle("/player", {"id": "no-such-player"})
+    with pytest.raises(ValueError, match="role"):
+        service.handle("/top", {"role": "libero"})
+    with pytest.raises(ValueError, match="Bad query parameter"):
+        service.handle("/top", {"role": "winger", "Goal Threat": "lots"})
+
+
+def test_coalescer_runs_identical_requests_once():
+    coalescer = Coalescer()
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def work():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return "done"
+
+    results = []
+    owner = threading.Thread(target=lambda: results.append(coalescer.run(("/top", 1), work)))
+    owner.start()
+    started.wait(5)
+    waiter = threading.Thread(target=lambda: results.append(coalescer.run(("/top", 1), work)))
+    waiter.start()
+    deadline = time.monotonic() + 5
+    while not coalescer.coalesced["/top"] and time.monotonic() < deadline:
+        time.sleep(0.001)
+    release.set()
+    owner.join(5)
+    waiter.join(5)
+
+    assert results == ["done", "done"]
+    assert len(calls) == 1
+
+
+def test_http_server(service):
+    server = make_server(service, port=0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    base = f"http://127.0.0.1:{server.server_port}"
+    try:
+        with urllib.request.urlopen(f"{base}/top?role=goalkeeper&top_k=2") as resp:
+            assert resp.status == 200
+            assert json.loads(resp.read())["count"] == 2
+
+        with pytest.raises(urllib.error.HTTPError) as err:
+            urllib.request.urlopen(f"{base}/top?role=libero")
+        assert err.value.code == 400
+
+        with urllib.request.urlopen(f"{base}/stats") as resp:
+            latency = json.loads(resp.read())["latency"]
+        assert latency["/top"]["requests"] == 2
+        assert latency["/top"]["errors"] == 1
+    finally:
+        server.shutdown()
+        server.server_close()
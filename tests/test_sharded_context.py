@@ -0,0 +1,90 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from analysis import invalidate_context, model_engine, parallel, run_model, sharded_context
+from analysis.benchmark import _synthetic_team_frame
+from analysis.group_ops import factorize_groups, grouped_zscore
+from analysis.model_engine import (
+    CONTEXT_FAMILIES,
+    add_context_normalised_metrics,
+    add_team_context_metrics,
+    zscore_once,
+)
+from analysis.sharded_context import add_context_normalised_sharded, add_context_sharded
+
+METRICS = [m for fam in CONTEXT_FAMILIES.values() for m in fam[0]]
+
+
+@pytest.fixture(autouse=True)
+def shard_small_frames(monkeypatch):
+    """Shard every frame, however small."""
+    monkeypatch.setattr(parallel, "SHARD_MIN_ROWS", 0)
+    monkeypatch.setattr(sharded_context, "SHARD_MIN_ROWS", 0)
+
+
+@pytest.fixture
+def frame() -> pd.DataFrame:
+    df = _synthetic_team_frame(4_000, n_leagues=7, teams_per_league=5, seed=2, metrics=METRICS)
+    df.loc[::53, "League"] = np.nan
+    return df
+
+
+def test_process_pools_never_fork():
+    assert parallel.process_pool_context().get_start_method() in {"forkserver", "spawn"}
+
+
+def test_shards_hold_whole_leagues(frame):
+    shards = sharded_context.league_shards(frame, 3)
+
+    assert len(shards) == 3
+    assert sorted(np.concatenate(shards)) == list(range(len(frame)))
+    leagues = [set(frame["League"].iloc[pos].dropna()) for pos in shards]
+    assert not (leagues[0] & leagues[1] or leagues[0] & leagues[2] or leagues[1] & leagues[2])
+
+
+@pytest.mark.parametrize("use_processes", [False, True])
+def test_sharded_context_matches_serial(frame, use_processes):
+    frame["Turnovers"] = 1.0  # a family with no spread is dropped either way
+    serial = zscore_once(
+        add_context_normalised_metrics(add_team_context_metrics(frame.copy())), ["Pressures_ctx"]
+    )
+
+    sharded = add_context_sharded(
+        frame, zscore_metrics=["Pressures_ctx"], workers=3, use_processes=use_processes
+    )
+
+    assert list(sharded.columns) == list(serial.columns)
+    pd.testing.assert_frame_equal(sharded, serial, check_exact=False, rtol=1e-12)
+
+
+def test_sharded_normalisation_matches_serial(frame):
+    with_team = add_team_context_metrics(frame)
+    serial = add_context_normalised_metrics(with_team.copy(), metrics=["Pressures", "Np_xg", "Np_goals"])
+
+    sharded = add_context_normalised_sharded(
+        with_team, metrics=["Pressures", "Np_xg", "Np_goals"], workers=3
+    )
+
+    assert sorted(sharded.columns) == sorted(serial.columns)
+    pd.testing.assert_frame_equal(sharded[serial.columns], serial, check_exact=False, rtol=1e-12)
+
+
+def test_sharded_zscore_is_identical(frame):
+    codes, leagues = factorize_groups(frame, "League")
+    values = frame[METRICS[:4]].to_numpy(dtype=float)
+
+    np.testing.assert_array_equal(
+        parallel.sharded_grouped_zscore(values, codes, len(leagues), workers=2),
+        grouped_zscore(values, codes, len(leagues)),
+    )
+
+
+def test_run_model_with_context_workers_matches_serial(player_csv, monkeypatch):
+    serial = run_model("midfielder", path=player_csv)
+
+    monkeypatch.setattr(model_engine, "CONTEXT_WORKERS", 2)
+    invalidate_context()
+    sharded = run_model("midfielder", path=player_csv)
+
+    pd.testing.assert_frame_equal(sharded.loc[serial.index, serial.columns], serial)